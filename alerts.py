@@ -0,0 +1,465 @@
+"""
+Headless failure alerting for the Bot Monitoring Dashboard
+Follows the incremental run stream, keeps per-flow failure streaks and error-rate windows,
+and emits alerts to pluggable sinks (log, JSON lines file, webhook) without the Streamlit UI
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import urllib.request
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+
+import metrics
+from metrics import ALERTS_EMITTED, ALERT_DETECTION_SECONDS, ALERT_POLL_SECONDS, ALERT_SINK_ERRORS
+
+logger = logging.getLogger('alerts')
+
+# The failure and success tiers of STATUS_PRIORITY in data_processing.processors
+FAILED_STATUSES = frozenset(["Failed", "Error", "TimedOut"])
+SUCCEEDED_STATUSES = frozenset(["Succeeded", "Completed", "Done"])
+
+# Alert rules
+FAILURE_STREAK = 'failure_streak'
+ERROR_RATE = 'error_rate'
+RECOVERED = 'recovered'
+
+# Columns of the run stream the evaluator reads
+STREAM_COLUMNS = ['flowguid', 'flowname', 'flowowner', 'datetimestarted', 'datetimecompleted', 'taskstatus']
+
+class Alert:
+    """One alert raised for a flow by a run"""
+
+    __slots__ = ('rule', 'flowname', 'flowowner', 'flowguid', 'status', 'completed_at', 'detected_at',
+                 'streak', 'failures', 'runs', 'message')
+
+    def __init__(self, rule: str, flowname: str, flowowner: str, flowguid: str, status: str,
+                 completed_at: Optional[datetime], streak: int, failures: int, runs: int, message: str):
+        self.rule = rule
+        self.flowname = flowname
+        self.flowowner = flowowner
+        self.flowguid = flowguid
+        self.status = status
+        self.completed_at = completed_at
+        self.detected_at = datetime.now()
+        self.streak = streak
+        # Failures and runs in the error-rate window
+        self.failures = failures
+        self.runs = runs
+        self.message = message
+
+    @property
+    def detection_seconds(self) -> Optional[float]:
+        """Seconds from the run completing to the alert being raised"""
+        if self.completed_at is None:
+            return None
+        return (self.detected_at - self.completed_at).total_seconds()
+
+    def to_dict(self) -> Dict:
+        return {
+            'rule': self.rule,
+            'flowname': self.flowname,
+            'flowowner': self.flowowner,
+            'flowguid': self.flowguid,
+            'status': self.status,
+            'completed_at': self.completed_at.isoformat() if self.completed_at is not None else None,
+            'detected_at': self.detected_at.isoformat(),
+            'streak': self.streak,
+            'failures': self.failures,
+            'runs': self.runs,
+            'message': self.message,
+        }
+
+class FlowState:
+    """
+    Alerting state of one flow: constant size whatever the flow's run count.
+
+    The error-rate window is a ring of ``buckets`` time buckets; a slot is
+    reused (and reset) when its bucket falls out of the window.
+    """
+
+    __slots__ = ('streak', 'streak_alerted', 'rate_alerted', 'bucket_ids', 'failures', 'runs')
+
+    def __init__(self, buckets: int):
+        self.streak = 0
+        self.streak_alerted = False
+        self.rate_alerted = False
+        self.bucket_ids = [-1] * buckets
+        self.failures = [0] * buckets
+        self.runs = [0] * buckets
+
+class AlertEvaluator:
+    """
+    Evaluates finished runs against per-flow alert rules.
+
+    Rules:
+        failure_streak: ``failure_streak`` consecutive failed runs (raised once per streak)
+        recovered: first successful run after a failure_streak alert
+        error_rate: at least ``error_rate`` of the flow's runs in the last
+            ``window_seconds`` failed, over at least ``min_runs`` runs (raised
+            again only after the rate dropped below the threshold)
+
+    Cancelled and other non-terminal outcomes leave the state unchanged.
+    Each run is an O(1) update of its flow's state.
+    """
+
+    def __init__(self, sinks: Optional[List['AlertSink']] = None, failure_streak: int = 1, error_rate: float = 0.5,
+                 min_runs: int = 4, window_seconds: float = 3600, buckets: int = 12):
+        self.sinks = list(sinks or [])
+        self.failure_streak = failure_streak
+        self.error_rate = error_rate
+        self.min_runs = min_runs
+        self.buckets = buckets
+        self.bucket_seconds = window_seconds / buckets
+        self.flows: Dict[Tuple[str, str], FlowState] = {}
+        self.runs_evaluated = 0
+        self.alerts_raised = 0
+
+    def evaluate(self, runs: pd.DataFrame) -> List[Alert]:
+        """
+        Update the flow states with finished runs and emit the alerts they raise.
+
+        Args:
+            runs: Finished runs (flowname, flowowner, flowguid, taskstatus, datetimecompleted);
+                they are applied in completion order
+
+        Returns:
+            list: Alerts raised, also passed to every sink
+        """
+        if runs is None or runs.empty:
+            return []
+        completed = pd.to_datetime(runs['datetimecompleted'], errors='coerce')
+        runs = runs.assign(datetimecompleted=completed).sort_values('datetimecompleted', kind='stable',
+                                                                     na_position='last')
+        # Wall-clock seconds of the completion (detection time if unknown), for the window buckets
+        seconds = runs['datetimecompleted'].fillna(pd.Timestamp.now()).to_numpy(dtype='datetime64[ns]').view('i8') / 1e9
+        alerts = []
+        for flowname, flowowner, flowguid, status, completed_at, timestamp in zip(
+                runs['flowname'], runs['flowowner'], runs['flowguid'], runs['taskstatus'],
+                runs['datetimecompleted'], seconds.tolist()):
+            completed_at = None if pd.isna(completed_at) else completed_at.to_pydatetime()
+            self._observe(flowname, flowowner, flowguid, status, completed_at, timestamp, alerts)
+        self.runs_evaluated += len(runs)
+        if alerts:
+            self._emit(alerts)
+        return alerts
+
+    def _observe(self, flowname, flowowner, flowguid, status, completed_at, timestamp: float,
+                 alerts: List[Alert]) -> None:
+        failed = status in FAILED_STATUSES
+        if not failed and status not in SUCCEEDED_STATUSES:
+            return
+        key = (flowname, flowowner)
+        state = self.flows.get(key)
+        if state is None:
+            state = self.flows[key] = FlowState(self.buckets)
+
+        # Error-rate window, bucketed by completion time
+        bucket = int(timestamp // self.bucket_seconds)
+        slot = bucket % self.buckets
+        in_window = state.bucket_ids[slot] <= bucket
+        if in_window:
+            if state.bucket_ids[slot] != bucket:
+                state.bucket_ids[slot] = bucket
+                state.failures[slot] = 0
+                state.runs[slot] = 0
+            state.runs[slot] += 1
+            state.failures[slot] += failed
+        failures, runs = self._window_counts(state, max(state.bucket_ids))
+
+        # Failure streak
+        if failed:
+            state.streak += 1
+            if state.streak >= self.failure_streak and not state.streak_alerted:
+                state.streak_alerted = True
+                alerts.append(Alert(FAILURE_STREAK, flowname, flowowner, flowguid, status, completed_at,
+                                    state.streak, failures, runs, f"{flowname} failed {state.streak} time(s) in a row"))
+        else:
+            if state.streak_alerted:
+                alerts.append(Alert(RECOVERED, flowname, flowowner, flowguid, status, completed_at,
+                                    state.streak, failures, runs, f"{flowname} succeeded after {state.streak} failure(s)"))
+            state.streak = 0
+            state.streak_alerted = False
+
+        # Error rate (a run older than the flow's window doesn't change it)
+        if not in_window:
+            return
+        if runs >= self.min_runs and failures >= self.error_rate * runs:
+            if not state.rate_alerted:
+                state.rate_alerted = True
+                alerts.append(Alert(ERROR_RATE, flowname, flowowner, flowguid, status, completed_at,
+                                    state.streak, failures, runs, f"{flowname}: {failures} of the last {runs} runs failed"))
+        else:
+            state.rate_alerted = False
+
+    def _window_counts(self, state: FlowState, bucket: int) -> Tuple[int, int]:
+        oldest = bucket - self.buckets
+        failures = runs = 0
+        for slot in range(self.buckets):
+            if state.bucket_ids[slot] > oldest:
+                failures += state.failures[slot]
+                runs += state.runs[slot]
+        return failures, runs
+
+    def _emit(self, alerts: List[Alert]) -> None:
+        self.alerts_raised += len(alerts)
+        for alert in alerts:
+            ALERTS_EMITTED.labels(alert.rule).inc()
+            if alert.detection_seconds is not None:
+                ALERT_DETECTION_SECONDS.observe(max(0.0, alert.detection_seconds))
+        for sink in self.sinks:
+            try:
+                sink.emit(alerts)
+            except Exception as e:
+                ALERT_SINK_ERRORS.labels(sink.name).inc()
+                logger.error(f"Alert sink {sink.name} failed: {e}")
+
+class RunStream:
+    """
+    Runs that finished since the previous poll, read with the dashboard's open/new run query.
+
+    Each poll re-reads the runs still in progress plus every run started
+    since ``overlap_seconds`` before the newest start seen (rows can reach
+    the history table after later-starting runs). Runs already returned as
+    finished within the overlap are skipped, so the state is the open runs
+    and the runs of the overlap window only.
+    """
+
+    def __init__(self, fetch: Optional[Callable[[List[str], Optional[datetime]], pd.DataFrame]] = None,
+                 lookback_seconds: float = 900, overlap_seconds: float = 300):
+        if fetch is None:
+            from secure_db_connection import fetch_open_and_new_runs as fetch
+        self.fetch = fetch
+        self.overlap = timedelta(seconds=overlap_seconds)
+        # Start time the first poll reads from; afterwards the newest start time seen
+        self.newest_start = datetime.now() - timedelta(seconds=lookback_seconds) + self.overlap
+        self.open_guids: Set[str] = set()
+        self._finished: Dict[str, datetime] = {}
+
+    def poll(self) -> pd.DataFrame:
+        """
+        Returns:
+            pandas.DataFrame: Runs that finished since the previous poll (each returned once)
+        """
+        since = self.newest_start - self.overlap
+        rows = self.fetch(sorted(self.open_guids), since)
+        if rows is None or rows.empty:
+            return pd.DataFrame(columns=STREAM_COLUMNS)
+        rows = rows[rows['flowguid'].notna()]
+        started = pd.to_datetime(rows['datetimestarted'], errors='coerce')
+        running = (rows['taskstatus'] == 'Running') & pd.to_datetime(rows['datetimecompleted'], errors='coerce').isna()
+        finished = ~running & ~rows['flowguid'].isin(self._finished)
+
+        self.open_guids.difference_update(rows.loc[~running, 'flowguid'])
+        self.open_guids.update(rows.loc[running, 'flowguid'])
+        self._finished.update(zip(rows.loc[finished, 'flowguid'], started[finished]))
+        newest = started.max()
+        if pd.notna(newest) and newest.to_pydatetime() > self.newest_start:
+            self.newest_start = newest.to_pydatetime()
+        cutoff = self.newest_start - self.overlap
+        self._finished = {guid: start for guid, start in self._finished.items() if not start < cutoff}
+        return rows[finished]
+
+class AlertSink:
+    """Destination for alerts; ``emit`` receives every batch raised by one evaluation"""
+
+    name = 'sink'
+
+    def emit(self, alerts: List[Alert]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+class LogSink(AlertSink):
+    """Write alerts to the log (warning level, recoveries at info)"""
+
+    name = 'log'
+
+    def emit(self, alerts: List[Alert]) -> None:
+        for alert in alerts:
+            level = logging.INFO if alert.rule == RECOVERED else logging.WARNING
+            logger.log(level, f"ALERT [{alert.rule}] {alert.message} ({alert.flowowner}, run {alert.flowguid})")
+
+class FileSink(AlertSink):
+    """Append alerts to a JSON lines file"""
+
+    name = 'file'
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def emit(self, alerts: List[Alert]) -> None:
+        lines = ''.join(json.dumps(alert.to_dict()) + '\n' for alert in alerts)
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+
+class WebhookSink(AlertSink):
+    """
+    POST alert batches as JSON (``{"alerts": [...]}``) to a URL.
+
+    Delivery runs on a background thread so a slow endpoint never delays
+    evaluation; failed posts are retried with backoff, then dropped.
+    """
+
+    name = 'webhook'
+
+    def __init__(self, url: str, timeout: float = 5, retries: int = 2, max_pending: int = 1000):
+        self.url = url
+        self.timeout = timeout
+        self.retries = retries
+        self.delivered = 0
+        self._queue: "queue.Queue[Optional[List[Dict]]]" = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._deliver, name='alert-webhook', daemon=True)
+        self._thread.start()
+
+    def emit(self, alerts: List[Alert]) -> None:
+        try:
+            self._queue.put_nowait([alert.to_dict() for alert in alerts])
+        except queue.Full:
+            ALERT_SINK_ERRORS.labels(self.name).inc()
+            logger.error(f"Webhook queue full, dropped {len(alerts)} alerts")
+
+    def _post(self, body: bytes) -> None:
+        request = urllib.request.Request(self.url, data=body, headers={'Content-Type': 'application/json'},
+                                         method='POST')
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    def _deliver(self) -> None:
+        while True:
+            batch = self._queue.get()
+            if batch is None:
+                self._queue.task_done()
+                return
+            body = json.dumps({'alerts': batch}).encode('utf-8')
+            for attempt in range(self.retries + 1):
+                try:
+                    self._post(body)
+                    self.delivered += len(batch)
+                    break
+                except Exception as e:
+                    if attempt == self.retries:
+                        ALERT_SINK_ERRORS.labels(self.name).inc()
+                        logger.error(f"Webhook delivery of {len(batch)} alerts failed: {e}")
+                    else:
+                        time.sleep(0.5 * 2 ** attempt)
+            self._queue.task_done()
+
+    def flush(self) -> None:
+        """Wait until every queued batch was delivered or dropped"""
+        self._queue.join()
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=self.timeout * (self.retries + 1) + 5)
+
+class MemorySink(AlertSink):
+    """Keep alerts in memory: a local stand-in for the other sinks in tests and benchmarks"""
+
+    name = 'memory'
+
+    def __init__(self):
+        self.alerts: List[Alert] = []
+
+    def emit(self, alerts: List[Alert]) -> None:
+        self.alerts.extend(alerts)
+
+def sinks_from_env(names: Optional[Iterable[str]] = None) -> List[AlertSink]:
+    """
+    Build the sinks listed in ``names`` or ALERT_SINKS (comma separated, default 'log').
+
+    'file' writes to ALERT_FILE (default alerts.jsonl), 'webhook' posts to ALERT_WEBHOOK_URL.
+    """
+    if names is None:
+        names = os.getenv('ALERT_SINKS', 'log').split(',')
+    sinks = []
+    for name in (name.strip() for name in names):
+        if name == 'log':
+            sinks.append(LogSink())
+        elif name == 'file':
+            sinks.append(FileSink(os.getenv('ALERT_FILE', 'alerts.jsonl')))
+        elif name == 'webhook':
+            url = os.getenv('ALERT_WEBHOOK_URL')
+            if url:
+                sinks.append(WebhookSink(url))
+            else:
+                logger.warning("Webhook sink requested but ALERT_WEBHOOK_URL is not set")
+        elif name == 'memory':
+            sinks.append(MemorySink())
+        elif name:
+            logger.warning(f"Unknown alert sink: {name}")
+    return sinks
+
+def run(evaluator: AlertEvaluator, stream: RunStream, poll_seconds: float = 5,
+        max_polls: Optional[int] = None, stop: Optional[threading.Event] = None) -> None:
+    """
+    Poll the run stream and evaluate the finished runs until stopped.
+
+    A failed poll is logged and retried on the next interval. Detection
+    latency is bounded by ``poll_seconds`` plus the query time.
+    """
+    stop = stop or threading.Event()
+    polls = 0
+    while not stop.is_set() and (max_polls is None or polls < max_polls):
+        started = time.perf_counter()
+        try:
+            with ALERT_POLL_SECONDS.time():
+                finished = stream.poll()
+                alerts = evaluator.evaluate(finished)
+            if len(finished) or alerts:
+                logger.info(f"Evaluated {len(finished)} finished runs of {len(evaluator.flows)} flows, "
+                            f"{len(alerts)} alerts ({(time.perf_counter() - started) * 1000:.0f} ms)")
+        except Exception as e:
+            logger.error(f"Alert poll failed: {e}")
+        metrics.write_textfile_from_env()
+        polls += 1
+        if max_polls is None or polls < max_polls:
+            stop.wait(max(0.0, poll_seconds - (time.perf_counter() - started)))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate flow runs for failure alerts without the dashboard")
+    parser.add_argument('--poll-seconds', type=float, default=float(os.getenv('ALERT_POLL_SECONDS', '5')),
+                        help="Seconds between polls of the run stream")
+    parser.add_argument('--failure-streak', type=int, default=int(os.getenv('ALERT_FAILURE_STREAK', '1')),
+                        help="Consecutive failed runs that raise an alert")
+    parser.add_argument('--error-rate', type=float, default=float(os.getenv('ALERT_ERROR_RATE', '0.5')),
+                        help="Share of failed runs in the window that raises an alert")
+    parser.add_argument('--min-runs', type=int, default=int(os.getenv('ALERT_MIN_RUNS', '4')),
+                        help="Runs in the window needed before the error rate is checked")
+    parser.add_argument('--window-minutes', type=float, default=float(os.getenv('ALERT_WINDOW_MINUTES', '60')),
+                        help="Error-rate window")
+    parser.add_argument('--lookback-minutes', type=float, default=float(os.getenv('ALERT_LOOKBACK_MINUTES', '15')),
+                        help="Runs started this long before startup are evaluated on the first poll")
+    parser.add_argument('--sink', action='append', choices=['log', 'file', 'webhook', 'memory'],
+                        help="Alert sink (repeatable, default ALERT_SINKS or log)")
+    parser.add_argument('--once', action='store_true', help="Poll once and exit")
+    args = parser.parse_args(argv)
+
+    sinks = sinks_from_env(args.sink)
+    evaluator = AlertEvaluator(sinks, failure_streak=args.failure_streak, error_rate=args.error_rate,
+                               min_runs=args.min_runs, window_seconds=args.window_minutes * 60)
+    stream = RunStream(lookback_seconds=args.lookback_minutes * 60)
+    metrics.start_exporters_from_env()
+    logger.info(f"Alert evaluator started: poll every {args.poll_seconds}s, sinks {[sink.name for sink in sinks]}")
+    try:
+        run(evaluator, stream, poll_seconds=args.poll_seconds, max_polls=1 if args.once else None)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for sink in sinks:
+            sink.close()
+    return 0
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    sys.exit(main())
@@ -0,0 +1,550 @@
+"""
+Headless JSON/Arrow API for the Bot Monitoring Dashboard
+Serves the hourly matrix, project metrics and run lists from the same cached data as the dashboard,
+with ETags and conditional requests so pollers get a 304 when nothing changed
+
+Usage:
+    python api.py --port 8502
+    ARROW_SNAPSHOT_DIR=snapshots python api.py      # read the snapshot the dashboard workers map
+    curl -i 'http://127.0.0.1:8502/api/matrix?project=Finance'
+    curl -i -H 'If-None-Match: "<etag>"' 'http://127.0.0.1:8502/api/matrix?project=Finance'
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from metrics import API_REQUESTS, API_REQUEST_SECONDS
+from data_processing.cache import combine_fingerprint, fingerprint_rows
+from data_processing.processors import (
+    process_partition, get_hourly_matrix, has_open_runs, refresh_flow_mapping, PARTITION_CACHE, FLOW_MAPPING,
+    SCHEDULE_INDEX
+)
+from data_processing.query_engine import compute_dashboard_aggregates
+from secure_db_connection import get_flow_data
+
+logger = logging.getLogger('api')
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+try:
+    from fastapi import FastAPI, HTTPException, Request, Response
+    from fastapi.concurrency import run_in_threadpool
+    from fastapi.middleware.gzip import GZipMiddleware
+    from fastapi.responses import PlainTextResponse
+    FASTAPI_AVAILABLE = True
+except ImportError:
+    logger.warning("fastapi not available - the JSON/Arrow API is disabled")
+    FASTAPI_AVAILABLE = False
+
+JSON_MEDIA_TYPE = 'application/json'
+ARROW_MEDIA_TYPE = 'application/vnd.apache.arrow.stream'
+
+ALL_PROJECTS, ALL_STATUSES, ALL_OWNERS = 'All Projects', 'All Statuses', 'All Owners'
+
+# Columns of the run lists, in order (those missing from the data are skipped)
+RUN_COLUMNS = ['display_name', 'automation_project', 'owner', 'flowname', 'flowguid', 'taskstatus', 'triggertype',
+               'state', 'datetimestarted', 'datetimecompleted', 'hour']
+
+# Tables of the metrics endpoint in Arrow format (JSON responses carry all of them)
+METRICS_TABLES = ('projects', 'hourly', 'top_failing')
+
+MAX_RUNS_LIMIT = 50000
+
+class ApiSnapshot:
+    """
+    One loaded version of the run history, split into day partitions.
+
+    A day is processed through the dashboard's partition cache on first use;
+    its version (the partition fingerprint) is what the ETags of every
+    response about that day derive from, so checking a conditional request
+    is a dict lookup once the day was processed.
+    """
+
+    __slots__ = ('frame', 'loaded_at', 'days', 'history_version', '_partitions', '_lock')
+
+    def __init__(self, frame: pd.DataFrame, previous: Optional['ApiSnapshot'] = None):
+        started = pd.to_datetime(frame['datetimestarted'], errors='coerce')
+        self.frame = frame.assign(datetimestarted=started)
+        self.loaded_at = datetime.now()
+
+        # Row positions per day, in the original row order (the order the dashboard's date filter keeps)
+        day_values = started.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+        codes, uniques = pd.factorize(day_values, sort=True)
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        self.days: Dict[date, np.ndarray] = {
+            pd.Timestamp(day).date(): order[bounds[i]:bounds[i + 1]] for i, day in enumerate(uniques)
+        }
+        self.history_version = combine_fingerprint(np.array(
+            [(day.toordinal(), len(rows)) for day, rows in self.days.items()], dtype=np.uint64))
+        self._lock = threading.Lock()
+        self._partitions: Dict[date, Tuple[pd.DataFrame, str]] = {}
+        if previous is not None:
+            # Past days with the same row count and no open runs are immutable (as in process_partition);
+            # an open run completes in place, so its day is processed and versioned again
+            today = date.today()
+            for day, partition in previous._partitions.items():
+                if (day < today and day in self.days and len(previous.days[day]) == len(self.days[day])
+                        and not has_open_runs(previous.frame.iloc[previous.days[day]])):
+                    self._partitions[day] = partition
+
+    def latest_day(self) -> Optional[date]:
+        return max(self.days) if self.days else None
+
+    def cached_version(self, day: date) -> Optional[str]:
+        """Version of a day that was already processed, None otherwise"""
+        partition = self._partitions.get(day)
+        return partition[1] if partition is not None else None
+
+    def schedule_version(self, day: date) -> str:
+        """Row counts of the days the missed-run marks of ``day`` are inferred from (see ScheduleIndex.refresh)"""
+        first = day.toordinal() - SCHEDULE_INDEX.history_days
+        return combine_fingerprint(np.array(
+            [(d.toordinal(), len(rows)) for d, rows in self.days.items() if first <= d.toordinal() < day.toordinal()],
+            dtype=np.uint64).reshape(-1, 2))
+
+    def partition(self, day: date) -> Tuple[pd.DataFrame, str]:
+        """
+        Processed rows of a day and their version.
+
+        Returns:
+            tuple: (processed frame, version string)
+        """
+        with self._lock:
+            partition = self._partitions.get(day)
+            if partition is None:
+                rows = self.frame.iloc[self.days[day]]
+                processed = process_partition(rows, day)
+                entry = PARTITION_CACHE.get(day)
+                if entry is not None and len(entry.frame) == len(processed):
+                    version = entry.fingerprint
+                else:
+                    version = combine_fingerprint(fingerprint_rows(rows))
+                partition = self._partitions[day] = (processed, version)
+            return partition
+
+class SnapshotStore:
+    """
+    Current ApiSnapshot, reloaded on a background thread every ``refresh_seconds``.
+
+    Data comes from get_flow_data: the shared Arrow snapshot when
+    ARROW_SNAPSHOT_DIR is set, otherwise the incremental database snapshot
+    (open and new runs only between full refreshes) or CSV files.
+    """
+
+    def __init__(self, load: Optional[Callable[[], pd.DataFrame]] = None, refresh_seconds: float = 60,
+                 use_csv: bool = False):
+        self.load = load
+        self.refresh_seconds = refresh_seconds
+        self.use_csv = use_csv
+        self.current: Optional[ApiSnapshot] = None
+        self.refreshes = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self) -> bool:
+        """
+        Load the run history and make it the current snapshot.
+
+        Returns:
+            bool: True if a snapshot was loaded (an empty or failed load keeps the current one)
+        """
+        try:
+            df = self.load() if self.load is not None else get_flow_data(use_csv=self.use_csv)
+            if df is None or df.empty:
+                logger.warning("No data loaded, keeping the current API snapshot")
+                return False
+            # Days processed under a previous flow mapping are not carried over
+            remapped = refresh_flow_mapping()
+            self.current = ApiSnapshot(df, previous=None if remapped else self.current)
+            self.refreshes += 1
+            logger.info(f"API snapshot loaded with {len(df)} rows over {len(self.current.days)} days")
+            return True
+        except Exception as e:
+            logger.error(f"Could not refresh the API snapshot: {e}")
+            return False
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            self.refresh()
+            self._stop.wait(max(1.0, self.refresh_seconds - (time.perf_counter() - started)))
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='api-snapshot', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+class ResponseCache:
+    """
+    Encoded response bodies by ETag.
+
+    A body is computed once per ETag on the thread pool; requests arriving
+    while it is being computed wait for the same result instead of starting
+    another computation. Only used from the event loop, so no locking.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, etag: str, compute: Callable[[], bytes]) -> bytes:
+        body = self._entries.get(etag)
+        if body is not None:
+            self._entries.move_to_end(etag)
+            self.hits += 1
+            return body
+        pending = self._pending.get(etag)
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = self._pending[etag] = asyncio.get_running_loop().create_future()
+        try:
+            body = await run_in_threadpool(compute)
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when no other request was waiting for it
+            future.exception()
+            raise
+        finally:
+            self._pending.pop(etag, None)
+        future.set_result(body)
+        self._entries[etag] = body
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return body
+
+def make_etag(*parts) -> str:
+    """Strong ETag of a response derived from the route, its normalized parameters and the data versions"""
+    return '"' + hashlib.blake2b('|'.join(map(str, parts)).encode('utf-8'), digest_size=12).hexdigest() + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header lists ``etag`` (weak comparison, as RFC 9110 requires for it) or is *"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    return any(tag.strip().removeprefix('W/') == etag for tag in if_none_match.split(','))
+
+def encode_json(payload) -> bytes:
+    return json.dumps(payload, separators=(',', ':'), default=str).encode('utf-8')
+
+def encode_arrow(frame: pd.DataFrame) -> bytes:
+    """Frame as an Arrow IPC stream"""
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def _records(frame: pd.DataFrame) -> List[Dict]:
+    # to_json writes NaN as null and timestamps as ISO strings
+    return json.loads(frame.to_json(orient='records', date_format='iso'))
+
+def filter_partition(processed_df: pd.DataFrame, project: str = ALL_PROJECTS, status: str = ALL_STATUSES,
+                     owner: str = ALL_OWNERS) -> pd.DataFrame:
+    """Apply the dashboard's project, status and owner filters to a processed partition"""
+    mask = np.ones(len(processed_df), dtype=bool)
+    if project != ALL_PROJECTS:
+        mask = mask & (processed_df['automation_project'] == project).to_numpy()
+    if status != ALL_STATUSES:
+        mask = mask & (processed_df['taskstatus'] == status).to_numpy()
+    if owner != ALL_OWNERS:
+        mask = mask & (processed_df['owner'] == owner).to_numpy()
+    return processed_df[mask]
+
+def matrix_frame(bot_hour_status: Dict[str, Dict[int, str]], display_names: List[str], hours: List[int]) -> pd.DataFrame:
+    """Matrix as one row per bot and one categorical status column per hour ('00' to '23')"""
+    columns = {'display_name': list(display_names)}
+    for hour in hours:
+        columns[f"{hour:02d}"] = pd.Categorical([bot_hour_status[name].get(hour, "No Run") for name in display_names])
+    return pd.DataFrame(columns)
+
+def build_matrix(snapshot: ApiSnapshot, day: date, project: str, status: str, owner: str, max_rows: int,
+                 current_hour: Optional[int], fmt: str) -> bytes:
+    """Hourly matrix of a day as the dashboard shows it, missed scheduled runs included"""
+    processed_df, _ = snapshot.partition(day)
+    filtered_df = filter_partition(processed_df, project, status, owner)
+    if filtered_df.empty:
+        bot_hour_status, display_names, hours = {}, [], list(range(24))
+    else:
+        bot_hour_status, display_names, hours = get_hourly_matrix(
+            filtered_df, day, selected_project=project, selected_status=status, selected_owner=owner, max_rows=max_rows)
+    if status == ALL_STATUSES and display_names:
+        # Refreshed for this day and read under the index lock, so the body matches schedule_version(day); unlike
+        # mark_missed_runs an error propagates, and ResponseCache does not keep an unmarked body under the ETag
+        bot_hour_status = SCHEDULE_INDEX.mark_missed_for(snapshot.frame, bot_hour_status, display_names, day, current_hour)
+    if fmt == 'arrow':
+        return encode_arrow(matrix_frame(bot_hour_status, display_names, hours))
+    return encode_json({
+        'date': day.isoformat(),
+        'hours': list(hours),
+        'rows': [{'display_name': name, 'cells': [bot_hour_status[name].get(hour, "No Run") for hour in hours]}
+                 for name in display_names]
+    })
+
+def build_metrics(snapshot: ApiSnapshot, day: date, project: str, status: str, owner: str, table: str,
+                  fmt: str) -> bytes:
+    """Run counts, success rates per project and hour, and the most failing flows of a day"""
+    processed_df, _ = snapshot.partition(day)
+    filtered_df = filter_partition(processed_df, project, status, owner)
+    if filtered_df.empty:
+        raise LookupError("No runs for the selected filters")
+    aggregates = compute_dashboard_aggregates(processed_df, filtered_df, day, selected_project=project,
+                                              selected_status=status, selected_owner=owner)
+    tables = {
+        'projects': aggregates.project_stats.reset_index(),
+        'hourly': aggregates.hourly.reset_index(),
+        'top_failing': aggregates.top_failing.reset_index(),
+    }
+    if fmt == 'arrow':
+        return encode_arrow(tables[table])
+    return encode_json({
+        'date': day.isoformat(),
+        'runs': len(filtered_df),
+        'success_rate': float(filtered_df['wassuccessful'].mean()),
+        'failed_runs': int((filtered_df['taskstatus'] == 'Failed').sum()),
+        **{name: _records(frame) for name, frame in tables.items()}
+    })
+
+def build_runs(snapshot: ApiSnapshot, day: date, project: str, status: str, owner: str,
+               display_name: Optional[str], hour: Optional[int], limit: int, fmt: str) -> bytes:
+    """Runs of a day (or of one bot, or one matrix cell), most recent first"""
+    processed_df, _ = snapshot.partition(day)
+    runs = filter_partition(processed_df, project, status, owner)
+    if display_name is not None:
+        runs = runs[runs['display_name'] == display_name]
+    if hour is not None:
+        runs = runs[runs['hour'] == hour]
+    total = len(runs)
+    runs = runs.sort_values('datetimestarted', ascending=False, kind='stable').head(limit)
+    runs = runs[[column for column in RUN_COLUMNS if column in runs.columns]]
+    if fmt == 'arrow':
+        return encode_arrow(runs)
+    # The run list is the bulk of the response: written by to_json without a round trip through Python objects
+    header = encode_json({'date': day.isoformat(), 'total': total, 'returned': len(runs)})
+    return header[:-1] + b',"runs":' + runs.to_json(orient='records', date_format='iso').encode('utf-8') + b'}'
+
+STORE = SnapshotStore(refresh_seconds=float(os.getenv('API_REFRESH_SECONDS', '60')))
+RESPONSES = ResponseCache(max_entries=int(os.getenv('API_RESPONSE_CACHE_ENTRIES', '256')))
+metrics.register_cache('api_response', RESPONSES)
+
+def create_app(store: SnapshotStore = STORE, responses: ResponseCache = RESPONSES) -> 'FastAPI':
+    """
+    Build the API application.
+
+    Routes (all GET; ``date`` defaults to the latest day of the data):
+        /api/health: snapshot size and age
+        /api/dates: days with runs and their run counts
+        /api/matrix: hourly matrix (date, project, status, owner, max_rows)
+        /api/metrics: project and hourly stats and top failing flows (same filters; ``table`` picks the Arrow table)
+        /api/runs: run list (same filters, display_name, hour, limit)
+        /metrics: Prometheus text format
+
+    Data routes answer in JSON, or as an Arrow IPC stream with ``format=arrow``
+    or an ``Accept: application/vnd.apache.arrow.stream`` header, and carry an
+    ETag; a request whose If-None-Match matches it gets a 304 without the body
+    being computed or sent.
+    """
+    if not FASTAPI_AVAILABLE:
+        raise ImportError("fastapi is required for the JSON/Arrow API")
+
+    @asynccontextmanager
+    async def lifespan(app):
+        store.start()
+        try:
+            yield
+        finally:
+            store.stop()
+
+    app = FastAPI(title="Bot Monitoring Dashboard API", lifespan=lifespan)
+    # Level 5: the matrix compresses nearly as well as at 9 for a fraction of the CPU per response
+    app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+    @app.middleware('http')
+    async def record_request(request: Request, call_next):
+        started = time.perf_counter()
+        response = await call_next(request)
+        route = request.scope.get('route')
+        path = route.path if route is not None else 'other'
+        API_REQUESTS.labels(path, str(response.status_code)).inc()
+        API_REQUEST_SECONDS.labels(path).observe(time.perf_counter() - started)
+        return response
+
+    def current_snapshot() -> ApiSnapshot:
+        snapshot = store.current
+        if snapshot is None:
+            raise HTTPException(status_code=503, detail="Data not loaded yet", headers={'Retry-After': '5'})
+        return snapshot
+
+    def resolve_day(snapshot: ApiSnapshot, value: Optional[str]) -> date:
+        if value is None:
+            return snapshot.latest_day()
+        try:
+            day = date.fromisoformat(value)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid date: {value} (expected YYYY-MM-DD)")
+        if day not in snapshot.days:
+            raise HTTPException(status_code=404, detail=f"No runs on {day}")
+        return day
+
+    def resolve_format(request: Request, value: Optional[str]) -> str:
+        if value is None:
+            value = 'arrow' if ARROW_MEDIA_TYPE in request.headers.get('accept', '') else 'json'
+        if value not in ('json', 'arrow'):
+            raise HTTPException(status_code=400, detail=f"Unknown format: {value} (json or arrow)")
+        if value == 'arrow' and not PYARROW_AVAILABLE:
+            raise HTTPException(status_code=406, detail="Arrow responses need pyarrow on the server")
+        return value
+
+    async def respond(request: Request, etag: str, fmt: str, compute: Callable[[], bytes]) -> Response:
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache', 'Vary': 'Accept, Accept-Encoding'}
+        if etag_matches(request.headers.get('if-none-match'), etag):
+            return Response(status_code=304, headers=headers)
+        try:
+            body = await responses.get(etag, compute)
+        except LookupError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        return Response(body, media_type=ARROW_MEDIA_TYPE if fmt == 'arrow' else JSON_MEDIA_TYPE, headers=headers)
+
+    async def day_version(snapshot: ApiSnapshot, day: date) -> str:
+        # Processing a day for the first time runs on the thread pool, later lookups stay on the loop
+        version = snapshot.cached_version(day)
+        if version is None:
+            version = (await run_in_threadpool(snapshot.partition, day))[1]
+        return version
+
+    @app.get('/api/health')
+    async def health():
+        snapshot = store.current
+        if snapshot is None:
+            return {'status': 'loading', 'rows': 0}
+        return {
+            'status': 'ok',
+            'rows': len(snapshot.frame),
+            'days': len(snapshot.days),
+            'latest_date': snapshot.latest_day(),
+            'loaded_at': snapshot.loaded_at.isoformat(timespec='seconds'),
+            'age_seconds': round((datetime.now() - snapshot.loaded_at).total_seconds(), 1),
+            'flow_mapping_version': FLOW_MAPPING.version,
+        }
+
+    @app.get('/api/dates')
+    async def dates(request: Request):
+        snapshot = current_snapshot()
+        etag = make_etag('dates', snapshot.history_version)
+        return await respond(request, etag, 'json', lambda: encode_json(
+            [{'date': day.isoformat(), 'runs': len(rows)} for day, rows in sorted(snapshot.days.items())]))
+
+    @app.get('/api/matrix')
+    async def matrix(request: Request, date: Optional[str] = None, project: str = ALL_PROJECTS,
+                     status: str = ALL_STATUSES, owner: str = ALL_OWNERS, max_rows: int = 300,
+                     format: Optional[str] = None):
+        snapshot = current_snapshot()
+        day = resolve_day(snapshot, date)
+        fmt = resolve_format(request, format)
+        max_rows = min(max(max_rows, 1), 5000)
+        current_hour = datetime.now().hour if day == datetime.now().date() else None
+        version = await day_version(snapshot, day)
+        etag = make_etag('matrix', fmt, day, project, status, owner, max_rows, version, FLOW_MAPPING.version,
+                         snapshot.schedule_version(day), current_hour)
+        return await respond(request, etag, fmt, lambda: build_matrix(
+            snapshot, day, project, status, owner, max_rows, current_hour, fmt))
+
+    @app.get('/api/metrics')
+    async def project_metrics(request: Request, date: Optional[str] = None, project: str = ALL_PROJECTS,
+                              status: str = ALL_STATUSES, owner: str = ALL_OWNERS, table: str = 'projects',
+                              format: Optional[str] = None):
+        snapshot = current_snapshot()
+        day = resolve_day(snapshot, date)
+        fmt = resolve_format(request, format)
+        if table not in METRICS_TABLES:
+            raise HTTPException(status_code=400, detail=f"Unknown table: {table} ({', '.join(METRICS_TABLES)})")
+        version = await day_version(snapshot, day)
+        etag = make_etag('metrics', fmt, day, project, status, owner, table if fmt == 'arrow' else None,
+                         version, FLOW_MAPPING.version)
+        return await respond(request, etag, fmt, lambda: build_metrics(
+            snapshot, day, project, status, owner, table, fmt))
+
+    @app.get('/api/runs')
+    async def runs(request: Request, date: Optional[str] = None, project: str = ALL_PROJECTS,
+                   status: str = ALL_STATUSES, owner: str = ALL_OWNERS, display_name: Optional[str] = None,
+                   hour: Optional[int] = None, limit: int = 1000, format: Optional[str] = None):
+        snapshot = current_snapshot()
+        day = resolve_day(snapshot, date)
+        fmt = resolve_format(request, format)
+        limit = min(max(limit, 0), MAX_RUNS_LIMIT)
+        version = await day_version(snapshot, day)
+        etag = make_etag('runs', fmt, day, project, status, owner, display_name, hour, limit, version,
+                         FLOW_MAPPING.version)
+        return await respond(request, etag, fmt, lambda: build_runs(
+            snapshot, day, project, status, owner, display_name, hour, limit, fmt))
+
+    @app.get('/metrics')
+    async def prometheus_metrics():
+        return PlainTextResponse(metrics.REGISTRY.render(), media_type='text/plain; version=0.0.4')
+
+    return app
+
+app = create_app() if FASTAPI_AVAILABLE else None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the dashboard's matrix, metrics and run lists as JSON or Arrow")
+    parser.add_argument('--host', default=os.getenv('API_HOST', '127.0.0.1'), help="Address to listen on")
+    parser.add_argument('--port', type=int, default=int(os.getenv('API_PORT', '8502')), help="Port to listen on")
+    parser.add_argument('--refresh-seconds', type=float, default=STORE.refresh_seconds,
+                        help="Seconds between reloads of the run history")
+    parser.add_argument('--csv', action='store_true', help="Read from CSV instead of the database")
+    args = parser.parse_args(argv)
+
+    if not FASTAPI_AVAILABLE:
+        logger.error("fastapi is not installed (pip install -r requirements.txt)")
+        return 1
+    try:
+        import uvicorn
+    except ImportError:
+        logger.error("uvicorn is not installed (pip install -r requirements.txt)")
+        return 1
+    STORE.refresh_seconds = args.refresh_seconds
+    STORE.use_csv = args.csv
+    metrics.start_exporters_from_env()
+    uvicorn.run(app, host=args.host, port=args.port, log_level='warning')
+    return 0
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    sys.exit(main())
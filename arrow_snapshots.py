@@ -0,0 +1,189 @@
+"""
+Arrow IPC snapshots of flow run data shared across dashboard worker processes
+
+The ingestion side publishes each snapshot as an Arrow IPC file; every worker
+memory-maps the current file and builds a zero-copy pandas view of it, so the
+pages holding the data live in the OS page cache once for all processes.
+
+Usage:
+    python arrow_snapshots.py publish --dir snapshots               # one snapshot from get_flow_data
+    python arrow_snapshots.py publish --dir snapshots --every 300   # republish every 5 minutes
+    ARROW_SNAPSHOT_DIR=snapshots streamlit run bot_monitor_dashboard.py
+"""
+
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+import pandas as pd
+
+logger = logging.getLogger('arrow_snapshots')
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    PYARROW_AVAILABLE = True
+except ImportError:
+    logger.warning("pyarrow not available - Arrow snapshots disabled")
+    PYARROW_AVAILABLE = False
+
+SNAPSHOT_PREFIX = 'flow_runs_'
+SNAPSHOT_SUFFIX = '.arrow'
+
+# File in the snapshot directory naming the current snapshot
+CURRENT_POINTER = 'CURRENT'
+
+def _write_atomic(path: str, write) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def publish_snapshot(df: pd.DataFrame, directory: str, keep: int = 3) -> str:
+    """
+    Write a frame as a new Arrow IPC snapshot and make it the current one.
+
+    The file is fully written before the CURRENT pointer is switched, so
+    workers never see a partial snapshot. Older snapshots beyond ``keep`` are
+    removed; workers still mapping one keep their view (POSIX unlink semantics).
+
+    Args:
+        df: Raw flow run data (as returned by get_flow_data)
+        directory: Snapshot directory shared by the workers
+        keep: Number of snapshots to retain
+
+    Returns:
+        str: Path of the published snapshot
+    """
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow is required to publish Arrow snapshots")
+    os.makedirs(directory, exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    name = f"{SNAPSHOT_PREFIX}{datetime.now():%Y%m%d_%H%M%S_%f}{SNAPSHOT_SUFFIX}"
+    path = os.path.join(directory, name)
+
+    def write_table(tmp_path):
+        # The IPC file (random access) format is what can be memory-mapped and read without copying
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+    def write_pointer(tmp_path):
+        with open(tmp_path, 'w') as f:
+            f.write(name)
+
+    _write_atomic(path, write_table)
+    _write_atomic(os.path.join(directory, CURRENT_POINTER), write_pointer)
+    logger.info(f"Published snapshot {name} with {table.num_rows} rows ({table.nbytes / 2**20:.1f} MiB)")
+
+    snapshots = sorted(f for f in os.listdir(directory) if f.startswith(SNAPSHOT_PREFIX) and f.endswith(SNAPSHOT_SUFFIX))
+    for old in snapshots[:-keep] if keep > 0 else []:
+        try:
+            os.remove(os.path.join(directory, old))
+        except OSError as e:
+            # Windows refuses to delete files that are still mapped; retry on the next publish
+            logger.debug(f"Could not remove old snapshot {old}: {e}")
+    return path
+
+class SnapshotReader:
+    """
+    Memory-mapped view of the current snapshot in a directory.
+
+    The CURRENT pointer is re-read only when its modification time changes;
+    until then every call returns a shallow copy of the same zero-copy frame.
+    Columns are Arrow-backed (pd.ArrowDtype) views into the mapped file.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.name: Optional[str] = None
+        self._pointer_signature = None
+        self._table = None
+        self._frame: Optional[pd.DataFrame] = None
+        self._lock = threading.Lock()
+
+    def _current_name(self) -> Optional[str]:
+        pointer = os.path.join(self.directory, CURRENT_POINTER)
+        try:
+            stat = os.stat(pointer)
+        except FileNotFoundError:
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._pointer_signature:
+            return self.name
+        with open(pointer, 'r') as f:
+            name = f.read().strip()
+        self._pointer_signature = signature
+        return name or None
+
+    def load(self) -> Optional[pd.DataFrame]:
+        """
+        Return the current snapshot as a DataFrame, mapping a new file only when the pointer changed.
+
+        Returns:
+            pd.DataFrame or None: Snapshot data, or None if no snapshot is available
+        """
+        if not PYARROW_AVAILABLE:
+            return None
+        with self._lock:
+            try:
+                name = self._current_name()
+                if name is None:
+                    return None
+                if name != self.name or self._frame is None:
+                    source = pa.memory_map(os.path.join(self.directory, name), 'r')
+                    table = pa.ipc.open_file(source).read_all()
+                    self._frame = table.to_pandas(types_mapper=pd.ArrowDtype)
+                    self._table, self.name = table, name
+                    logger.info(f"Mapped snapshot {name} with {table.num_rows} rows")
+                return self._frame.copy(deep=False)
+            except Exception as e:
+                logger.error(f"Could not open snapshot in {self.directory}: {e}")
+                return self._frame.copy(deep=False) if self._frame is not None else None
+
+_READERS: Dict[str, SnapshotReader] = {}
+_readers_lock = threading.Lock()
+
+def read_latest_snapshot(directory: str) -> Optional[pd.DataFrame]:
+    """Return the current snapshot of a directory through a per-process reader"""
+    with _readers_lock:
+        reader = _READERS.get(directory)
+        if reader is None:
+            reader = _READERS[directory] = SnapshotReader(directory)
+    return reader.load()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publish flow run data as memory-mappable Arrow snapshots")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    publish = subparsers.add_parser('publish', help="Fetch flow data and publish it as the current snapshot")
+    publish.add_argument('--dir', default=os.getenv('ARROW_SNAPSHOT_DIR', 'snapshots'), help="Snapshot directory")
+    publish.add_argument('--csv', action='store_true', help="Read from CSV instead of the database")
+    publish.add_argument('--keep', type=int, default=3, help="Snapshots to retain")
+    publish.add_argument('--every', type=float, help="Republish every N seconds instead of once")
+    args = parser.parse_args(argv)
+
+    from secure_db_connection import get_flow_data
+    while True:
+        started = time.perf_counter()
+        # Read the source, not the snapshot this process publishes (ARROW_SNAPSHOT_DIR may name it)
+        df = get_flow_data(use_csv=args.csv, use_snapshot=False)
+        if df is not None and not df.empty:
+            path = publish_snapshot(df, args.dir, keep=args.keep)
+            print(f"Published {len(df):,} rows to {path} in {time.perf_counter() - started:.1f}s")
+        else:
+            logger.warning("No data fetched, keeping the current snapshot")
+        if not args.every:
+            return 0
+        time.sleep(max(0.0, args.every - (time.perf_counter() - started)))
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""
+Throughput and detection latency of the headless alert evaluator (alerts.py)
+
+Throughput: finished runs of thousands of flows are evaluated in poll-sized
+batches; the run reports runs per second and the state kept per flow.
+
+Latency: the evaluator polls the local SQL Server stand-in (see
+sql_standin.py) while failed runs are written to it, and every alert is
+delivered through the webhook sink to a local HTTP receiver. The run reports
+the time from a failed run being written to its alert being raised and to
+the webhook receiving it.
+
+Usage:
+    python benchmarks/alert_bench.py --flows 5000 --runs 1000000 --poll-seconds 1
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+def _percentile(sorted_values, percentile):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(percentile / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+class LocalWebhookReceiver:
+    """HTTP endpoint on localhost recording the arrival time of every alert posted to it"""
+
+    def __init__(self):
+        self.received = {}
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                arrived = time.perf_counter()
+                for alert in json.loads(body)['alerts']:
+                    receiver.received.setdefault(alert['flowguid'], arrived)
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/alerts"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+def measure_throughput(flows: int, runs: int, batch: int, seed: int) -> dict:
+    from alerts import AlertEvaluator, MemorySink
+
+    rng = np.random.default_rng(seed)
+    flow = rng.integers(0, flows, runs)
+    # Flows fail at different rates, a few of them most of the time
+    fail_prob = rng.beta(0.3, 6, flows)
+    completed = pd.Timestamp.now().floor('s') - pd.to_timedelta(np.sort(rng.integers(0, 6 * 3600, runs))[::-1], unit='s')
+    frame = pd.DataFrame({
+        'flowguid': np.char.add('run-', np.arange(runs).astype('U9')).astype(object),
+        'flowname': np.char.add('flow_', flow.astype('U6')).astype(object),
+        'flowowner': 'powerautomate',
+        'taskstatus': np.where(rng.random(runs) < fail_prob[flow], 'Failed', 'Succeeded').astype(object),
+        'datetimecompleted': completed,
+    })
+
+    sink = MemorySink()
+    evaluator = AlertEvaluator([sink])
+    started = time.perf_counter()
+    for offset in range(0, runs, batch):
+        evaluator.evaluate(frame.iloc[offset:offset + batch])
+    seconds = time.perf_counter() - started
+
+    state = next(iter(evaluator.flows.values()))
+    state_bytes = sys.getsizeof(state) + sum(sys.getsizeof(values) for values in (state.bucket_ids, state.failures, state.runs))
+    return {
+        'flows': len(evaluator.flows),
+        'runs': runs,
+        'batch': batch,
+        'seconds': round(seconds, 2),
+        'runs_per_second': int(runs / seconds),
+        'alerts': len(sink.alerts),
+        'state_bytes_per_flow': state_bytes,
+    }
+
+def measure_latency(flows: int, failures: int, poll_seconds: float, seed: int) -> dict:
+    from alerts import AlertEvaluator, MemorySink, RunStream, WebhookSink, run
+    from benchmarks.sql_standin import LocalSqlServer
+    from benchmarks.workload import make_raw_frame
+
+    history = make_raw_frame(flows * 20, seed=seed, days=1)
+    receiver = LocalWebhookReceiver()
+    memory, webhook = MemorySink(), WebhookSink(receiver.url)
+    written = {}
+    with LocalSqlServer(history) as server, server.patch():
+        evaluator = AlertEvaluator([memory, webhook])
+        stream = RunStream(lookback_seconds=60)
+        stop = threading.Event()
+        worker = threading.Thread(target=run, args=(evaluator, stream), kwargs={'poll_seconds': poll_seconds, 'stop': stop})
+        worker.start()
+
+        rng = np.random.default_rng(seed)
+        names = history['flowname'].unique()
+        for i in range(failures):
+            # One failed run of a different flow at a random point of a poll interval
+            time.sleep(rng.uniform(0.2, 1.0) * poll_seconds)
+            now = datetime.now().replace(microsecond=0)
+            run_row = history.iloc[[0]].assign(
+                flowguid=f"bench-{i}", flowname=names[i % len(names)],
+                startedon=now - timedelta(seconds=30), lastmodified=now, state='Completed',
+                datetimestarted=now - timedelta(seconds=30), datetimecompleted=now, taskstatus='Failed')
+            server.upsert(run_row)
+            written[f"bench-{i}"] = time.perf_counter()
+
+        deadline = time.perf_counter() + poll_seconds * 5 + 5
+        while len(receiver.received) < failures and time.perf_counter() < deadline:
+            time.sleep(0.05)
+        stop.set()
+        worker.join()
+        webhook.close()
+    receiver.close()
+
+    raised = {alert.flowguid: alert for alert in memory.alerts if alert.flowguid in written}
+    # Alerts carry wall-clock detection times; convert to the perf_counter clock of the writes
+    offset = time.perf_counter() - datetime.now().timestamp()
+    detect = sorted(alert.detected_at.timestamp() + offset - written[guid] for guid, alert in raised.items())
+    deliver = sorted(receiver.received[guid] - written[guid] for guid in written if guid in receiver.received)
+    return {
+        'history_rows': len(history),
+        'failures_written': failures,
+        'alerts_raised': len(raised),
+        'webhook_received': len(deliver),
+        'poll_seconds': poll_seconds,
+        'detect_p50_s': round(_percentile(detect, 50), 2) if detect else None,
+        'detect_max_s': round(detect[-1], 2) if detect else None,
+        'webhook_p50_s': round(_percentile(deliver, 50), 2) if deliver else None,
+        'webhook_max_s': round(deliver[-1], 2) if deliver else None,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the headless alert evaluator")
+    parser.add_argument('--flows', type=int, default=5000, help="Flows in the run stream")
+    parser.add_argument('--runs', type=int, default=1_000_000, help="Finished runs evaluated for the throughput test")
+    parser.add_argument('--batch', type=int, default=5000, help="Finished runs per evaluated poll")
+    parser.add_argument('--failures', type=int, default=10, help="Failed runs written during the latency test")
+    parser.add_argument('--poll-seconds', type=float, default=1.0, help="Evaluator poll interval in the latency test")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed")
+    parser.add_argument('--output', type=Path, help="Write the results to a JSON file")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    os.chdir(ROOT)
+
+    throughput = measure_throughput(args.flows, args.runs, args.batch, args.seed)
+    print(f"throughput: {throughput['runs']:,} runs of {throughput['flows']:,} flows in {throughput['seconds']}s "
+          f"({throughput['runs_per_second']:,} runs/s, {throughput['alerts']:,} alerts, "
+          f"{throughput['state_bytes_per_flow']} bytes of state per flow)")
+    latency = measure_latency(args.flows, args.failures, args.poll_seconds, args.seed)
+    print(f"latency: {latency['alerts_raised']}/{latency['failures_written']} failures alerted "
+          f"(poll every {latency['poll_seconds']}s over {latency['history_rows']:,} rows), "
+          f"raised p50 {latency['detect_p50_s']}s max {latency['detect_max_s']}s, "
+          f"webhook p50 {latency['webhook_p50_s']}s max {latency['webhook_max_s']}s")
+
+    if args.output:
+        args.output.write_text(json.dumps({'throughput': throughput, 'latency': latency}, indent=2))
+    return 0 if latency['webhook_received'] == latency['failures_written'] else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,198 @@
+"""
+Latency and throughput of the JSON/Arrow API (api.py) under concurrent pollers
+
+A uvicorn server is started in-process on a synthetic workload. The run reports:
+- the first (cold) matrix request of a day, a repeat of it without an ETag
+  (body from the response cache) and a conditional request answered with a 304
+- requests per second and latency percentiles of N clients polling the
+  matrix, metrics and runs routes with If-None-Match, as scrapers would
+- how many times the matrix body is computed when all clients ask for a
+  new version at once after the data changed
+- response sizes in JSON (gzip) and Arrow
+
+Usage:
+    python benchmarks/api_bench.py --rows 300000 --clients 1 8 32 --seconds 5
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# Routes a poller cycles through (matrix of all projects, metrics, runs of the day)
+POLLED_PATHS = ['/api/matrix', '/api/metrics', '/api/runs?limit=500']
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def _percentile(sorted_values, percentile):
+    index = min(len(sorted_values) - 1, max(0, int(round(percentile / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+class Client:
+    """Keep-alive HTTP client remembering the ETag of every path"""
+
+    def __init__(self, port: int):
+        self.connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        self.etags = {}
+
+    def get(self, path: str, conditional: bool = True, headers=None):
+        headers = {'Accept-Encoding': 'gzip', **(headers or {})}
+        if conditional and path in self.etags:
+            headers['If-None-Match'] = self.etags[path]
+        started = time.perf_counter()
+        self.connection.request('GET', path, headers=headers)
+        response = self.connection.getresponse()
+        body = response.read()
+        seconds = time.perf_counter() - started
+        if response.getheader('ETag'):
+            self.etags[path] = response.getheader('ETag')
+        return response.status, len(body), seconds
+
+    def close(self):
+        self.connection.close()
+
+def start_server(frame: pd.DataFrame, port: int):
+    import uvicorn
+    import api
+
+    store = api.SnapshotStore(load=lambda: frame, refresh_seconds=3600)
+    responses = api.ResponseCache()
+    app = api.create_app(store, responses)
+    server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=port, log_level='warning'))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while store.current is None or not server.started:
+        time.sleep(0.05)
+    return server, thread, store, responses
+
+def poll(port: int, clients: int, seconds: float) -> dict:
+    """Clients cycle through POLLED_PATHS with If-None-Match for ``seconds``"""
+    deadline = time.perf_counter() + seconds
+    # Prime every client's ETags before the timed loop
+    pool = [Client(port) for _ in range(clients)]
+    for client in pool:
+        for path in POLLED_PATHS:
+            client.get(path)
+
+    def run(client):
+        latencies, statuses = [], {}
+        i = 0
+        while time.perf_counter() < deadline:
+            status, _, latency = client.get(POLLED_PATHS[i % len(POLLED_PATHS)])
+            latencies.append(latency)
+            statuses[status] = statuses.get(status, 0) + 1
+            i += 1
+        return latencies, statuses
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(clients) as executor:
+        results = list(executor.map(run, pool))
+    elapsed = time.perf_counter() - started
+    for client in pool:
+        client.close()
+
+    latencies = sorted(latency for result in results for latency in result[0])
+    statuses = {}
+    for _, counts in results:
+        for status, count in counts.items():
+            statuses[status] = statuses.get(status, 0) + count
+    return {
+        'clients': clients,
+        'requests': len(latencies),
+        'requests_per_second': round(len(latencies) / elapsed),
+        'p50_ms': round(_percentile(latencies, 50) * 1000, 2),
+        'p99_ms': round(_percentile(latencies, 99) * 1000, 2),
+        'statuses': statuses,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the JSON/Arrow API with concurrent pollers")
+    parser.add_argument('--rows', type=int, default=300000, help="Runs in the synthetic workload")
+    parser.add_argument('--days', type=int, default=7, help="Days the runs are spread over")
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 8, 32], help="Concurrent pollers per step")
+    parser.add_argument('--seconds', type=float, default=5, help="Polling time per step")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed")
+    parser.add_argument('--output', type=Path, help="Write the results to a JSON file")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    os.chdir(ROOT)
+    from benchmarks.workload import make_raw_frame
+
+    frame = make_raw_frame(args.rows, seed=args.seed, days=args.days)
+    port = _free_port()
+    server, thread, store, responses = start_server(frame, port)
+    results = {'rows': args.rows}
+    try:
+        client = Client(port)
+        status, size, cold = client.get('/api/matrix')
+        _, _, cached = client.get('/api/matrix', conditional=False)
+        not_modified = client.get('/api/matrix')
+        _, arrow_size, _ = client.get('/api/matrix?format=arrow')
+        _, json_raw_size, _ = client.get('/api/matrix', conditional=False, headers={'Accept-Encoding': 'identity'})
+        client.close()
+        results['matrix'] = {
+            'cold_ms': round(cold * 1000, 1), 'cached_ms': round(cached * 1000, 2),
+            'not_modified_ms': round(not_modified[2] * 1000, 2), 'not_modified_status': not_modified[0],
+            'json_gzip_bytes': size, 'json_bytes': json_raw_size, 'arrow_bytes': arrow_size,
+        }
+        print(f"matrix over {args.rows:,} rows: cold {results['matrix']['cold_ms']} ms, "
+              f"cached {results['matrix']['cached_ms']} ms, 304 {results['matrix']['not_modified_ms']} ms; "
+              f"JSON {json_raw_size:,} B ({size:,} B gzip), Arrow {arrow_size:,} B")
+
+        results['polling'] = []
+        for clients in args.clients:
+            step = poll(port, clients, args.seconds)
+            results['polling'].append(step)
+            print(f"{clients:>3} clients: {step['requests_per_second']:,} req/s, p50 {step['p50_ms']} ms, "
+                  f"p99 {step['p99_ms']} ms, statuses {step['statuses']}")
+
+        # New runs on the latest day: every client asks for the new matrix at the same moment
+        latest = frame['datetimestarted'].max()
+        extra = frame[frame['datetimestarted'] == latest].head(1).assign(flowguid='bench-new-run', taskstatus='Failed')
+        frame = pd.concat([frame, extra], ignore_index=True)
+        store.load = lambda: frame
+        store.refresh()
+        clients = max(args.clients)
+        misses = responses.misses
+        barrier = threading.Barrier(clients)
+
+        def fetch(_):
+            client = Client(port)
+            barrier.wait()
+            result = client.get('/api/matrix')
+            client.close()
+            return result
+
+        with ThreadPoolExecutor(clients) as executor:
+            fetched = list(executor.map(fetch, range(clients)))
+        results['stampede'] = {'clients': clients, 'computations': responses.misses - misses,
+                               'max_ms': round(max(result[2] for result in fetched) * 1000, 1)}
+        print(f"{clients} simultaneous requests for a changed matrix: {results['stampede']['computations']} "
+              f"computation(s), slowest {results['stampede']['max_ms']} ms")
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,232 @@
+"""
+Concurrent-session load test for the dashboard
+
+Drives N simulated sessions through bot_monitor_dashboard.py at the same time
+with Streamlit's AppTest, all in one process like a real Streamlit server. Each
+session scripts filter changes, date changes and auto-refreshes against a
+synthetic CSV data set (via CSV_DATA_PATH), and every rerun is timed.
+
+For each session count the run reports rerun latency percentiles, throughput
+(reruns per second across all sessions) and memory (peak RSS increase, total
+and per session).
+
+Usage:
+    python benchmarks/load_sessions.py --sessions 1 2 4 8 --actions 10 --rows 100000
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import MagicMock
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+SCRIPT = ROOT / 'bot_monitor_dashboard.py'
+
+ACTIONS = ('rerun', 'project', 'status', 'owner', 'date', 'auto_refresh')
+
+# Relative frequency of each scripted action
+ACTION_WEIGHTS = (2, 3, 2, 2, 1, 1)
+
+def _keep_runtime_between_runs():
+    """
+    Let AppTest runs overlap.
+
+    AppTest installs a mock Runtime singleton at the start of every run and
+    clears it at the end, so a session finishing while another is still running
+    breaks the other one. Fall back to a shared mock whenever the singleton is
+    cleared.
+    """
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+
+    shared = MagicMock(spec=Runtime)
+    shared.media_file_mgr = MediaFileManager(MemoryMediaFileStorage('/mock/media'))
+    shared.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime.instance = classmethod(lambda cls: cls._instance or shared)
+
+def _percentile(sorted_values, percentile):
+    from perf_monitor import _percentile as nearest_rank
+    return nearest_rank(sorted_values, percentile)
+
+class _MemorySampler:
+    """Samples RSS on a background thread to find the peak during a load level"""
+
+    def __init__(self, interval=0.05):
+        from perf_monitor import current_rss
+        self._current_rss = current_rss
+        self.interval = interval
+        self.start_rss = current_rss() or 0
+        self.peak_rss = self.start_rss
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak_rss = max(self.peak_rss, self._current_rss() or 0)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.end_rss = self._current_rss() or 0
+        self.peak_rss = max(self.peak_rss, self.end_rss)
+        return False
+
+def _widget(elements, label):
+    for element in elements:
+        if element.label == label:
+            return element
+    return None
+
+def _apply(at, action, rng, dates):
+    """Change the session's widgets for one scripted action (the caller reruns)"""
+    if action == 'project' or action == 'status' or action == 'owner':
+        label = {'project': 'Select Project', 'status': 'Select Status', 'owner': 'Select Owner'}[action]
+        box = _widget(at.selectbox, label)
+        if box is not None and box.options:
+            box.set_value(rng.choice(box.options))
+    elif action == 'date':
+        latest = _widget(at.checkbox, 'Show Latest Data')
+        picker = _widget(at.date_input, 'Select Date')
+        if picker is None:
+            if latest is not None:
+                latest.uncheck()
+        else:
+            picker.set_value(rng.choice(dates))
+    elif action == 'auto_refresh':
+        toggle = _widget(at.checkbox, 'Enable Auto Refresh')
+        if toggle is not None and not toggle.value:
+            toggle.check()
+        # Make the refresh interval elapse so this rerun triggers the auto-refresh
+        at.session_state['last_refresh'] = datetime.now() - timedelta(hours=2)
+
+def run_session(session_id, actions, seed, dates, start_barrier, results, timeout):
+    """Run one simulated session: initial load, then ``actions`` scripted reruns"""
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed + session_id)
+    at = AppTest.from_file(str(SCRIPT), default_timeout=timeout)
+    start_barrier.wait()
+    for step in range(actions + 1):
+        action = 'load' if step == 0 else rng.choices(ACTIONS, ACTION_WEIGHTS)[0]
+        error = None
+        started = time.perf_counter()
+        try:
+            if step:
+                _apply(at, action, rng, dates)
+            at.run()
+            if at.exception:
+                error = at.exception[0].message
+        except Exception as e:
+            error = str(e)
+        results.append({
+            'session': session_id,
+            'action': action,
+            'latency_s': time.perf_counter() - started,
+            'error': error
+        })
+
+def run_level(sessions, actions, seed, dates, timeout):
+    """Run ``sessions`` concurrent sessions and summarise latency, throughput and memory"""
+    import gc
+    gc.collect()
+    results = []
+    barrier = threading.Barrier(sessions + 1)
+    threads = [
+        threading.Thread(target=run_session, args=(i, actions, seed, dates, barrier, results, timeout),
+                         name=f'session-{i}')
+        for i in range(sessions)
+    ]
+    for thread in threads:
+        thread.start()
+    with _MemorySampler() as memory:
+        barrier.wait()
+        started = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+
+    latencies = sorted(r['latency_s'] for r in results)
+    errors = [r for r in results if r['error']]
+    peak_delta = max(0, memory.peak_rss - memory.start_rss)
+    return {
+        'sessions': sessions,
+        'reruns': len(results),
+        'errors': len(errors),
+        'first_error': errors[0]['error'] if errors else None,
+        'wall_s': round(wall, 3),
+        'throughput_rps': round(len(results) / wall, 3) if wall else None,
+        'p50_s': round(_percentile(latencies, 50), 3),
+        'p95_s': round(_percentile(latencies, 95), 3),
+        'p99_s': round(_percentile(latencies, 99), 3),
+        'max_s': round(latencies[-1], 3) if latencies else None,
+        'peak_rss_mb': round(memory.peak_rss / 2**20, 1),
+        'peak_delta_mb': round(peak_delta / 2**20, 1),
+        'peak_delta_per_session_mb': round(peak_delta / 2**20 / sessions, 1)
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the dashboard with concurrent AppTest sessions")
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 2, 4, 8], help="Concurrent session counts to test")
+    parser.add_argument('--actions', type=int, default=10, help="Scripted reruns per session after the initial load")
+    parser.add_argument('--rows', type=int, default=100_000, help="Rows in the synthetic data set")
+    parser.add_argument('--days', type=int, default=7, help="Days covered by the synthetic data set")
+    parser.add_argument('--seed', type=int, default=42, help="Seed for the data and the scripted actions")
+    parser.add_argument('--timeout', type=float, default=300, help="Timeout of a single rerun in seconds")
+    parser.add_argument('--output', type=Path, help="Write the results to a JSON file")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    os.chdir(ROOT)
+    from benchmarks.workload import make_raw_frame
+    import secure_db_connection
+
+    with tempfile.TemporaryDirectory(prefix='load_sessions_') as tmp:
+        data_path = os.path.join(tmp, 'flow_data_load.csv')
+        raw = make_raw_frame(args.rows, seed=args.seed, days=args.days)
+        raw.to_csv(data_path, index=False)
+        dates = sorted(raw['datetimestarted'].dt.date.unique().tolist())
+        del raw
+
+        # Serve the synthetic CSV instead of the database in every session
+        os.environ['CSV_DATA_PATH'] = data_path
+        secure_db_connection.ODBC_AVAILABLE = False
+        _keep_runtime_between_runs()
+
+        print(f"{args.rows:,} rows over {args.days} days, {args.actions} scripted reruns per session")
+        header = f"{'sessions':>8} {'reruns':>6} {'errors':>6} {'rerun/s':>8} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} {'max s':>7} {'peak MiB':>9} {'MiB/session':>11}"
+        print(header)
+        levels = []
+        for sessions in args.sessions:
+            level = run_level(sessions, args.actions, args.seed, dates, args.timeout)
+            levels.append(level)
+            print(f"{level['sessions']:>8} {level['reruns']:>6} {level['errors']:>6} {level['throughput_rps']:>8} "
+                  f"{level['p50_s']:>7} {level['p95_s']:>7} {level['p99_s']:>7} {level['max_s']:>7} "
+                  f"{level['peak_rss_mb']:>9} {level['peak_delta_per_session_mb']:>11}")
+            if level['first_error']:
+                print(f"         first error: {level['first_error']}")
+
+    if args.output:
+        args.output.write_text(json.dumps({
+            'rows': args.rows, 'days': args.days, 'actions': args.actions, 'levels': levels
+        }, indent=2) + '\n')
+    return 1 if any(level['errors'] for level in levels) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
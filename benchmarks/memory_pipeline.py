@@ -0,0 +1,148 @@
+"""
+Peak memory benchmark for the validation and processing pipeline
+
+Runs each pipeline variant in a fresh subprocess and reports the peak resident
+set size reached while processing, comparing the copy-free fused pipeline with
+the previous flow that deep-copied the frame at every stage.
+
+Usage:
+    python benchmarks/memory_pipeline.py --rows 1000000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from benchmarks.workload import make_raw_frame
+
+VARIANTS = ('legacy', 'fused')
+
+def _reset_peak():
+    """Reset the kernel's peak RSS counter so only the pipeline is measured (Linux only)"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def _peak_rss_bytes():
+    """Return the peak resident set size of this process in bytes"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset
+
+def _run_legacy(df):
+    """Reproduce the previous copy-per-stage flow (validate, filter, process, mask, matrix)"""
+    import pandas as pd
+    from data_processing.processors import STATUS_PRIORITY
+
+    validated = df.copy()
+    validated['datetimestarted'] = pd.to_datetime(validated['datetimestarted'], errors='coerce')
+    validated = validated[validated['datetimestarted'].notna()]
+
+    day = validated.copy()
+    day['date'] = day['datetimestarted'].dt.date
+    day = day[day['date'] == day['date'].max()]
+
+    processed = day.copy()
+    processed['automation_project'] = 'Other Cloud Flow'
+    processed['taskstatus'] = processed['taskstatus'].map(lambda x: x if x in STATUS_PRIORITY else 'No Run')
+    processed['hour'] = processed['datetimestarted'].dt.hour
+    processed['owner'] = processed['flowowner'].str.replace(' serviceaccount', '').str.title()
+    processed['display_name'] = processed['owner'] + ' | ' + processed['automation_project'] + ' | ' + processed['flowname']
+    processed['success_rate'] = processed['wassuccessful'] * 100
+    processed['status_priority'] = processed['taskstatus'].map(STATUS_PRIORITY).fillna(0)
+
+    masked = processed[pd.Series(True, index=processed.index)].copy()
+    matrix_input = masked[pd.Series(True, index=masked.index)].copy()
+    return len(matrix_input)
+
+def _run_fused(df):
+    """Run the copy-free fused pipeline on the same stages"""
+    import pandas as pd
+    from data_processing.processors import prepare_dashboard_data
+
+    started = pd.to_datetime(df['datetimestarted'], errors='coerce')
+    day_start = started.max().normalize()
+    day = df[(started >= day_start) & (started < day_start + pd.Timedelta(days=1))]
+
+    processed, _ = prepare_dashboard_data(day)
+    masked = processed[pd.Series(True, index=processed.index)]
+    matrix_input = masked[pd.Series(True, index=masked.index)]
+    return len(matrix_input)
+
+def run_variant(variant, rows):
+    """Measure one variant in the current process and return its result dict"""
+    import logging
+    logging.disable(logging.INFO)
+    import data_processing  # noqa: F401  (enables copy-on-write)
+    import pandas as pd
+    if variant == 'legacy':
+        pd.set_option('mode.copy_on_write', False)
+
+    df = make_raw_frame(rows)
+    frame_bytes = int(df.memory_usage(deep=True).sum())
+    baseline = _peak_rss_bytes()
+    reset = _reset_peak()
+    if reset:
+        baseline = _peak_rss_bytes()
+
+    out_rows = _run_legacy(df) if variant == 'legacy' else _run_fused(df)
+    peak = _peak_rss_bytes()
+    return {
+        'variant': variant,
+        'rows': rows,
+        'output_rows': out_rows,
+        'frame_bytes': frame_bytes,
+        'peak_delta_bytes': peak - baseline,
+        'peak_reset': reset
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare peak RSS of the legacy and fused pipelines")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="Rows in the synthetic month of data")
+    parser.add_argument('--variant', choices=VARIANTS, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.variant:
+        print(json.dumps(run_variant(args.variant, args.rows)))
+        return 0
+
+    results = {}
+    for variant in VARIANTS:
+        output = subprocess.run(
+            [sys.executable, __file__, '--rows', str(args.rows), '--variant', variant],
+            check=True, capture_output=True, text=True, env=dict(os.environ)
+        ).stdout
+        results[variant] = json.loads(output.strip().splitlines()[-1])
+
+    legacy = results['legacy']['peak_delta_bytes']
+    fused = results['fused']['peak_delta_bytes']
+    print(f"Rows: {args.rows:,} (raw frame {results['fused']['frame_bytes'] / 2**20:.1f} MiB)")
+    for variant in VARIANTS:
+        print(f"  {variant:<7} peak RSS increase: {results[variant]['peak_delta_bytes'] / 2**20:8.1f} MiB")
+    if legacy > 0:
+        print(f"  reduction: {(1 - fused / legacy) * 100:.1f}%")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""
+Wall-time benchmarks for the data pipeline with regression thresholds
+
+Times each pipeline step at several input sizes and compares the median
+against the stored baselines. A step slower than its baseline by more than
+the allowed tolerance is reported as a regression and the run exits non-zero.
+
+The database step runs against a local SQLite stand-in (see sql_standin.py).
+The dashboard_queries steps time the matrix and analytics aggregates per query
+engine; SQL timings exclude the one-off load of the partition into the run store.
+
+Usage:
+    python benchmarks/pipeline_bench.py                      # compare with baselines.json
+    python benchmarks/pipeline_bench.py --sizes 10000        # subset of sizes
+    python benchmarks/pipeline_bench.py --update-baseline    # record new baselines
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'baselines.json'
+
+# Allowed slowdown relative to the baseline before a step counts as a regression
+DEFAULT_TOLERANCE = 0.5
+
+# Timings below this are dominated by noise; baselines are raised to it before comparing
+NOISE_FLOOR_SECONDS = 0.005
+
+def _time(func, repeat):
+    """Return (median seconds, last result) of calling func repeat times"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+def run_benchmarks(sizes, repeat):
+    """
+    Time every pipeline step at each size.
+
+    Returns:
+        dict: {"<step>@<rows>": {"median_s": float, "rows": int}}
+    """
+    logging.disable(logging.INFO)
+    import secure_db_connection
+    from bot_monitor_dashboard import build_matrix_frame
+    from data_processing import process_data_for_dashboard, create_hourly_matrix, validate_matrix_data
+    from data_processing.processors import process_partition, PARTITION_CACHE, MATRIX_CACHE
+    from data_processing.query_engine import compute_dashboard_aggregates
+    from benchmarks.sql_standin import LocalSqlServer
+    from benchmarks.workload import make_raw_frame
+    logging.disable(logging.WARNING)
+
+    results = {}
+
+    def dashboard_queries(partition, partition_date, engine):
+        # Time a filter change rather than a rerun served from the matrix cache
+        MATRIX_CACHE.clear()
+        return compute_dashboard_aggregates(partition, partition, partition_date, engine=engine)
+
+    def record(name, rows, func, times=repeat):
+        seconds, result = _time(func, times)
+        results[f"{name}@{rows}"] = {'median_s': round(seconds, 6), 'rows': rows}
+        print(f"  {name:<28} {rows:>10,} rows  {seconds * 1000:10.1f} ms")
+        return result
+
+    record('generate_sample_data', 0, secure_db_connection.generate_sample_data)
+
+    with tempfile.TemporaryDirectory(prefix='pipeline_bench_') as tmp:
+        for rows in sizes:
+            # Large sizes are slow enough that a single run is stable
+            times = repeat if rows < 1_000_000 else max(1, repeat // 3)
+            raw = make_raw_frame(rows)
+
+            csv_path = os.path.join(tmp, f'flow_data_{rows}.csv')
+            raw.to_csv(csv_path, index=False)
+            record('get_data_from_csv', rows, lambda: secure_db_connection.get_data_from_csv(csv_path), times)
+
+            with LocalSqlServer(raw, path=os.path.join(tmp, f'flow_run_history_{rows}.sqlite')) as server, server.patch():
+                snapshot = secure_db_connection.FLOW_RUN_SNAPSHOT
+                record('get_flow_data[sql_standin]', rows, lambda: secure_db_connection.get_flow_data(full_refresh=True), times)
+                # Reruns between full refreshes re-read only the open and newly started runs
+                saved_interval, snapshot.open_refresh_seconds = snapshot.open_refresh_seconds, 0
+                record('open_runs[sql_standin]', rows, secure_db_connection.get_flow_data, times)
+                snapshot.open_refresh_seconds = saved_interval
+
+            processed = record('process_data_for_dashboard', rows, lambda: process_data_for_dashboard(raw), times)
+            matrix = record('create_hourly_matrix', rows, lambda: create_hourly_matrix(processed), times)
+            record('validate_matrix_data', rows, lambda: validate_matrix_data(*matrix), times)
+            record('build_matrix_frame', rows, lambda: build_matrix_frame(*matrix), times)
+
+            # Matrix plus analytics aggregates over a cached partition, as in the dashboard
+            # (the SQL run store loads the partition on the first call)
+            partition_date = processed['datetimestarted'].min().date()
+            partition = process_partition(raw, partition_date)
+            for engine in ('pandas', 'sqlite'):
+                record(f'dashboard_queries[{engine}]', rows, lambda: dashboard_queries(partition, partition_date, engine), times)
+            PARTITION_CACHE.clear()
+
+            del raw, processed, matrix, partition
+    return results
+
+def compare(results, baseline):
+    """
+    Compare results with the baseline file contents.
+
+    Returns:
+        list: (key, baseline seconds, current seconds, allowed seconds) for each regression
+    """
+    tolerance = baseline.get('tolerance', DEFAULT_TOLERANCE)
+    overrides = baseline.get('tolerances', {})
+    regressions = []
+    for key, current in results.items():
+        expected = baseline.get('results', {}).get(key)
+        if expected is None:
+            continue
+        allowed = max(expected['median_s'], NOISE_FLOOR_SECONDS) * (1 + overrides.get(key.split('@')[0], tolerance))
+        if current['median_s'] > allowed:
+            regressions.append((key, expected['median_s'], current['median_s'], allowed))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the data pipeline against stored baselines")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help="Row counts to benchmark")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per step (median is reported)")
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument('--update-baseline', action='store_true', help="Write the results as the new baseline")
+    parser.add_argument('--output', type=Path, help="Also write the results of this run to a JSON file")
+    args = parser.parse_args(argv)
+
+    print(f"Benchmarking sizes {', '.join(f'{s:,}' for s in args.sizes)} (median of {args.repeat})")
+    results = run_benchmarks(args.sizes, args.repeat)
+
+    run_info = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'processor': platform.processor() or platform.machine()
+    }
+    if args.output:
+        args.output.write_text(json.dumps({'run': run_info, 'results': results}, indent=2) + '\n')
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    if args.update_baseline:
+        baseline.setdefault('tolerance', DEFAULT_TOLERANCE)
+        baseline['run'] = run_info
+        baseline.setdefault('results', {}).update(results)
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + '\n')
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if not baseline:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+
+    regressions = compare(results, baseline)
+    if regressions:
+        print(f"\nPERFORMANCE REGRESSION in {len(regressions)} step(s):")
+        for key, expected, current, allowed in regressions:
+            print(f"  {key}: {current * 1000:.1f} ms (baseline {expected * 1000:.1f} ms, allowed {allowed * 1000:.1f} ms)")
+        return 1
+    print("\nAll steps within baseline thresholds")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
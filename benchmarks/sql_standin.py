@@ -0,0 +1,163 @@
+"""
+Local SQL Server stand-in for benchmarks and load tests
+
+Serves a synthetic frame from a SQLite file through the same DB-API calls
+get_flow_data makes against SQL Server (cursor, execute, description,
+fetchall, close), so the database code path can be measured without a server.
+"""
+
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+# Query alias -> rpa_FlowRunHistory source column
+SOURCE_COLUMNS = {
+    'flowguid': 'FlowGUID',
+    'flowname': 'FlowName',
+    'startedon': 'CreatedTime',
+    'lastmodified': 'LastModified',
+    'state': 'State',
+    'flowowner': 'FlowOwner',
+    'datetimestarted': 'StartTime',
+    'datetimecompleted': 'EndTime',
+    'taskstatus': 'TaskStatus',
+    'triggertype': 'TriggerType'
+}
+
+TIMESTAMP_COLUMNS = ('CreatedTime', 'LastModified', 'StartTime', 'EndTime')
+
+# T-SQL fragments used by the dashboard queries and their SQLite equivalents
+TSQL_REWRITES = (
+    ('BusinessAnalytics.dbo.', ''),
+    ('DATEADD(month, -1, GETDATE())', "datetime('now', 'localtime', '-1 month')"),
+)
+
+def _to_sqlite(query: str) -> str:
+    for tsql, sqlite in TSQL_REWRITES:
+        query = query.replace(tsql, sqlite)
+    return query
+
+class _Cursor:
+    def __init__(self, cursor: sqlite3.Cursor):
+        self._cursor = cursor
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, query, params=None):
+        self._cursor.execute(_to_sqlite(query), params or ())
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+class _Connection:
+    def __init__(self, path: str):
+        # Pooled connections are used from the fetch worker threads
+        self._connection = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+
+    def cursor(self):
+        return _Cursor(self._connection.cursor())
+
+    def close(self):
+        self._connection.close()
+
+class LocalSqlServer:
+    """
+    SQLite-backed rpa_FlowRunHistory table.
+
+    Usage:
+        with LocalSqlServer(make_raw_frame(100_000)) as server, server.patch():
+            df = secure_db_connection.get_flow_data()
+    """
+
+    def __init__(self, frame: pd.DataFrame, path: str = None, connect_delay_seconds: float = 0.0):
+        self._owns_file = path is None
+        # Login and network round trips of a real server, paid by every new connection
+        self.connect_delay_seconds = connect_delay_seconds
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix='flow_run_history_', suffix='.sqlite')
+            os.close(fd)
+        self.path = path
+        self._load(frame)
+
+    @staticmethod
+    def _source_table(frame: pd.DataFrame) -> pd.DataFrame:
+        table = frame[list(SOURCE_COLUMNS)].rename(columns=SOURCE_COLUMNS)
+        for column in TIMESTAMP_COLUMNS:
+            # Text in the layout sqlite3's TIMESTAMP converter parses back into datetime
+            table[column] = pd.to_datetime(table[column]).dt.strftime('%Y-%m-%d %H:%M:%S')
+        return table
+
+    def _load(self, frame: pd.DataFrame) -> None:
+        table = self._source_table(frame)
+        columns = ', '.join(f"{c} {'TIMESTAMP' if c in TIMESTAMP_COLUMNS else 'TEXT'}" for c in table.columns)
+        connection = sqlite3.connect(self.path)
+        try:
+            connection.execute('DROP TABLE IF EXISTS rpa_FlowRunHistory')
+            connection.execute(f'CREATE TABLE rpa_FlowRunHistory ({columns})')
+            placeholders = ', '.join('?' * len(table.columns))
+            connection.executemany(f'INSERT INTO rpa_FlowRunHistory VALUES ({placeholders})',
+                                   table.itertuples(index=False, name=None))
+            connection.execute('CREATE INDEX ix_start ON rpa_FlowRunHistory (StartTime)')
+            connection.commit()
+        finally:
+            connection.close()
+
+    def upsert(self, frame: pd.DataFrame) -> None:
+        """Insert runs, replacing the rows of runs (by flowguid) that are already in the table"""
+        table = self._source_table(frame)
+        connection = sqlite3.connect(self.path)
+        try:
+            connection.executemany('DELETE FROM rpa_FlowRunHistory WHERE FlowGUID = ?',
+                                   ((guid,) for guid in table['FlowGUID']))
+            placeholders = ', '.join('?' * len(table.columns))
+            connection.executemany(f'INSERT INTO rpa_FlowRunHistory VALUES ({placeholders})',
+                                   table.itertuples(index=False, name=None))
+            connection.commit()
+        finally:
+            connection.close()
+
+    def connect(self) -> _Connection:
+        if self.connect_delay_seconds:
+            time.sleep(self.connect_delay_seconds)
+        return _Connection(self.path)
+
+    @contextmanager
+    def patch(self, module=None):
+        """Route secure_db_connection's database calls to this stand-in"""
+        if module is None:
+            import secure_db_connection as module
+        saved = module.ODBC_AVAILABLE, module.create_db_connection
+        module.ODBC_AVAILABLE = True
+        module.create_db_connection = self.connect
+        module.CONNECTION_POOL.close_all()
+        module.FLOW_RUN_SNAPSHOT.clear()
+        try:
+            yield self
+        finally:
+            module.CONNECTION_POOL.close_all()
+            module.FLOW_RUN_SNAPSHOT.clear()
+            module.ODBC_AVAILABLE, module.create_db_connection = saved
+
+    def close(self) -> None:
+        if self._owns_file:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
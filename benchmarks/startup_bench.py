@@ -0,0 +1,148 @@
+"""
+Cold start of the dashboard: import time and time to first paint
+
+Every measurement runs in a fresh interpreter (multiprocessing spawn), so
+nothing is already imported or cached:
+- import: wall time of importing the dashboard and the modules it pulls in,
+  next to pandas and streamlit on their own (the floor), and which optional
+  heavy modules (the ODBC driver, duckdb) were loaded by the import
+- first paint: the first rerun of a new session with Streamlit's AppTest
+  against the local SQL Server stand-in (see sql_standin.py), each connection
+  delayed by --connect-delay seconds like a remote server. The page shell is
+  up when that rerun ends; the run also reports when the matrix first shows
+  (data ready), and both with HISTORY_LOAD_POLL_SECONDS=0, which loads the
+  history inside the first rerun as before
+
+The run exits with 1 if the dashboard import or the first paint is over its
+budget.
+
+Usage:
+    python benchmarks/startup_bench.py --rows 100000 --connect-delay 1 --repeat 5
+    python benchmarks/startup_bench.py --import-budget-ms 1500 --first-paint-budget-ms 1000
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+import warnings
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+SCRIPT = ROOT / 'bot_monitor_dashboard.py'
+
+# Imported on their own for comparison, in this order; the dashboard comes last
+IMPORTED_MODULES = ('pandas', 'streamlit', 'secure_db_connection', 'data_processing', 'bot_monitor_dashboard')
+
+# Optional dependencies that should only be loaded when they are used
+DEFERRED_MODULES = ('pypyodbc', 'duckdb')
+
+def _time_import(module: str) -> dict:
+    """Import ``module`` in this (fresh) process"""
+    logging.disable(logging.WARNING)
+    os.chdir(ROOT)
+    started = time.perf_counter()
+    __import__(module)
+    seconds = time.perf_counter() - started
+    return {'seconds': seconds, 'loaded': [name for name in DEFERRED_MODULES if name in sys.modules]}
+
+def _time_first_paint(rows: int, days: int, seed: int, connect_delay: float, poll_seconds: str,
+                      timeout: float) -> dict:
+    """First rerun and time until the matrix shows of a new session, in this (fresh) process"""
+    logging.disable(logging.WARNING)
+    warnings.simplefilter('ignore', FutureWarning)
+    os.chdir(ROOT)
+    os.environ['HISTORY_LOAD_POLL_SECONDS'] = poll_seconds
+    # The harness and the Streamlit runtime are loaded before the clock starts, as in a running server
+    from streamlit.testing.v1 import AppTest
+    from benchmarks.sql_standin import LocalSqlServer
+    from benchmarks.workload import make_raw_frame
+
+    frame = make_raw_frame(rows, seed=seed, days=days)
+    with LocalSqlServer(frame, connect_delay_seconds=connect_delay) as server, server.patch():
+        at = AppTest.from_file(str(SCRIPT), default_timeout=timeout)
+        started = time.perf_counter()
+        at.run()
+        first_paint = time.perf_counter() - started
+        shell = bool(at.title) and not at.exception
+        reruns = 1
+        # Poll like the page's loading fragment (AppTest reruns the whole script, which costs more)
+        while not len(at.dataframe) and not at.exception and time.perf_counter() - started < timeout:
+            time.sleep(float(poll_seconds))
+            at.run()
+            reruns += 1
+        data_ready = time.perf_counter() - started
+        rerun_started = time.perf_counter()
+        at.run()
+        warm_rerun = time.perf_counter() - rerun_started
+    return {'first_paint': first_paint, 'data_ready': data_ready, 'warm_rerun': warm_rerun,
+            'shell': shell, 'reruns': reruns, 'errors': [str(e.value) for e in at.exception]}
+
+def _in_fresh_process(function, *args):
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        return pool.apply(function, args)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark dashboard import time and time to first paint")
+    parser.add_argument('--rows', type=int, default=100000, help="Runs in the synthetic history")
+    parser.add_argument('--days', type=int, default=7, help="Days the runs are spread over")
+    parser.add_argument('--connect-delay', type=float, default=1.0, help="Seconds each database connection takes")
+    parser.add_argument('--repeat', type=int, default=5, help="Fresh processes per import measurement")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed")
+    parser.add_argument('--timeout', type=float, default=300, help="Most seconds to wait for the data")
+    parser.add_argument('--import-budget-ms', type=float, default=1500, help="Budget for importing the dashboard")
+    parser.add_argument('--first-paint-budget-ms', type=float, default=1000, help="Budget for the first paint")
+    parser.add_argument('--output', type=Path, help="Write the results to a JSON file")
+    args = parser.parse_args(argv)
+
+    results = {'imports': {}, 'first_paint': {}}
+    for module in IMPORTED_MODULES:
+        samples = [_in_fresh_process(_time_import, module) for _ in range(args.repeat)]
+        results['imports'][module] = {
+            'median_ms': round(statistics.median(s['seconds'] for s in samples) * 1000, 1),
+            'min_ms': round(min(s['seconds'] for s in samples) * 1000, 1),
+            'deferred_loaded': samples[0]['loaded'],
+        }
+        step = results['imports'][module]
+        print(f"import {module:<22} median {step['median_ms']:>7} ms, min {step['min_ms']:>7} ms"
+              + (f", loaded {', '.join(step['deferred_loaded'])}" if step['deferred_loaded'] else ""))
+
+    for mode, poll_seconds in (('background', '1'), ('blocking', '0')):
+        step = _in_fresh_process(_time_first_paint, args.rows, args.days, args.seed, args.connect_delay,
+                                 poll_seconds, args.timeout)
+        results['first_paint'][mode] = {
+            'first_paint_ms': round(step['first_paint'] * 1000, 1),
+            'data_ready_ms': round(step['data_ready'] * 1000, 1),
+            'warm_rerun_ms': round(step['warm_rerun'] * 1000, 1),
+            'shell_rendered': step['shell'], 'reruns': step['reruns'], 'errors': step['errors'],
+        }
+        step = results['first_paint'][mode]
+        print(f"{mode:<10} history load: first paint {step['first_paint_ms']} ms, data ready {step['data_ready_ms']} ms "
+              f"({step['reruns']} reruns), warm rerun {step['warm_rerun_ms']} ms"
+              + (f", errors {step['errors']}" if step['errors'] else ""))
+
+    import_ms = results['imports']['bot_monitor_dashboard']['median_ms']
+    paint_ms = results['first_paint']['background']['first_paint_ms']
+    results['budgets'] = {
+        'import_ms': args.import_budget_ms, 'first_paint_ms': args.first_paint_budget_ms,
+        'import_ok': import_ms <= args.import_budget_ms,
+        'first_paint_ok': paint_ms <= args.first_paint_budget_ms and results['first_paint']['background']['shell_rendered'],
+    }
+    for name, measured, budget, ok in (('import', import_ms, args.import_budget_ms, results['budgets']['import_ok']),
+                                       ('first paint', paint_ms, args.first_paint_budget_ms,
+                                        results['budgets']['first_paint_ok'])):
+        print(f"{name} budget {budget:.0f} ms: {measured} ms {'ok' if ok else 'OVER BUDGET'}")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    return 0 if results['budgets']['import_ok'] and results['budgets']['first_paint_ok'] else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,21 @@
+"""
+Synthetic raw data for the benchmarks, shaped like the rpa_FlowRunHistory query result
+"""
+
+import pandas as pd
+
+from synthetic_data import generate_workload
+
+def make_raw_frame(rows: int, seed: int = 42, days: int = 30) -> pd.DataFrame:
+    """
+    Build a seeded workload of exactly ``rows`` runs over the last ``days`` days.
+
+    Args:
+        rows: Number of runs
+        seed: Random seed, so runs with the same arguments produce identical frames
+        days: Days of history ending now
+
+    Returns:
+        pd.DataFrame: Raw flow runs with the columns returned by get_flow_data
+    """
+    return generate_workload(rows=rows, days=days, seed=seed)
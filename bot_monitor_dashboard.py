@@ -17,11 +17,17 @@ import time
 import logging
 import gc
 import traceback
-from pathlib import Path
-import json
 from typing import Dict, List, Optional, Union, Any
-from data_processing.processors import process_data_for_dashboard, create_hourly_matrix
-from secure_db_connection import get_flow_data, test_connection
+from data_processing.processors import (
+    process_partition, get_rejection_report, refresh_flow_mapping, get_cell_index, cell_positions, get_status_grid,
+    mark_missed_runs, find_silent_flows, FLOW_MAPPING
+)
+from data_processing.matrix_diff import diff_status_grids, CHANGE_KINDS
+from data_processing.query_engine import compute_dashboard_aggregates, query_engine_from_env, DUCKDB_AVAILABLE
+from secure_db_connection import get_flow_data, get_run_details, test_connection, FLOW_RUN_SNAPSHOT
+from perf_monitor import PERF, SLOW_RERUN_PROFILER, new_session_buffer
+from matrix_component import render_matrix, split_display_name
+import metrics
 
 # Configure logging
 logging.basicConfig(
@@ -45,6 +51,40 @@ except Exception as e:
     logger.warning(f"Page config warning: {e}")
     pass
 
+# Prometheus metrics: stage timings feed the histograms, endpoint starts once per process
+PERF.add_listener(metrics.observe_stage)
+metrics.start_exporters_from_env()
+
+# Columns of the run detail table, in display order (those missing from the data are skipped)
+RUN_DETAIL_COLUMNS = [
+    'datetimestarted', 'datetimecompleted', 'taskstatus', 'triggertype',
+    'state', 'startedon', 'lastmodified', 'flowname', 'flowguid'
+]
+
+# Matrix renderer: 'component' sends only changed cells on reruns, 'dataframe' resends the whole table
+MATRIX_RENDERER = os.getenv('MATRIX_RENDERER', 'component')
+
+# Seconds between checks for the first database load, which runs in the background while the
+# page shell is shown (0 loads it in the rerun instead)
+HISTORY_LOAD_POLL_SECONDS = float(os.getenv('HISTORY_LOAD_POLL_SECONDS', '1'))
+
+# Day-over-day diff: label and cell color per change kind, and the most bots listed
+DIFF_LABELS = {
+    'new_failure': "New failure",
+    'missing': "Missing run",
+    'recovered': "Recovered",
+    'new_run': "New run",
+    'changed': "Other change"
+}
+DIFF_COLORS = {
+    'new_failure': "#f8d7da",
+    'missing': "#fff3cd",
+    'recovered': "#d4edda",
+    'new_run': "#d1ecf1",
+    'changed': "#e2e3e5"
+}
+DIFF_MAX_ROWS = 300
+
 # Status emojis for better visibility
 STATUS_EMOJIS = {
     "Succeeded": "🟢",  # Green circle for success
@@ -56,7 +96,8 @@ STATUS_EMOJIS = {
     "Suspended": "🔵",  # Blue circle for suspended
     "Skipped": "⚪",    # White circle for skipped (like No Run)
     "Error": "🔴",      # Same as Failed
-    "TimedOut": "🔴"    # Same as Failed
+    "TimedOut": "🔴",   # Same as Failed
+    "Missed": "🟠"      # Orange circle for a scheduled run that didn't happen
 }
 
 # Function to get emoji for status with case-insensitive matching
@@ -78,6 +119,67 @@ def get_status_emoji(status):
     # Default fallback
     return STATUS_EMOJIS.get("No Run", "⚪")
 
+def _session_perf_buffer():
+    """Return this session's ring buffer of stage timings, creating it on first use"""
+    try:
+        if 'perf_records' not in st.session_state:
+            st.session_state.perf_records = new_session_buffer()
+        return st.session_state.perf_records
+    except Exception:
+        return None
+
+def perf_stage(name, rows_in=None):
+    """Time a dashboard stage into the process-wide and per-session ring buffers"""
+    return PERF.stage(name, rows_in=rows_in, session_buffer=_session_perf_buffer())
+
+def _track_session():
+    """Mark the current session as active for the active sessions gauge"""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        if ctx is not None:
+            metrics.SESSIONS.touch(ctx.session_id)
+    except Exception:
+        pass
+
+def _rerun_profile_context(rerun_started_at):
+    """Filter state and stage row counts of the current rerun, stored next to slow rerun profiles"""
+    records = _session_perf_buffer() or []
+    return {
+        'filters': dict(st.session_state.get('filter_state', {})),
+        'stages': [r.to_dict() for r in records if r.started_at >= rerun_started_at]
+    }
+
+def render_performance_panel(container, rerun_started_at):
+    """
+    Show stage timings for the current rerun and process-wide percentiles
+    
+    Parameters:
+    - container: Sidebar container reserved for the panel
+    - rerun_started_at: datetime the current rerun started, used to select its records
+    """
+    try:
+        records = _session_perf_buffer() or []
+        current = [r.to_dict() for r in records if r.started_at >= rerun_started_at]
+        with container:
+            st.markdown("#### This Rerun")
+            if current:
+                current_df = pd.DataFrame(current)[['stage', 'duration_ms', 'rows_in', 'rows_out', 'mem_delta_mb']]
+                st.dataframe(current_df, hide_index=True, use_container_width=True)
+                st.caption(f"Total instrumented time: {current_df['duration_ms'].sum():.0f} ms")
+            else:
+                st.caption("No stages recorded yet")
+            st.markdown("#### All Sessions (this process)")
+            summary = PERF.summary()
+            if summary:
+                st.dataframe(
+                    pd.DataFrame(summary)[['stage', 'count', 'p50_ms', 'p95_ms', 'max_ms']],
+                    hide_index=True,
+                    use_container_width=True
+                )
+    except Exception as e:
+        logger.warning(f"Could not render performance panel: {e}")
+
 def safe_dashboard_reload() -> None:
     """
     Safely reload the dashboard data with proper error handling
@@ -179,6 +281,47 @@ def safe_dashboard_reload() -> None:
         except:
             pass
         
+def build_matrix_frame(bot_hour_status, display_names, hours):
+    """
+    Build the table shown by display_matrix
+    
+    Parameters:
+    - bot_hour_status: Dictionary mapping display_name to a dictionary mapping hour to status
+    - display_names: List of display names (flow identifiers) to show in the matrix
+    - hours: List of hours (0-23) to display as columns in the matrix
+    
+    Returns:
+        pandas.DataFrame: One row per display name (sorted, used as the index) with Owner,
+        Automation Project, Cloud Flow and an emoji status column per hour
+    """
+    # Create header row with hour labels
+    header_row = ["Owner", "Automation Project", "Cloud Flow"] + [f"{hour:02d}:00" for hour in hours]
+    
+    # Create the data rows with emojis - using list comprehension for better performance
+    data_rows = []
+    row_names = []
+    for display_name in sorted(display_names):
+        try:
+            # Split the display name into its components
+            owner, project, flow = split_display_name(display_name)
+            
+            # Create row with base columns
+            row = [owner, project, flow]
+            
+            # Add emoji status for each hour
+            for hour in hours:
+                status = bot_hour_status[display_name].get(hour, "No Run")
+                emoji = get_status_emoji(status)
+                row.append(emoji)
+            
+            data_rows.append(row)
+            row_names.append(display_name)
+        except Exception as row_error:
+            logger.error(f"Error processing row {display_name}: {row_error}")
+            continue
+    
+    return pd.DataFrame(data_rows, columns=header_row, index=row_names)
+
 def display_matrix(bot_hour_status, display_names, hours, enable_grouping=True):
     """
     Display the matrix as a styled table in Streamlit
@@ -191,50 +334,29 @@ def display_matrix(bot_hour_status, display_names, hours, enable_grouping=True):
     - enable_grouping: Whether to enable project grouping for visual organization (default: True)
     
     Returns:
-        None - Displays the matrix directly in the Streamlit interface
+        tuple or None - (display_name, hour) selected in the matrix for the run drill-down,
+        hour None when a whole row is selected
     """
     try:
         # Handle empty data
         if not display_names:
             st.warning("No data available to display in matrix. Try adjusting filters.")
-            return
+            return None
 
-        # Create header row with hour labels
-        header_row = ["Owner", "Automation Project", "Cloud Flow"] + [f"{hour:02d}:00" for hour in hours]
-        
-        # Create the data rows with emojis - using list comprehension for better performance
-        data_rows = []
-        for display_name in sorted(display_names):
-            try:
-                # Split the display name into its components
-                name_parts = display_name.split(" | ", 2)
-                # Handle case where display name doesn't have expected format
-                if len(name_parts) >= 3:
-                    owner, project, flow = name_parts
-                elif len(name_parts) == 2:
-                    owner, project = name_parts
-                    flow = "Unknown"
-                else:
-                    owner = name_parts[0]
-                    project = "Unknown"
-                    flow = "Unknown"
-                
-                # Create row with base columns
-                row = [owner, project, flow]
-                
-                # Add emoji status for each hour
-                for hour in hours:
-                    status = bot_hour_status[display_name].get(hour, "No Run")
-                    emoji = get_status_emoji(status)
-                    row.append(emoji)
-                
-                data_rows.append(row)
-            except Exception as row_error:
-                logger.error(f"Error processing row {display_name}: {row_error}")
-                continue
+        # Calculate appropriate height for the matrix
+        row_height = 35  # Base height per row
+        min_height = 200
+        header_footer_space = 100
+        calculated_height = max(min_height, (len(display_names) * row_height) + header_footer_space)
+        max_height = 800
+        display_height = min(calculated_height, max_height)
         
-        # Create a DataFrame for easy display
-        matrix_df = pd.DataFrame(data_rows, columns=header_row)
+        if MATRIX_RENDERER == 'component':
+            # Kept in the browser between reruns; only changed cells are sent
+            return render_matrix(bot_hour_status, display_names, hours, get_status_emoji, height=display_height)
+
+        # Build the matrix table (owner, project, flow and one emoji column per hour)
+        matrix_df = build_matrix_frame(bot_hour_status, display_names, hours)
         
         # Add hour column configs dynamically with tooltips
         hour_column_config = {
@@ -265,14 +387,6 @@ def display_matrix(bot_hour_status, display_names, hours, enable_grouping=True):
             **hour_column_config
         }
         
-        # Calculate appropriate height for the dataframe
-        row_height = 35  # Base height per row
-        min_height = 200
-        header_footer_space = 100
-        calculated_height = max(min_height, (len(data_rows) * row_height) + header_footer_space)
-        max_height = 800
-        display_height = min(calculated_height, max_height)
-        
         # Add CSS styling for better emoji alignment
         st.markdown("""
         <style>
@@ -295,37 +409,409 @@ def display_matrix(bot_hour_status, display_names, hours, enable_grouping=True):
         </style>
         """, unsafe_allow_html=True)
         
-        # Display the dataframe with settings
-        st.dataframe(
+        # Display the dataframe with settings; selecting a row opens its runs below
+        event = st.dataframe(
             matrix_df,
             column_config=column_config,
             height=display_height,
             use_container_width=True,
-            hide_index=True
+            hide_index=True,
+            on_select="rerun",
+            selection_mode="single-row",
+            key="matrix_selection"
         )
         
         # Removed status legend from here (moved to before the matrix display)
+        
+        selected_rows = event["selection"]["rows"] if event is not None else []
+        return (matrix_df.index[selected_rows[0]], None) if selected_rows and selected_rows[0] < len(matrix_df) else None
             
     except Exception as e:
         logger.error(f"Error displaying matrix: {e}", exc_info=True)
         st.error("Error displaying the matrix. Please check logs for details.")
+        return None
+
+def display_silent_flows(silent_flows, partition_date):
+    """
+    List the Recurrence flows that were expected to run but have no run at all on the selected day
+    
+    Parameters:
+    - silent_flows: 'owner | flowname' -> expected hours, from find_silent_flows
+    - partition_date: Selected day
+    """
+    if not silent_flows:
+        return
+    with st.expander(f"{STATUS_EMOJIS['Missed']} {len(silent_flows)} scheduled flow(s) without any run on {partition_date}"):
+        rows = []
+        for key in sorted(silent_flows):
+            owner, _, flow = key.partition(" | ")
+            rows.append([owner, flow, ", ".join(f"{hour:02d}:00" for hour in silent_flows[key])])
+        st.dataframe(pd.DataFrame(rows, columns=["Owner", "Cloud Flow", "Expected Hours"]),
+                     hide_index=True, use_container_width=True)
+
+def display_run_details(filtered_metrics_df, bot_hour_status, selected_cell, hours, cell_index):
+    """
+    Display the individual runs behind a matrix row, or one of its hour cells
+    
+    The runs are read from the matrix cell index by position, so opening a
+    cell costs O(runs in the cell) rather than a scan of the day. Full
+    details are loaded only for those runs when the data was fetched with the
+    summary projection; they are kept in session state, so reruns with the
+    same selection don't re-query.
+    
+    Parameters:
+    - filtered_metrics_df: Processed rows the matrix was built from
+    - bot_hour_status: Matrix statuses, {display_name: {hour: status}}
+    - selected_cell: (display_name, hour) selected in the matrix, hour None for a whole row
+                     (None when nothing is selected)
+    - hours: Hours shown in the matrix
+    - cell_index: (display_name, hour) -> row positions in filtered_metrics_df
+    
+    Returns:
+        None - Displays the run table directly in the Streamlit interface
+    """
+    try:
+        st.markdown("### Run Details")
+        selected_bot, selected_hour = selected_cell or (None, None)
+        if selected_bot is None or selected_bot not in bot_hour_status:
+            st.caption("Select a cell or row in the matrix to list its runs.")
+            return
+        
+        # Hours of the selected row that have runs, opening on the selected cell or else the first failure
+        run_hours = [hour for hour in hours if (selected_bot, hour) in cell_index]
+        labels = ["All Hours"] + [
+            f"{hour:02d}:00 {get_status_emoji(bot_hour_status[selected_bot].get(hour))} {bot_hour_status[selected_bot].get(hour)}"
+            for hour in run_hours
+        ]
+        if selected_hour in run_hours:
+            first_hour = run_hours.index(selected_hour) + 1
+        else:
+            first_hour = next((i + 1 for i, hour in enumerate(run_hours)
+                               if bot_hour_status[selected_bot].get(hour) == 'Failed'), 0)
+        detail_cols = st.columns([3, 1])
+        with detail_cols[0]:
+            st.markdown(f"**{selected_bot}**")
+        with detail_cols[1]:
+            selected_label = st.selectbox("Hour", labels, index=first_hour)
+        selected_hours = run_hours if selected_label == "All Hours" else [int(selected_label[:2])]
+        
+        runs = filtered_metrics_df.iloc[cell_positions(cell_index, selected_bot, selected_hours)]
+        if runs.empty:
+            st.info("No runs for this selection.")
+            return
+        
+        selection = tuple(runs['flowguid'].astype(str)) if 'flowguid' in runs.columns else None
+        cached = st.session_state.get('run_details')
+        if selection is not None and cached is not None and cached[0] == selection:
+            details = cached[1]
+        else:
+            with perf_stage('run_details', rows_in=len(runs)) as stage:
+                details = get_run_details(runs)
+                stage.rows_out = len(details)
+            st.session_state.run_details = (selection, details)
+        
+        columns = [column for column in RUN_DETAIL_COLUMNS if column in details.columns]
+        st.dataframe(
+            details[columns].sort_values('datetimestarted', ascending=False),
+            use_container_width=True,
+            hide_index=True
+        )
+        
+    except Exception as e:
+        logger.error(f"Error displaying run details: {e}", exc_info=True)
+        st.error("Error loading run details. Please check logs for details.")
+
+def load_day_diff(df, processed_df, partition_date, selected_project, selected_status, selected_owner):
+    """
+    Compare the selected day with the day before it
+    
+    Both days are reduced to cached status grids (see get_status_grid) and
+    compared cell by cell; the previous day is a cached, immutable partition
+    after the first comparison.
+    
+    Parameters:
+    - df: Loaded run history (all days)
+    - processed_df: Processed data of the selected day
+    - partition_date: Selected day
+    - selected_project, selected_status, selected_owner: Filters applied to both days
+    
+    Returns:
+        DayDiff or None - None when there is no data for the previous day
+    """
+    previous_date = partition_date - timedelta(days=1)
+    previous_raw = filter_data_by_date(df, previous_date)
+    if previous_raw.empty:
+        return None
+    previous_df = process_partition(previous_raw, previous_date)
+    filters = (selected_project, selected_status, selected_owner)
+    current_grid = get_status_grid(processed_df, partition_date, *filters)
+    previous_grid = get_status_grid(previous_df, previous_date, *filters)
+    # Hours still to come today are not compared
+    through_hour = datetime.now().hour if partition_date == date.today() else None
+    return diff_status_grids(current_grid, previous_grid, through_hour=through_hour)
+
+def display_day_diff(day_diff, partition_date):
+    """
+    Display the selected day next to the previous one with the changed cells highlighted
+    
+    Parameters:
+    - day_diff: DayDiff from load_day_diff (or None)
+    - partition_date: Selected day
+    """
+    previous_date = partition_date - timedelta(days=1)
+    st.markdown("### Day-over-Day Changes")
+    if day_diff is None:
+        st.info(f"No data for {previous_date} to compare with.")
+        return
+    try:
+        counts = day_diff.counts()
+        for column, (kind, count) in zip(st.columns(len(counts)), counts.items()):
+            column.metric(DIFF_LABELS[kind], f"{count:,}")
+        
+        changed = day_diff.changed_names()
+        if not changed:
+            st.success(f"No changes compared with {previous_date}.")
+            return
+        names = changed[:DIFF_MAX_ROWS]
+        st.caption(" · ".join(f'<span style="background-color: {DIFF_COLORS[kind]}; padding: 2px 6px">'
+                              f'{DIFF_LABELS[kind]}</span>' for kind in DIFF_LABELS)
+                   + (f" · showing {len(names)} of {len(changed)} bots with changes" if len(changed) > len(names) else ""),
+                   unsafe_allow_html=True)
+        
+        # Same table as the matrix, in the order of the changes, with the flow name as the only label
+        hour_columns = [f"{hour:02d}:00" for hour in day_diff.hours]
+        cell_styles = np.array([""] + [f"background-color: {DIFF_COLORS[kind]}" for kind in CHANGE_KINDS[1:]],
+                               dtype=object)[day_diff.cell_kinds(names)]
+        
+        def highlight(frame):
+            styles = pd.DataFrame("", index=frame.index, columns=frame.columns)
+            styles[hour_columns] = cell_styles
+            return styles
+        
+        for column, day, status in zip(st.columns(2), (previous_date, partition_date), day_diff.matrices(names)):
+            frame = build_matrix_frame(status, names, day_diff.hours).loc[names, ["Cloud Flow"] + hour_columns]
+            with column:
+                st.markdown(f"**{day:%A, %Y-%m-%d}**")
+                st.dataframe(frame.style.apply(highlight, axis=None), hide_index=True, use_container_width=True,
+                             height=min(800, max(200, len(names) * 35 + 100)))
+        
+        st.download_button(
+            "Download Changes (CSV)",
+            data=day_diff.to_csv(),
+            file_name=f"bot_changes_{previous_date}_{partition_date}.csv",
+            mime="text/csv",
+            help="Every changed (bot, hour) cell with both statuses"
+        )
+    except Exception as e:
+        logger.error(f"Error displaying day-over-day changes: {e}", exc_info=True)
+        st.error("Error displaying the day-over-day changes. Please check logs for details.")
+
+def display_analytics(filtered_metrics_df, aggregates):
+    """
+    Display the data summary, project performance metrics and additional analytics
+    
+    Parameters:
+    - filtered_metrics_df: Processed data with the project, status and owner filters applied
+    - aggregates: DashboardAggregates computed by the selected query engine for the same filters
+    
+    Returns:
+        None - Displays the sections directly in the Streamlit interface
+    """
+    st.markdown("### Data Summary")
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.subheader("Status Distribution")
+        status_counts = filtered_metrics_df['taskstatus'].value_counts()
+        st.bar_chart(status_counts)
+
+    with col2:
+        st.subheader("Automation Projects")
+        project_counts = filtered_metrics_df['automation_project'].value_counts().head(10)
+        st.bar_chart(project_counts)
+
+    with col3:
+        st.subheader("Owner Distribution")
+        owner_counts = filtered_metrics_df['owner'].value_counts()
+        st.bar_chart(owner_counts)
+
+    with col4:
+        st.subheader("Success Rate")
+        success_rate = filtered_metrics_df['wassuccessful'].mean() * 100
+        st.metric("Overall Success Rate", f"{success_rate:.1f}%")
+
+    # Project Performance Metrics section
+    st.markdown("### Project Performance Metrics")
+    project_metrics = aggregates.project_stats.round(4)
+
+    # Calculate metrics
+    project_metrics.columns = [
+        'Total Executions',
+        'Success Rate',
+        'Failure Rate',
+        'Unique Flows'
+    ]
+
+    project_metrics['Success Rate'] = project_metrics['Success Rate'] * 100
+    project_metrics['Failure Rate'] = project_metrics['Failure Rate'] * 100
+    project_metrics['Health Score'] = (
+        project_metrics['Success Rate'] - 
+        (project_metrics['Failure Rate'] * 2)
+    ).round(1)
+
+    # Create display dataframe
+    # Create display dataframe
+    success_display = pd.DataFrame({
+        'Project': project_metrics.index,
+        'Success Rate': project_metrics['Success Rate'].round(1),
+        'Failed Rate': project_metrics['Failure Rate'].round(1),
+        'Total Runs': project_metrics['Total Executions'],
+        'Active Flows': project_metrics['Unique Flows'],
+        'Health Score': project_metrics['Health Score']
+    })
+
+    # Display metrics with enhanced formatting
+    st.dataframe(
+        success_display.sort_values('Health Score', ascending=False),
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            'Project': st.column_config.TextColumn(
+                'Project Name',
+                help='Automation project name'
+            ),
+            'Success Rate': st.column_config.NumberColumn(
+                'Success Rate',
+                format="%.1f%%",
+                help="Percentage of successful executions"
+            ),
+            'Failed Rate': st.column_config.NumberColumn(
+                'Failure Rate',
+                format="%.1f%%",
+                help="Percentage of failed executions"
+            ),
+            'Total Runs': st.column_config.NumberColumn(
+                'Total Executions',
+                help="Total number of flow executions"
+            ),
+            'Active Flows': st.column_config.NumberColumn(
+                'Active Flows',
+                help="Number of distinct flows in the project"
+            ),
+            'Health Score': st.column_config.NumberColumn(
+                'Health Score',
+                format="%.1f",
+                help="Project health score (Success Rate - 2 × Failure Rate)"
+            )
+        }
+    )
+
+    st.markdown("### Additional Analytics")
+    # 1. Performance Metrics
+    # 1. Performance Metrics
+    st.subheader("Performance Metrics")
+    metric_cols = st.columns(4)
+
+    with metric_cols[0]:
+        try:
+            avg_duration = filtered_metrics_df['datetimecompleted'].dt.timestamp() - filtered_metrics_df['datetimestarted'].dt.timestamp()
+            avg_duration_mins = avg_duration.mean() / 60
+            st.metric("Average Duration", f"{avg_duration_mins:.1f} mins")
+        except:
+            st.metric("Average Duration", "N/A")
+
+    with metric_cols[1]:
+        failure_rate = (filtered_metrics_df['taskstatus'] == 'Failed').mean() * 100
+        st.metric("Failure Rate", f"{failure_rate:.1f}%")
+
+    with metric_cols[2]:
+        total_runs = len(filtered_metrics_df)
+        st.metric("Total Executions", f"{total_runs:,}")
+
+    with metric_cols[3]:
+        active_flows = filtered_metrics_df['flowname'].nunique()
+        st.metric("Active Flows", f"{active_flows:,}")
+
+    # 2. Hourly Trends
+    st.subheader("Execution Trends")
+    trend_cols = st.columns(2)
+
+    with trend_cols[0]:
+        st.markdown("#### Hourly Distribution")
+        hourly_dist = aggregates.hourly['runs']
+        st.bar_chart(hourly_dist)
+
+    with trend_cols[1]:
+        st.markdown("#### Success Rate by Hour")
+        hourly_success = aggregates.hourly['success_rate'] * 100
+        st.line_chart(hourly_success)
+
+    # 3. Top Issues Analysis
+    st.subheader("Issue Analysis")
+    issue_cols = st.columns(2)
+
+    with issue_cols[0]:
+        st.markdown("#### Top Failing Flows")
+        failed_flows = aggregates.top_failing
+        if not failed_flows.empty:
+            st.bar_chart(failed_flows)
+        else:
+            st.info("No failed flows in the selected timeframe.")
+
+    with issue_cols[1]:
+        st.markdown("#### Project Health Score")
+        project_health = (aggregates.project_stats[['success_rate', 'failure_rate']]
+                        .assign(health_score=lambda x: (x['success_rate'] * 100 - x['failure_rate'] * 50))
+                        .sort_values('health_score', ascending=False))
+        st.dataframe(project_health.round(2))
+
+    # 4. Execution Timeline
+    st.subheader("Execution Timeline")
+    try:
+        timeline_data = (filtered_metrics_df.groupby(pd.Grouper(key='datetimestarted', freq='15T'))
+                       .agg({
+                           'flowname': 'count',
+                           'wassuccessful': 'mean'
+                       }))
+        st.line_chart(timeline_data)
+    except Exception as e:
+        logger.warning(f"Could not generate timeline: {e}")
+        st.warning("Could not generate execution timeline. Check data format.")
 
 def load_data(use_csv=False):
     """Load data with proper error handling and status updates"""
+    st.session_state.history_loading = False
     try:
         # Display loading status
         status_placeholder = st.empty()
         progress_bar = st.progress(0)
         status_placeholder.info("Loading data...")
         
-        # Load data from database or CSV
-        df = get_flow_data(use_csv=use_csv)
+        # Load data from database or CSV; reruns between full refreshes only fetch open and new runs
+        full_refresh = st.session_state.pop('full_refresh_requested', False)
+        with perf_stage('get_flow_data') as stage:
+            df = get_flow_data(use_csv=use_csv, full_refresh=full_refresh, wait=HISTORY_LOAD_POLL_SECONDS <= 0)
+            stage.rows_out = 0 if df is None else len(df)
+        
+        if df is None:
+            # First database load still running (sources return empty frames, not None, when they
+            # have no data); main() shows the shell and polls for it
+            st.session_state.history_loading = True
+            status_placeholder.empty()
+            progress_bar.empty()
+            return None, None
         
-        if df is None or df.empty:
+        if df.empty:
             status_placeholder.error("No data available. Please check data source.")
             progress_bar.empty()
             return None, None
             
+        # Partitions of the history fetch that failed even after retries
+        failed_partitions = df.attrs.get('failed_partitions')
+        if failed_partitions:
+            shown = ', '.join(failed_partitions[:3]) + (' ...' if len(failed_partitions) > 3 else '')
+            st.warning(f"Incomplete data: {len(failed_partitions)} partition(s) could not be loaded ({shown})")
+            
         # Convert datetimestarted to datetime if it's not already
         df['datetimestarted'] = pd.to_datetime(df['datetimestarted'])
         
@@ -344,6 +830,13 @@ def load_data(use_csv=False):
         st.error(f"Failed to load data: {str(e)}")
         return None, None
 
+@st.fragment(run_every=HISTORY_LOAD_POLL_SECONDS or None)
+def await_history_load():
+    """Placeholder shown while the first history load runs; reruns the page once it is done"""
+    if not FLOW_RUN_SNAPSHOT.loading:
+        st.rerun()
+    st.info("Loading run history from the database... the dashboard appears as soon as it is ready.")
+
 def filter_data_by_date(df, selected_date, use_latest=False):
     """Filter data for specific date"""
     if df is None or df.empty:
@@ -369,13 +862,16 @@ def filter_data_by_date(df, selected_date, use_latest=False):
             
         logger.info(f"Filtering data for date: {filter_date}")
         
-        # Create a date column if it doesn't exist
-        if 'date' not in df.columns:
-            df = df.copy()
-            df['date'] = pd.to_datetime(df['datetimestarted']).dt.date
+        # Compare on the datetime column directly instead of materializing a date column
+        if 'date' in df.columns:
+            date_mask = df['date'] == filter_date
+        else:
+            day_start = pd.Timestamp(filter_date)
+            started = pd.to_datetime(df['datetimestarted'])
+            date_mask = (started >= day_start) & (started < day_start + pd.Timedelta(days=1))
         
-        # Apply the filter
-        filtered_df = df[df['date'] == filter_date]
+        # Apply the filter (a lazy copy under copy-on-write)
+        filtered_df = df[date_mask]
         logger.info(f"Filtered from {len(df)} to {len(filtered_df)} records")
         
         return filtered_df
@@ -386,45 +882,15 @@ def filter_data_by_date(df, selected_date, use_latest=False):
 def create_flow_mapper():
     """Create a mapping between flows and their projects"""
     try:
-        # Try to load from JSON first
-        with open('flow_mapping.json', 'r') as f:
-            flow_mapping = json.load(f)
-            
-        # Convert to DataFrame format
-        mapping_data = []
-        for flow_name, info in flow_mapping.items():
-            mapping_data.append({
-                'FlowName': flow_name.lower(),
-                'Project': info['project'],
-                'Type': info['type'],
-                'UOW_Type': info['uow_type'],
-                'Owner': info.get('owner', 'Unassigned')  # Maintain backwards compatibility
-            })
-        
-        return pd.DataFrame(mapping_data)
-        
-    except FileNotFoundError:
-        logger.warning("flow_mapping.json not found, creating default mapping")
-        return pd.DataFrame(columns=['FlowName', 'Project', 'Owner', 'Type', 'UOW_Type'])
+        # Served from the in-process registry; flow_mapping.json is only re-read when it changes
+        return FLOW_MAPPING.mapping_frame()
     except Exception as e:
         logger.error(f"Error creating flow mapping: {e}")
         return pd.DataFrame(columns=['FlowName', 'Project', 'Owner', 'Type', 'UOW_Type'])
 
 def load_flow_mapping():
-    """Load flow mapping from JSON"""
-    try:
-        # Try loading from the cached CSV first for performance
-        if Path('flow_mapping.csv').exists():
-            return pd.read_csv('flow_mapping.csv')
-        else:
-            # Create mapping from JSON source
-            mapping_df = create_flow_mapper()
-            # Cache it for future use
-            mapping_df.to_csv('flow_mapping.csv', index=False)
-            return mapping_df
-    except Exception as e:
-        logger.error(f"Error loading flow mapping: {e}")
-        return pd.DataFrame(columns=['FlowName', 'Project', 'Owner', 'Type', 'UOW_Type'])
+    """Load flow mapping (the registry keeps flow_mapping.csv in sync with the JSON)"""
+    return create_flow_mapper()
 
 def get_project_for_flow(flow_name, mapping_df):
     """Get project name for a given flow"""
@@ -482,10 +948,16 @@ def initialize_session_state():
 
 def main():
     """Main dashboard application"""
+    rerun_started_at = datetime.now()
+    show_perf_panel = False
+    perf_container = None
     try:
         # Initialize session state
         initialize_session_state()
         
+        # Filter selections of this rerun (attached to slow rerun profiles)
+        filter_state = st.session_state.filter_state = {}
+        
         # Title and description
         st.title("Bot Monitoring Dashboard")
         st.markdown("Monitor Power Automate Cloud Flow execution status by hour")
@@ -498,6 +970,8 @@ def main():
             use_csv = st.checkbox("Use CSV Data", value=False, 
                                  help="Use CSV files instead of database")
             
+            filter_state['use_csv'] = use_csv
+            
             # Load data first to get the latest date
             df, latest_date = load_data(use_csv=use_csv)
             
@@ -525,6 +999,10 @@ def main():
             else:
                 selected_date = latest_date if latest_date else today
                 st.info(f"Showing data for: {selected_date}")
+            compare_previous = st.checkbox("Compare with Previous Day", value=False,
+                                           help="Show what changed since the day before the selected date")
+            filter_state.update(use_latest=use_latest, selected_date=str(selected_date),
+                                compare_previous=compare_previous)
             
             # Manual refresh button with counter update
             if st.button("Refresh Data"):
@@ -532,6 +1010,8 @@ def main():
                     # Update session state variables atomically
                     st.session_state.refresh_count += 1
                     st.session_state.last_refresh = datetime.now()
+                    # The manual refresh re-reads the whole run history, not just the open runs
+                    st.session_state.full_refresh_requested = True
                     logger.info(f"Manual refresh triggered (refresh #{st.session_state.refresh_count})")
                 except ValueError as val_error:
                     logger.warning(f"Value error updating session state: {val_error}")
@@ -597,6 +1077,19 @@ def main():
                 except Exception as refresh_error:
                     logger.error(f"Auto-refresh calculation error: {refresh_error}")
                     st.warning("Error in refresh calculation. Try refreshing manually.")
+            
+            # Optional performance panel, filled in once the rerun's stages have run
+            st.markdown("### Performance")
+            show_perf_panel = st.checkbox("Show Performance Panel", value=False,
+                                          help="Show timing, row counts and memory per pipeline stage")
+            perf_container = st.container()
+            
+            # Query engine for the matrix and analytics aggregates; 'compare' checks SQL against pandas
+            engines = ['pandas', 'sqlite'] + (['duckdb'] if DUCKDB_AVAILABLE else []) + ['compare']
+            default_engine = query_engine_from_env()
+            query_engine = st.selectbox("Query Engine", engines, index=engines.index(default_engine),
+                                        help="Engine computing the matrix and analytics")
+            filter_state['query_engine'] = query_engine
         
         # Use the already loaded data from the sidebar
         if df is not None and not df.empty:
@@ -604,27 +1097,33 @@ def main():
             logger.info(f"Data loaded successfully: {len(df)} rows")
             logger.info(f"Columns available: {df.columns.tolist()}")
             
+            # Pick up edits to flow_mapping.json / rules without restarting
+            refresh_flow_mapping()
+            
             # Filter data for selected date
-            filtered_df = filter_data_by_date(df, selected_date, use_latest)
+            with perf_stage('filter_data_by_date', rows_in=len(df)) as stage:
+                filtered_df = filter_data_by_date(df, selected_date, use_latest)
+                stage.rows_out = len(filtered_df)
             logger.info(f"After date filtering: {len(filtered_df)} rows")
             
             if filtered_df.empty:
                 st.warning(f"No data available for selected date: {selected_date}")
                 return
                 
-            # Load flow mapping
-            flow_mapping = load_flow_mapping()
-            
-            # Process data for dashboard display
-            # Process data for dashboard display
-            processed_df = process_data_for_dashboard(filtered_df)
+            # Process data for dashboard display (memoized per date partition)
+            partition_date = pd.Timestamp(filtered_df['datetimestarted'].iloc[0]).date()
+            with perf_stage('process_data_for_dashboard', rows_in=len(filtered_df)) as stage:
+                processed_df = process_partition(filtered_df, partition_date)
+                stage.rows_out = len(processed_df)
             logger.info(f"After processing: {len(processed_df)} rows")
             
-            # Add project information from mapping
-            if 'flowname' in processed_df.columns:
-                processed_df['automation_project'] = processed_df['flowname'].apply(
-                    lambda x: get_project_for_flow(x, flow_mapping)
-                )
+            # Surface rows the validation step rejected instead of dropping them silently
+            rejection_report = get_rejection_report(partition_date)
+            if rejection_report is not None and rejection_report.rejected_count:
+                reasons = ", ".join(f"{reason}: {count}" for reason, count in rejection_report.rejected.items())
+                st.caption(f"⚠️ {rejection_report.rejected_count} of {rejection_report.total_rows} rows rejected ({reasons})")
+            
+            if 'automation_project' in processed_df.columns:
                 logger.info(f"Projects mapped: {processed_df['automation_project'].nunique()} unique projects")
             if processed_df is not None and not processed_df.empty:
                 # Filter controls
@@ -633,9 +1132,7 @@ def main():
                 with col1:
                     # Get all possible projects from flow mapping
                     try:
-                        with open('flow_mapping.json', 'r') as f:
-                            flow_mapping = json.load(f)
-                        mapped_projects = sorted(set(info['project'] for info in flow_mapping.values()))
+                        mapped_projects = FLOW_MAPPING.projects()
                     except Exception as e:
                         logger.warning(f"Could not load projects from mapping: {e}")
                         mapped_projects = []
@@ -659,6 +1156,8 @@ def main():
                 with col3:
                     owners = ['All Owners'] + sorted(processed_df['owner'].unique().tolist())
                     selected_owner = st.selectbox("Select Owner", owners)
+                
+                filter_state.update(project=selected_project, status=selected_status, owner=selected_owner)
                     
                 # Apply filters
                 # Apply filters before any metrics calculation
@@ -680,7 +1179,7 @@ def main():
                     logger.info(f"Filtered for owner: {selected_owner}, remaining records: {mask.sum()}")
 
                 # Apply the filter mask to create filtered dataframe
-                filtered_metrics_df = processed_df[mask].copy()
+                filtered_metrics_df = processed_df[mask]
                 logger.info(f"After all filters: {len(filtered_metrics_df)} records")
 
                 # Ensure we have data after filtering
@@ -688,12 +1187,39 @@ def main():
                     st.warning("No data available for the selected filters.")
                     return
 
-                # Create matrix data with filtered data
-                bot_hour_status, display_names, hours = create_hourly_matrix(
-                    filtered_metrics_df,
-                    selected_project=selected_project,
-                    selected_status=selected_status
-                )
+                # Matrix and analytics aggregates (pandas matrix memoized per partition and filters)
+                with perf_stage('dashboard_queries', rows_in=len(filtered_metrics_df)) as stage:
+                    aggregates = compute_dashboard_aggregates(
+                        processed_df,
+                        filtered_metrics_df,
+                        partition_date,
+                        selected_project=selected_project,
+                        selected_status=selected_status,
+                        selected_owner=selected_owner,
+                        engine=query_engine
+                    )
+                    bot_hour_status, display_names, hours = aggregates.matrix
+                    stage.rows_out = len(display_names)
+                # Scheduled hours without a run (only meaningful when no status is filtered out)
+                silent_flows = {}
+                if selected_status == 'All Statuses':
+                    with perf_stage('mark_missed_runs', rows_in=len(display_names)):
+                        current_hour = datetime.now().hour if partition_date == date.today() else None
+                        bot_hour_status = mark_missed_runs(df, bot_hour_status, display_names, partition_date, current_hour)
+                        # Flows that stopped altogether have no matrix row; they are listed below it
+                        if selected_project == 'All Projects':
+                            silent_flows = find_silent_flows(df, processed_df['display_name'].unique().tolist(),
+                                                             partition_date, current_hour)
+                            if selected_owner != 'All Owners':
+                                silent_flows = {key: hours for key, hours in silent_flows.items()
+                                                if key.split(" | ", 1)[0] == selected_owner}
+                if aggregates.comparison is not None:
+                    comparison = aggregates.comparison
+                    outcome = "results match" if not comparison['differences'] else f"⚠️ {'; '.join(comparison['differences'])}"
+                    st.caption(f"Query engine compare: pandas {aggregates.seconds * 1000:.0f} ms, "
+                               f"{comparison['engine']} {comparison['seconds'] * 1000:.0f} ms - {outcome}")
+                metrics.MATRIX_ROWS.observe(len(display_names))
+                metrics.MATRIX_CELLS.set(len(display_names) * len(hours))
                 
                 logger.info(f"Matrix created with {len(display_names)} display names and {len(hours)} hours")
                 
@@ -719,7 +1245,7 @@ def main():
 
                 st.markdown("### Status Legend")
                 st.markdown('<div class="status-legend">', unsafe_allow_html=True)
-                legend_cols = st.columns(5)
+                legend_cols = st.columns(6)
                 with legend_cols[0]:
                     st.markdown(f'<div class="legend-item">{STATUS_EMOJIS["Succeeded"]} Succeeded/Completed</div>', unsafe_allow_html=True)
                 with legend_cols[1]:
@@ -730,6 +1256,8 @@ def main():
                     st.markdown(f'<div class="legend-item">{STATUS_EMOJIS["No Run"]} No Run/Skipped</div>', unsafe_allow_html=True)
                 with legend_cols[4]:
                     st.markdown(f'<div class="legend-item">{STATUS_EMOJIS["Canceled"]} Canceled</div>', unsafe_allow_html=True)
+                with legend_cols[5]:
+                    st.markdown(f'<div class="legend-item">{STATUS_EMOJIS["Missed"]} Missed (scheduled, no run)</div>', unsafe_allow_html=True)
                 st.markdown('</div>', unsafe_allow_html=True)
 
                 # Add spacing after legend
@@ -738,187 +1266,31 @@ def main():
                 # Then display matrix
                 if display_names:  # Check if we have data to display
                     st.markdown("### Bot Activity Matrix")
-                    display_matrix(bot_hour_status, display_names, hours)
+                    with perf_stage('display_matrix', rows_in=len(display_names)) as stage:
+                        selected_cell = display_matrix(bot_hour_status, display_names, hours)
+                        stage.rows_out = len(display_names)
+                    display_silent_flows(silent_flows, partition_date)
+                    # Cell index built with the matrix (or on first use for the SQL engines)
+                    cell_index = {}
+                    if selected_cell is not None:
+                        cell_index = get_cell_index(filtered_metrics_df, partition_date, display_names,
+                                                    selected_project, selected_status, selected_owner)
+                    display_run_details(filtered_metrics_df, bot_hour_status, selected_cell, hours, cell_index)
                 else:
                     st.warning("No data to display for the selected filters.")
+                
+                if compare_previous:
+                    with perf_stage('day_diff', rows_in=len(processed_df)) as stage:
+                        day_diff = load_day_diff(df, processed_df, partition_date,
+                                                 selected_project, selected_status, selected_owner)
+                        stage.rows_out = len(day_diff.names) if day_diff is not None else 0
+                    display_day_diff(day_diff, partition_date)
                 # Show summary statistics with project information
                 # Data Summary and Project Performance sections
-                st.markdown("### Data Summary")
-                col1, col2, col3, col4 = st.columns(4)
-                
-                with col1:
-                    st.subheader("Status Distribution")
-                    status_counts = filtered_metrics_df['taskstatus'].value_counts()
-                    st.bar_chart(status_counts)
-                
-                with col2:
-                    st.subheader("Automation Projects")
-                    project_counts = filtered_metrics_df['automation_project'].value_counts().head(10)
-                    st.bar_chart(project_counts)
-                
-                with col3:
-                    st.subheader("Owner Distribution")
-                    owner_counts = filtered_metrics_df['owner'].value_counts()
-                    st.bar_chart(owner_counts)
-                
-                with col4:
-                    st.subheader("Success Rate")
-                    success_rate = filtered_metrics_df['wassuccessful'].mean() * 100
-                    st.metric("Overall Success Rate", f"{success_rate:.1f}%")
-
-                # Project Performance Metrics section
-                st.markdown("### Project Performance Metrics")
-                project_metrics = (filtered_metrics_df.groupby('automation_project')
-                    .agg({
-                        'wassuccessful': ['count', 'mean'],
-                        'taskstatus': lambda x: (x == 'Failed').mean(),
-                        'flowname': 'nunique'
-                    })
-                    .round(4)
-                )
-
-                # Calculate metrics
-                project_metrics.columns = [
-                    'Total Executions',
-                    'Success Rate',
-                    'Failure Rate',
-                    'Unique Flows'
-                ]
-
-                project_metrics['Success Rate'] = project_metrics['Success Rate'] * 100
-                project_metrics['Failure Rate'] = project_metrics['Failure Rate'] * 100
-                project_metrics['Health Score'] = (
-                    project_metrics['Success Rate'] - 
-                    (project_metrics['Failure Rate'] * 2)
-                ).round(1)
-
-                # Create display dataframe
-                # Create display dataframe
-                success_display = pd.DataFrame({
-                    'Project': project_metrics.index,
-                    'Success Rate': project_metrics['Success Rate'].round(1),
-                    'Failed Rate': project_metrics['Failure Rate'].round(1),
-                    'Total Runs': project_metrics['Total Executions'],
-                    'Active Flows': project_metrics['Unique Flows'],
-                    'Health Score': project_metrics['Health Score']
-                })
-
-                # Display metrics with enhanced formatting
-                st.dataframe(
-                    success_display.sort_values('Health Score', ascending=False),
-                    use_container_width=True,
-                    hide_index=True,
-                    column_config={
-                        'Project': st.column_config.TextColumn(
-                            'Project Name',
-                            help='Automation project name'
-                        ),
-                        'Success Rate': st.column_config.NumberColumn(
-                            'Success Rate',
-                            format="%.1f%%",
-                            help="Percentage of successful executions"
-                        ),
-                        'Failed Rate': st.column_config.NumberColumn(
-                            'Failure Rate',
-                            format="%.1f%%",
-                            help="Percentage of failed executions"
-                        ),
-                        'Total Runs': st.column_config.NumberColumn(
-                            'Total Executions',
-                            help="Total number of flow executions"
-                        ),
-                        'Active Flows': st.column_config.NumberColumn(
-                            'Active Flows',
-                            help="Number of distinct flows in the project"
-                        ),
-                        'Health Score': st.column_config.NumberColumn(
-                            'Health Score',
-                            format="%.1f",
-                            help="Project health score (Success Rate - 2 × Failure Rate)"
-                        )
-                    }
-                )
-                
-                st.markdown("### Additional Analytics")
-                # 1. Performance Metrics
-                # 1. Performance Metrics
-                st.subheader("Performance Metrics")
-                metric_cols = st.columns(4)
-                
-                with metric_cols[0]:
-                    try:
-                        avg_duration = filtered_metrics_df['datetimecompleted'].dt.timestamp() - filtered_metrics_df['datetimestarted'].dt.timestamp()
-                        avg_duration_mins = avg_duration.mean() / 60
-                        st.metric("Average Duration", f"{avg_duration_mins:.1f} mins")
-                    except:
-                        st.metric("Average Duration", "N/A")
-                
-                with metric_cols[1]:
-                    failure_rate = (filtered_metrics_df['taskstatus'] == 'Failed').mean() * 100
-                    st.metric("Failure Rate", f"{failure_rate:.1f}%")
-                
-                with metric_cols[2]:
-                    total_runs = len(filtered_metrics_df)
-                    st.metric("Total Executions", f"{total_runs:,}")
-                
-                with metric_cols[3]:
-                    active_flows = filtered_metrics_df['flowname'].nunique()
-                    st.metric("Active Flows", f"{active_flows:,}")
-
-                # 2. Hourly Trends
-                st.subheader("Execution Trends")
-                trend_cols = st.columns(2)
-                
-                with trend_cols[0]:
-                    st.markdown("#### Hourly Distribution")
-                    hourly_dist = filtered_metrics_df.groupby(filtered_metrics_df['datetimestarted'].dt.hour)['flowname'].count()
-                    st.bar_chart(hourly_dist)
-                
-                with trend_cols[1]:
-                    st.markdown("#### Success Rate by Hour")
-                    hourly_success = filtered_metrics_df.groupby(filtered_metrics_df['datetimestarted'].dt.hour)['wassuccessful'].mean() * 100
-                    st.line_chart(hourly_success)
-
-                # 3. Top Issues Analysis
-                st.subheader("Issue Analysis")
-                issue_cols = st.columns(2)
-                
-                with issue_cols[0]:
-                    st.markdown("#### Top Failing Flows")
-                    failed_df = filtered_metrics_df[filtered_metrics_df['taskstatus'] == 'Failed']
-                    if not failed_df.empty:
-                        failed_flows = (failed_df
-                                      .groupby('flowname')
-                                      .size()
-                                      .sort_values(ascending=False)
-                                      .head(5))
-                        st.bar_chart(failed_flows)
-                    else:
-                        st.info("No failed flows in the selected timeframe.")
-                
-                with issue_cols[1]:
-                    st.markdown("#### Project Health Score")
-                    project_health = (filtered_metrics_df.groupby('automation_project')
-                                    .agg({
-                                        'wassuccessful': 'mean',
-                                        'taskstatus': lambda x: (x == 'Failed').mean()
-                                    })
-                                    .assign(health_score=lambda x: (x['wassuccessful'] * 100 - x['taskstatus'] * 50))
-                                    .sort_values('health_score', ascending=False))
-                    st.dataframe(project_health.round(2))
-
-                # 4. Execution Timeline
-                st.subheader("Execution Timeline")
-                try:
-                    timeline_data = (filtered_metrics_df.groupby(pd.Grouper(key='datetimestarted', freq='15T'))
-                                   .agg({
-                                       'flowname': 'count',
-                                       'wassuccessful': 'mean'
-                                   }))
-                    st.line_chart(timeline_data)
-                except Exception as e:
-                    logger.warning(f"Could not generate timeline: {e}")
-                    st.warning("Could not generate execution timeline. Check data format.")
+                with perf_stage('analytics', rows_in=len(filtered_metrics_df)):
+                    display_analytics(filtered_metrics_df, aggregates)
+        elif st.session_state.get('history_loading', False):
+            await_history_load()
         else:
             st.error("No data available. Please check data source and try again.")
     
@@ -952,7 +1324,13 @@ def main():
         except:
             # Don't let cleanup errors affect the application
             pass
+        
+        if show_perf_panel and perf_container is not None:
+            render_performance_panel(perf_container, rerun_started_at)
 
 if __name__ == "__main__":
-    main()
+    _track_session()
+    with SLOW_RERUN_PROFILER.profile(_rerun_profile_context), perf_stage('rerun'):
+        main()
+    metrics.write_textfile_from_env()
 
@@ -3,6 +3,27 @@ Data processing module for Bot Monitoring Dashboard
 Contains functions to process and validate data
 """
 
-from data_processing.processors import process_data_for_dashboard, extract_project_name, create_hourly_matrix
-from data_processing.validators import validate_raw_data, validate_processed_data, validate_matrix_data
+import pandas as pd
+
+# Copy-on-write lets the pipeline share unchanged columns between stages
+# instead of taking defensive deep copies of every frame
+pd.set_option('mode.copy_on_write', True)
+
+from data_processing.processors import (
+    process_data_for_dashboard, prepare_dashboard_data, process_partition, get_rejection_report,
+    map_flow_projects, refresh_flow_mapping, extract_project_name, create_hourly_matrix, get_hourly_matrix,
+    patch_hourly_matrix, build_cell_index, get_cell_index, cell_positions, get_status_grid,
+    mark_missed_runs, find_silent_flows, normalize_owner
+)
+from data_processing.project_names import extract_project_names, ProjectNameTable
+from data_processing.flow_rules import FlowRuleEngine, FlowRuleSet
+from data_processing.mapping_registry import FlowMappingRegistry
+from data_processing.validators import validate_raw_data, validate_processed_data, validate_matrix_data, RejectedRowsReport
+from data_processing.cache import PartitionCache, MatrixCache, fingerprint_rows
+from data_processing.ranking import BotRanking
+from data_processing.schedule import ScheduleIndex
+from data_processing.matrix_diff import StatusGrid, DayDiff, diff_status_grids, CHANGE_KINDS
+from data_processing.query_engine import (
+    compute_dashboard_aggregates, pandas_aggregates, compare_aggregates, SqlRunStore, DashboardAggregates
+)
 
@@ -0,0 +1,228 @@
+"""
+Caching module for Bot Monitoring Dashboard
+Contains the date-partitioned cache used to memoize processed data between reruns
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger('data_cache')
+
+# Default memory budget for cached partitions (256 MB)
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+def fingerprint_rows(df: pd.DataFrame) -> np.ndarray:
+    """
+    Compute a stable 64-bit content hash for every row of a DataFrame.
+
+    Args:
+        df: Raw rows to fingerprint
+
+    Returns:
+        numpy.ndarray: uint64 hash per row (index labels are ignored)
+    """
+    if df is None or df.empty:
+        return np.empty(0, dtype=np.uint64)
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+def combine_fingerprint(row_hashes: np.ndarray) -> str:
+    """
+    Combine per-row hashes into a single partition fingerprint.
+
+    Args:
+        row_hashes: uint64 row hashes as returned by fingerprint_rows
+
+    Returns:
+        str: Hex digest identifying the partition content
+    """
+    return hashlib.blake2b(np.ascontiguousarray(row_hashes).tobytes(), digest_size=16).hexdigest()
+
+class PartitionPatch:
+    """How a partition entry was derived from the previous one by a delta update"""
+
+    __slots__ = ('previous_fingerprint', 'previous_rows', 'touched', 'removed', 'added')
+
+    def __init__(self, previous_fingerprint: str, previous_rows: int, touched: frozenset,
+                 removed: pd.DataFrame, added: pd.DataFrame):
+        self.previous_fingerprint = previous_fingerprint
+        # Length of the previous processed frame
+        self.previous_rows = previous_rows
+        # display_name of every run that was replaced or added
+        self.touched = touched
+        # Processed rows dropped from and appended to the previous frame
+        self.removed = removed
+        self.added = added
+
+class PartitionEntry:
+    """Processed output for one date partition together with its raw fingerprint"""
+
+    __slots__ = ('fingerprint', 'row_hashes', 'frame', 'nbytes', 'immutable', 'report', 'patch')
+
+    def __init__(self, fingerprint: str, row_hashes: np.ndarray, frame: pd.DataFrame,
+                 immutable: bool = False, report: Any = None, patch: Optional[PartitionPatch] = None):
+        self.fingerprint = fingerprint
+        self.row_hashes = row_hashes
+        self.frame = frame
+        self.immutable = immutable
+        self.report = report
+        # Set when the entry came from a delta update of the previous one
+        self.patch = patch
+        self.nbytes = int(frame.memory_usage(index=True, deep=True).sum()) + int(row_hashes.nbytes)
+        if patch is not None:
+            # The patch keeps its removed and added rows alive for the matrix caches' delta updates
+            self.nbytes += sum(int(rows.memory_usage(index=True, deep=True).sum()) for rows in (patch.removed, patch.added))
+
+    @property
+    def row_count(self) -> int:
+        return len(self.row_hashes)
+
+class PartitionCache:
+    """
+    LRU cache of processed partitions bounded by an approximate byte budget.
+
+    Entries are keyed by partition (normally a date). The least recently used
+    entries are evicted once the total size of the cached frames exceeds
+    ``max_bytes``. Access is guarded by a lock because Streamlit serves
+    sessions from multiple threads of the same process.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, PartitionEntry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.delta_updates = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable) -> Optional[PartitionEntry]:
+        """Return the entry for a partition and mark it as recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Hashable, entry: PartitionEntry) -> bool:
+        """
+        Store an entry and evict least recently used partitions over budget.
+
+        Returns:
+            bool: False if the entry alone exceeds the budget and was not cached
+        """
+        with self._lock:
+            self._discard(key)
+            if entry.nbytes > self.max_bytes:
+                logger.warning(f"Partition {key} ({entry.nbytes} bytes) exceeds cache budget of {self.max_bytes} bytes")
+                return False
+
+            self._entries[key] = entry
+            self._total_bytes += entry.nbytes
+
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= evicted.nbytes
+                self.evictions += 1
+                logger.info(f"Evicted partition {evicted_key} from cache ({evicted.nbytes} bytes)")
+            return True
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Drop a single partition from the cache"""
+        with self._lock:
+            return self._discard(key)
+
+    def clear(self) -> None:
+        """Drop all cached partitions"""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def keys(self) -> List[Hashable]:
+        """Snapshot of the cached partition keys, least recently used first"""
+        with self._lock:
+            return list(self._entries.keys())
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache statistics for logging and diagnostics"""
+        with self._lock:
+            return {
+                'partitions': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'delta_updates': self.delta_updates,
+                'evictions': self.evictions,
+            }
+
+    def _discard(self, key: Hashable) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._total_bytes -= entry.nbytes
+        return True
+
+class MatrixCache:
+    """
+    Small LRU cache of hourly matrices keyed by partition and filter selection.
+
+    Keys are tuples whose first element is the partition key, so every matrix
+    built from a partition can be dropped when that partition is invalidated.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: tuple) -> Optional[Any]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key: tuple) -> Optional[Any]:
+        """Return a cached matrix without counting a hit or miss or refreshing its LRU position"""
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key: tuple, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_partition(self, partition_key: Hashable) -> int:
+        """Drop all matrices built from a partition and return how many were dropped"""
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == partition_key]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
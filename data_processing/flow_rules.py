@@ -0,0 +1,195 @@
+"""
+Flow mapping rule engine for the Bot Monitoring Dashboard
+Resolves flow -> project with prefix, suffix and glob rules layered on top of the exact mapping
+"""
+
+import fnmatch
+import json
+import logging
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger('flow_rules')
+
+# Default location of the rule file, next to flow_mapping.json
+DEFAULT_RULES_PATH = 'flow_mapping_rules.json'
+
+# Marks the end of a key in the prefix/suffix tries
+_TERMINAL = '\0'
+
+GLOB_CHARS = re.compile(r'[*?\[]')
+
+def classify_pattern(pattern: str) -> Tuple[str, str]:
+    """
+    Classify a glob-style pattern as a prefix, suffix or general glob rule.
+
+    'AMZ_*' is a prefix rule, '*_UOW' a suffix rule; anything else containing
+    wildcards ('*Delivery*', 'Part?-*') or none at all is matched as a full glob.
+
+    Args:
+        pattern: Glob pattern from the rule file
+
+    Returns:
+        tuple: (kind, key) where key is the literal prefix/suffix or the pattern itself
+    """
+    if pattern.endswith('*') and not GLOB_CHARS.search(pattern[:-1]):
+        return 'prefix', pattern[:-1]
+    if pattern.startswith('*') and not GLOB_CHARS.search(pattern[1:]):
+        return 'suffix', pattern[1:]
+    return 'glob', pattern
+
+class _Trie:
+    """Character trie storing the lowest rule index for each key"""
+
+    def __init__(self):
+        self.root: Dict = {}
+
+    def insert(self, key: str, rule_index: int) -> None:
+        node = self.root
+        for char in key:
+            node = node.setdefault(char, {})
+        # Keep the first (highest priority) rule for duplicate keys
+        node.setdefault(_TERMINAL, rule_index)
+
+    def best_match(self, text: str) -> Optional[int]:
+        """Return the lowest rule index among all keys that are prefixes of text"""
+        node = self.root
+        best = node.get(_TERMINAL)
+        for char in text:
+            node = node.get(char)
+            if node is None:
+                break
+            found = node.get(_TERMINAL)
+            if found is not None and (best is None or found < best):
+                best = found
+        return best
+
+class FlowRuleSet:
+    """
+    Compiled set of flow mapping rules.
+
+    Prefix rules live in a character trie, suffix rules in a trie of reversed
+    keys, and general globs in a single alternation regex whose branches are
+    ordered by rule priority. Resolving a name is one walk of each trie plus
+    one regex match; trie lookups are independent of the number of rules,
+    while the regex cost grows with the number of general globs, so prefer
+    'ABC*' and '*XYZ' forms where possible. When several rules match, the
+    one listed first in the rule file wins. Matching is case-insensitive.
+    """
+
+    def __init__(self, rules: List[Dict]):
+        self.rules: List[Dict] = []
+        self._prefixes = _Trie()
+        self._suffixes = _Trie()
+        glob_branches = []
+
+        for rule in rules:
+            pattern = str(rule.get('pattern', '')).strip()
+            project = rule.get('project')
+            if not pattern or not project:
+                logger.warning(f"Skipping invalid flow mapping rule: {rule}")
+                continue
+            index = len(self.rules)
+            self.rules.append({'pattern': pattern, 'project': project})
+
+            kind, key = classify_pattern(pattern.lower())
+            if kind == 'prefix':
+                self._prefixes.insert(key, index)
+            elif kind == 'suffix':
+                self._suffixes.insert(key[::-1], index)
+            else:
+                glob_branches.append(f"(?P<r{index}>{fnmatch.translate(key)})")
+
+        self._glob = re.compile('|'.join(glob_branches)) if glob_branches else None
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def match(self, flow_name: str) -> Optional[str]:
+        """Return the project of the highest priority rule matching flow_name, or None"""
+        if not self.rules or not isinstance(flow_name, str):
+            return None
+        name = flow_name.strip().lower()
+        candidates = [
+            self._prefixes.best_match(name),
+            self._suffixes.best_match(name[::-1])
+        ]
+        if self._glob is not None:
+            glob_match = self._glob.match(name)
+            if glob_match is not None:
+                candidates.append(int(glob_match.lastgroup[1:]))
+        matched = [index for index in candidates if index is not None]
+        return self.rules[min(matched)]['project'] if matched else None
+
+class FlowRuleEngine:
+    """
+    Rule file loader with a per-flow result cache.
+
+    The compiled rules and the cache of resolved flow names are kept until the
+    rule file's modification time or size changes; only then is the file
+    re-read, recompiled and the cache cleared. With ``auto_reload`` disabled
+    the owner (e.g. FlowMappingRegistry) decides when to call reload_if_changed.
+    """
+
+    def __init__(self, path: str = DEFAULT_RULES_PATH, auto_reload: bool = True):
+        self.path = path
+        self.auto_reload = auto_reload
+        self.rule_set = FlowRuleSet([])
+        self._cache: Dict[str, Optional[str]] = {}
+        self._signature = None
+        self._lock = threading.Lock()
+
+    def reload_if_changed(self) -> bool:
+        """
+        Re-read the rule file if it changed on disk.
+
+        Returns:
+            bool: True if the rules were reloaded
+        """
+        try:
+            stat = os.stat(self.path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            signature = None
+
+        with self._lock:
+            if signature == self._signature:
+                return False
+            rules = []
+            if signature is not None:
+                try:
+                    with open(self.path, 'r') as f:
+                        rules = json.load(f).get('rules', [])
+                except Exception as e:
+                    logger.warning(f"Could not load flow mapping rules from {self.path}: {e}")
+                    return False
+            self.rule_set = FlowRuleSet(rules)
+            self._cache = {}
+            self._signature = signature
+            logger.info(f"Loaded {len(self.rule_set)} flow mapping rules from {self.path}")
+            return True
+
+    def resolve(self, flow_names: pd.Series) -> pd.Series:
+        """
+        Resolve flow names against the rules, matching each unique name once.
+
+        Args:
+            flow_names: Flow names to resolve
+
+        Returns:
+            pd.Series: Project per flow name, NaN where no rule matches
+        """
+        if self.auto_reload or self._signature is None:
+            self.reload_if_changed()
+        uniques = pd.unique(flow_names)
+        with self._lock:
+            rule_set, cache = self.rule_set, self._cache
+            for name in uniques:
+                if name not in cache:
+                    cache[name] = rule_set.match(name)
+            lookup = {name: cache[name] for name in uniques}
+        return flow_names.map(lookup)
@@ -0,0 +1,176 @@
+"""
+Flow mapping registry for the Bot Monitoring Dashboard
+Loads flow_mapping.json once, reloads it when the file changes and keeps the derived CSV in sync
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger('mapping_registry')
+
+MAPPING_COLUMNS = ['FlowName', 'Project', 'Owner', 'Type', 'UOW_Type']
+
+def _file_signature(path: str):
+    """Return (mtime_ns, size) for a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    except (FileNotFoundError, TypeError):
+        return None
+
+class FlowMappingRegistry:
+    """
+    Single in-process copy of the flow -> project mapping.
+
+    The JSON mapping (and optionally the rule engine's rule file) is checked
+    for changes at most once per ``check_interval`` seconds. When either file
+    changed the mapping is reloaded, ``version`` is bumped, the derived CSV is
+    rewritten and every registered listener is called so it can invalidate the
+    cached data that depends on the mapping.
+    """
+
+    def __init__(self, mapping_path: str = 'flow_mapping.json', csv_path: Optional[str] = 'flow_mapping.csv',
+                 rule_engine=None, check_interval: float = 1.0):
+        self.mapping_path = mapping_path
+        self.csv_path = csv_path
+        self.rule_engine = rule_engine
+        self.check_interval = check_interval
+        self.version = 0
+        self._mapping: Dict[str, Dict] = {}
+        self._frame: Optional[pd.DataFrame] = None
+        self._signature = None
+        self._loaded = False
+        self._last_check = 0.0
+        self._listeners: List[Callable[[int], None]] = []
+        self._lock = threading.RLock()
+
+    @property
+    def mapping(self) -> Dict[str, Dict]:
+        """Parsed flow_mapping.json ({flow_name: {'project', 'type', 'uow_type', ...}})"""
+        if not self._loaded:
+            self.refresh(force=True)
+        return self._mapping
+
+    def add_listener(self, callback: Callable[[int], None]) -> None:
+        """Register a callback invoked with the new version after each reload"""
+        self._listeners.append(callback)
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Reload the mapping files if they changed on disk.
+
+        Args:
+            force: Check the files even if the check interval has not elapsed
+
+        Returns:
+            bool: True if the mapping or rules were reloaded and the version bumped
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not force and self._loaded and now - self._last_check < self.check_interval:
+                return False
+            self._last_check = now
+
+            changed = False
+            signature = _file_signature(self.mapping_path)
+            if (not self._loaded or signature != self._signature) and self._load_mapping(signature):
+                changed = True
+            if self.rule_engine is not None and self.rule_engine.reload_if_changed():
+                changed = True
+            if not changed:
+                return False
+
+            first_load = self.version == 0
+            self.version += 1
+            logger.info(f"Flow mapping version {self.version}: {len(self._mapping)} flows")
+
+        if not first_load:
+            for callback in self._listeners:
+                try:
+                    callback(self.version)
+                except Exception as e:
+                    logger.error(f"Flow mapping listener failed: {e}")
+        return True
+
+    def projects(self) -> List[str]:
+        """Sorted list of all projects named in the mapping"""
+        return sorted({info['project'] for info in self.mapping.values() if info.get('project')})
+
+    def mapping_frame(self) -> pd.DataFrame:
+        """Mapping in the flow_mapping.csv layout (lowercased FlowName, Project, Owner, Type, UOW_Type)"""
+        if not self._loaded:
+            self.refresh(force=True)
+        with self._lock:
+            if self._frame is None:
+                self._frame = self._build_frame(self._csv_owners())
+            return self._frame
+
+    def _load_mapping(self, signature) -> bool:
+        """Load the JSON mapping; returns False if an unreadable file left the previous mapping in place"""
+        try:
+            with open(self.mapping_path, 'r') as f:
+                self._mapping = json.load(f)
+            logger.info(f"Loaded {len(self._mapping)} flow mappings from {self.mapping_path}")
+        except FileNotFoundError:
+            logger.warning(f"{self.mapping_path} not found, using empty flow mapping")
+            self._mapping = {}
+        except Exception as e:
+            # Keep serving the previous mapping if the file is mid-write or invalid
+            logger.warning(f"Could not load flow mapping, keeping previous version: {e}")
+            if self._loaded:
+                # Not re-parsed until the file changes again
+                self._signature = signature
+                return False
+            self._mapping = {}
+        self._signature = signature
+        self._loaded = True
+        self._frame = None
+        self._sync_csv()
+        return True
+
+    def _csv_owners(self) -> Dict[str, str]:
+        """Owners recorded in the derived CSV, which flow_mapping.json does not carry"""
+        if not self.csv_path or _file_signature(self.csv_path) is None:
+            return {}
+        try:
+            existing = pd.read_csv(self.csv_path)
+            if {'FlowName', 'Owner'} <= set(existing.columns):
+                return dict(zip(existing['FlowName'].str.lower(), existing['Owner']))
+        except Exception as e:
+            logger.warning(f"Could not read owners from {self.csv_path}: {e}")
+        return {}
+
+    def _build_frame(self, owners: Dict[str, str]) -> pd.DataFrame:
+        rows = []
+        for flow_name, info in self._mapping.items():
+            key = flow_name.lower()
+            rows.append({
+                'FlowName': key,
+                'Project': info.get('project'),
+                'Owner': info.get('owner') or owners.get(key, 'Unassigned'),
+                'Type': info.get('type'),
+                'UOW_Type': info.get('uow_type')
+            })
+        return pd.DataFrame(rows, columns=MAPPING_COLUMNS)
+
+    def _sync_csv(self) -> None:
+        """Rewrite the derived CSV when the JSON is newer, keeping owners only recorded in the CSV"""
+        if not self.csv_path or not self._mapping:
+            return
+        csv_signature = _file_signature(self.csv_path)
+        if csv_signature is not None and self._signature is not None and csv_signature[0] >= self._signature[0]:
+            return
+        try:
+            self._frame = self._build_frame(self._csv_owners())
+            tmp_path = f"{self.csv_path}.tmp"
+            self._frame.to_csv(tmp_path, index=False)
+            os.replace(tmp_path, self.csv_path)
+            logger.info(f"Refreshed {self.csv_path} from {self.mapping_path}")
+        except Exception as e:
+            logger.warning(f"Could not refresh {self.csv_path}: {e}")
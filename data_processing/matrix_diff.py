@@ -0,0 +1,236 @@
+"""
+Day-over-day diff module for Bot Monitoring Dashboard
+Compares the compact status grids of two days cell by cell
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger('matrix_diff')
+
+NO_RUN = "No Run"
+
+# Statuses counted as a failure when classifying changes
+FAILED_STATUSES = frozenset(["Failed", "Error", "TimedOut"])
+
+# Change of a (bot, hour) cell from the previous day, by code; earlier kinds take precedence
+CHANGE_KINDS = ('unchanged', 'new_failure', 'missing', 'recovered', 'new_run', 'changed')
+UNCHANGED, NEW_FAILURE, MISSING, RECOVERED, NEW_RUN, CHANGED = range(len(CHANGE_KINDS))
+
+def _code_dtype(count: int) -> np.dtype:
+    return np.uint8 if count <= np.iinfo(np.uint8).max else np.uint16
+
+class StatusGrid:
+    """
+    Compact status array of one day.
+
+    ``codes[i, j]`` is the status of bot ``names[i]`` in hour ``hours[j]`` as
+    an index into ``statuses`` (code 0 is always "No Run"). Bots are sorted by
+    display_name, so two grids can be aligned with a merge of their names.
+    The cell statuses are the ones the hourly matrix shows: the highest
+    priority status of the cell's runs, the first such run on ties.
+    """
+
+    __slots__ = ('names', 'hours', 'codes', 'statuses')
+
+    def __init__(self, names: np.ndarray, hours: List[int], codes: np.ndarray, statuses: Tuple[str, ...]):
+        self.names = names
+        self.hours = list(hours)
+        self.codes = codes
+        self.statuses = statuses
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.codes.nbytes)
+
+    @classmethod
+    def empty(cls, hours: Iterable[int] = range(24)) -> 'StatusGrid':
+        hours = list(hours)
+        return cls(np.empty(0, dtype=object), hours, np.zeros((0, len(hours)), dtype=np.uint8), (NO_RUN,))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, status_priority: Dict[str, int],
+                   hours: Iterable[int] = range(24)) -> 'StatusGrid':
+        """
+        Reduce processed rows to one status code per (bot, hour).
+
+        Args:
+            df: Processed rows with display_name, hour and taskstatus (filters already applied)
+            status_priority: Priority per status; the highest priority status of a cell wins
+            hours: Hour columns of the grid
+
+        Returns:
+            StatusGrid: Grid of every bot with at least one run in ``df``
+        """
+        hours = list(hours)
+        if df is None or df.empty:
+            return cls.empty(hours)
+        name_codes, names = pd.factorize(df['display_name'], sort=True)
+        status_codes, uniques = pd.factorize(df['taskstatus'])
+        hour = pd.to_numeric(df['hour'], errors='coerce').to_numpy(dtype=float)
+
+        column = np.full(24, -1, dtype=np.int64)
+        column[hours] = np.arange(len(hours))
+        valid = (name_codes >= 0) & (status_codes >= 0) & (hour >= 0) & (hour <= 23)
+        rows = np.flatnonzero(valid)
+        columns = column[hour[rows].astype(np.int64)]
+        rows = rows[columns >= 0]
+        columns = columns[columns >= 0]
+
+        # Status table with "No Run" first; factorized codes are remapped onto it
+        statuses = (NO_RUN,) + tuple(status for status in uniques if status != NO_RUN)
+        table_code = np.array([statuses.index(status) for status in uniques], dtype=np.int64)
+        priority = np.array([status_priority.get(status, 0) for status in uniques], dtype=np.int64)
+
+        cells = name_codes[rows] * len(hours) + columns
+        run_status = status_codes[rows]
+        # Stable sort: by cell, highest priority first, ties in row order (as max() in the matrix)
+        order = np.lexsort((-priority[run_status], cells))
+        cells, run_status = cells[order], run_status[order]
+        first = np.ones(len(cells), dtype=bool)
+        first[1:] = cells[1:] != cells[:-1]
+
+        codes = np.zeros(len(names) * len(hours), dtype=_code_dtype(len(statuses)))
+        codes[cells[first]] = table_code[run_status[first]]
+        return cls(np.asarray(names, dtype=object), hours, codes.reshape(len(names), len(hours)), statuses)
+
+    def align(self, names: np.ndarray, statuses: Tuple[str, ...]) -> np.ndarray:
+        """
+        Codes of this grid on the rows of ``names`` and the codes of ``statuses``.
+
+        Args:
+            names: Sorted display names containing all of this grid's bots
+            statuses: Status table starting with this grid's ``statuses``
+
+        Returns:
+            numpy.ndarray: Codes per (name, hour); bots missing from this grid are "No Run"
+        """
+        codes = np.zeros((len(names), len(self.hours)), dtype=_code_dtype(len(statuses)))
+        if len(self.names):
+            codes[np.searchsorted(names, self.names)] = self.codes
+        return codes
+
+class DayDiff:
+    """Cell-by-cell comparison of the status grids of two days, aligned on display_name"""
+
+    __slots__ = ('names', 'hours', 'statuses', 'current', 'previous', 'kinds')
+
+    def __init__(self, names: np.ndarray, hours: List[int], statuses: Tuple[str, ...],
+                 current: np.ndarray, previous: np.ndarray, kinds: np.ndarray):
+        self.names = names
+        self.hours = hours
+        self.statuses = statuses
+        self.current = current
+        self.previous = previous
+        # CHANGE_KINDS code per (name, hour)
+        self.kinds = kinds
+
+    def counts(self) -> Dict[str, int]:
+        """Number of cells per change kind, unchanged cells excluded"""
+        counts = np.bincount(self.kinds.ravel(), minlength=len(CHANGE_KINDS))
+        return {kind: int(counts[code]) for code, kind in enumerate(CHANGE_KINDS) if code != UNCHANGED}
+
+    def changed_names(self, max_rows: Optional[int] = None) -> List[str]:
+        """
+        Bots with at least one changed cell, most new failures first, then most changes, then by name.
+        """
+        changes = (self.kinds != UNCHANGED).sum(axis=1)
+        rows = np.flatnonzero(changes)
+        new_failures = (self.kinds[rows] == NEW_FAILURE).sum(axis=1)
+        order = np.lexsort((self.names[rows], -changes[rows], -new_failures))
+        rows = rows[order[:max_rows] if max_rows is not None else order]
+        return self.names[rows].tolist()
+
+    def matrices(self, names: List[str]) -> Tuple[Dict[str, Dict[int, str]], Dict[str, Dict[int, str]]]:
+        """
+        Statuses of the given bots on both days, in the {display_name: {hour: status}} form of the matrix.
+
+        Returns:
+            tuple: (previous day, current day)
+        """
+        rows = np.searchsorted(self.names, names)
+        statuses = np.asarray(self.statuses, dtype=object)
+
+        def as_matrix(codes):
+            return {name: dict(zip(self.hours, statuses[codes[row]].tolist())) for name, row in zip(names, rows)}
+
+        return as_matrix(self.previous), as_matrix(self.current)
+
+    def cell_kinds(self, names: List[str]) -> np.ndarray:
+        """CHANGE_KINDS codes of the given bots, one row per name"""
+        return self.kinds[np.searchsorted(self.names, names)]
+
+    def to_frame(self) -> pd.DataFrame:
+        """Changed cells as rows: display_name, hour, previous_status, current_status and change"""
+        rows, columns = np.nonzero(self.kinds)
+        statuses = np.asarray(self.statuses, dtype=object)
+        kinds = np.asarray(CHANGE_KINDS, dtype=object)
+        return pd.DataFrame({
+            'display_name': self.names[rows],
+            'hour': np.asarray(self.hours, dtype=np.int64)[columns],
+            'previous_status': statuses[self.previous[rows, columns]],
+            'current_status': statuses[self.current[rows, columns]],
+            'change': kinds[self.kinds[rows, columns]]
+        })
+
+    def to_csv(self) -> str:
+        """Changed cells as CSV (see to_frame)"""
+        return self.to_frame().to_csv(index=False)
+
+def diff_status_grids(
+    current: StatusGrid,
+    previous: StatusGrid,
+    through_hour: Optional[int] = None,
+    failed_statuses: frozenset = FAILED_STATUSES
+) -> DayDiff:
+    """
+    Compare two days cell by cell.
+
+    Both grids are aligned on the union of their bots (a bot missing from a
+    day has no runs that day) and on a shared status table, then every cell
+    is classified with vectorized comparisons of the two code arrays.
+
+    Args:
+        current: Grid of the day being viewed
+        previous: Grid of the day it is compared with
+        through_hour: Last hour that has happened on the current day (None when the day is over);
+            later hours are not compared, so runs yet to come don't count as missing
+        failed_statuses: Statuses counted as a failure
+
+    Returns:
+        DayDiff: Both grids on the union of bots with a change kind per cell
+    """
+    if current.hours != previous.hours:
+        raise ValueError(f"Cannot compare grids with different hours: {current.hours} and {previous.hours}")
+    names = np.union1d(current.names, previous.names).astype(object)
+    statuses = current.statuses + tuple(status for status in previous.statuses if status not in current.statuses)
+    remap = np.array([statuses.index(status) for status in previous.statuses], dtype=np.int64)
+
+    now = current.align(names, statuses)
+    before = previous.align(names, previous.statuses)
+    before = remap[before].astype(now.dtype)
+
+    failed = np.array([status in failed_statuses for status in statuses])
+    ran_now, ran_before = now != 0, before != 0
+    failed_now, failed_before = failed[now], failed[before]
+
+    kinds = np.full(now.shape, CHANGED, dtype=np.int8)
+    kinds[now == before] = UNCHANGED
+    # Assigned from the lowest precedence up so that earlier CHANGE_KINDS win
+    changed = kinds != UNCHANGED
+    kinds[changed & ~ran_before & ran_now] = NEW_RUN
+    kinds[changed & failed_before & ran_now & ~failed_now] = RECOVERED
+    kinds[changed & ran_before & ~ran_now] = MISSING
+    kinds[changed & failed_now & ~failed_before] = NEW_FAILURE
+    if through_hour is not None:
+        kinds[:, np.asarray(current.hours) > through_hour] = UNCHANGED
+
+    diff = DayDiff(names, list(current.hours), statuses, now, before, kinds)
+    logger.info(f"Day-over-day diff of {len(names)} bots: {diff.counts()}")
+    return diff
@@ -7,21 +7,23 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import logging
+import os
 import re
-import gc
-import json
+from datetime import date
 from functools import lru_cache
 from typing import Dict, List, Tuple, Optional, Union
-from data_processing.validators import validate_processed_data, validate_matrix_data
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler()
-    ]
+from data_processing.validators import validate_processed_data, validate_matrix_data, RejectedRowsReport
+from data_processing.cache import (
+    PartitionCache, PartitionEntry, PartitionPatch, MatrixCache, fingerprint_rows, combine_fingerprint, DEFAULT_CACHE_BYTES
 )
+from data_processing.mapping_registry import FlowMappingRegistry
+from data_processing.project_names import ProjectNameTable, UNKNOWN_PROJECT
+from data_processing.ranking import BotRanking
+from data_processing.matrix_diff import StatusGrid
+from data_processing.schedule import ScheduleIndex
+from data_processing.flow_rules import FlowRuleEngine, DEFAULT_RULES_PATH
+from metrics import ROWS_PROCESSED, ROWS_REJECTED, register_cache
+
 logger = logging.getLogger('data_processor')
 
 # Constants
@@ -55,6 +57,65 @@ COMMON_IDENTIFIERS = frozenset(["AMZ", "AWS", "C2D", "AZ", "WF", "PS", "VP", "BI
 MATRIX_COLUMNS = {'display_name', 'automation_project', 'taskstatus', 'hour'}
 PROCESS_COLUMNS = {'datetimestarted', 'flowname', 'taskstatus', 'flowowner', 'wassuccessful', 'triggertype'}
 
+# Project assigned to flows that no mapping tier can resolve
+DEFAULT_PROJECT = 'Other Cloud Flow'
+
+# Extracted project names for unmapped flows, persisted across reruns (and to disk if configured)
+PROJECT_NAME_TABLE = ProjectNameTable(os.getenv('PROJECT_NAME_TABLE_PATH') or None)
+
+# Prefix/suffix/glob mapping rules, reloaded by the mapping registry when the rule file changes
+FLOW_RULE_ENGINE = FlowRuleEngine(os.getenv('FLOW_MAPPING_RULES_PATH', DEFAULT_RULES_PATH), auto_reload=False)
+
+# Single in-process copy of flow_mapping.json (plus rules), reloaded only when the files change
+FLOW_MAPPING = FlowMappingRegistry(
+    mapping_path=os.getenv('FLOW_MAPPING_PATH', 'flow_mapping.json'),
+    csv_path='flow_mapping.csv',
+    rule_engine=FLOW_RULE_ENGINE
+)
+
+# Process-wide cache of processed date partitions, shared by all sessions
+PARTITION_CACHE = PartitionCache(
+    max_bytes=int(os.getenv('PARTITION_CACHE_BYTES', DEFAULT_CACHE_BYTES))
+)
+
+# Hourly matrices built from cached partitions, keyed by partition and filters
+MATRIX_CACHE = MatrixCache(max_entries=64)
+
+# (display_name, hour) -> row positions behind each matrix cell, under the same keys as MATRIX_CACHE
+CELL_INDEX_CACHE = MatrixCache(max_entries=64)
+
+# Per-bot ranking counters of each cached matrix, updated incrementally after delta updates
+RANKING_CACHE = MatrixCache(max_entries=64)
+
+# Compact status grids of every bot per partition and filters, compared by the day-over-day diff
+STATUS_GRID_CACHE = MatrixCache(max_entries=64)
+
+def normalize_owner(owner) -> str:
+    """Owner as shown in the dashboard (service account suffix dropped, title case)"""
+    return str(owner).replace(' serviceaccount', '').title()
+
+def _schedule_flow_keys(rows: pd.DataFrame) -> pd.Series:
+    """'owner | flowname' of raw rows, the display name without the (remappable) project"""
+    owner = _map_unique(rows['flowowner'].fillna('Unknown'), normalize_owner)
+    return owner + ' | ' + rows['flowname'].fillna('Unknown').astype(str)
+
+def _schedule_display_key(display_name: str) -> str:
+    owner, _, flow = display_name.partition(' | ')
+    return f"{owner} | {flow.partition(' | ')[2]}"
+
+# Expected run hours of Recurrence flows, inferred from the days before the viewed one
+SCHEDULE_INDEX = ScheduleIndex(
+    _schedule_flow_keys, _schedule_display_key,
+    history_days=int(os.getenv('SCHEDULE_HISTORY_DAYS', '28'))
+)
+
+register_cache('partition', PARTITION_CACHE)
+register_cache('matrix', MATRIX_CACHE)
+register_cache('cell_index', CELL_INDEX_CACHE)
+register_cache('ranking', RANKING_CACHE)
+register_cache('status_grid', STATUS_GRID_CACHE)
+register_cache('schedule', SCHEDULE_INDEX)
+
 @lru_cache(maxsize=1000)
 def extract_project_name(flow_name: str) -> str:
     """
@@ -111,98 +172,685 @@ def extract_project_name(flow_name: str) -> str:
         logger.error(f"Error extracting project from {flow_name}: {e}")
         return 'Unknown'
 
-def process_data_for_dashboard(df):
-    """Process data for dashboard display with enhanced flow mapping"""
+def _map_unique(values: pd.Series, func) -> pd.Series:
+    """Apply a scalar function once per unique value and broadcast the results"""
+    uniques = values.unique()
+    lookup = dict(zip(uniques, (func(v) for v in uniques)))
+    return values.map(lookup)
+
+def map_flow_projects(flow_names: pd.Series, flow_mapping: Dict[str, Dict]) -> pd.Series:
+    """
+    Resolve the automation project of each flow through the mapping tiers.
+    
+    Tiers, in order: exact name in flow_mapping.json, case-insensitive name,
+    prefix/suffix/glob rules (FLOW_RULE_ENGINE), then the project extracted
+    from the flow name (PROJECT_NAME_TABLE). Flows no tier resolves fall back
+    to 'Other Cloud Flow'.
+    
+    Args:
+        flow_names: Flow names to resolve
+        flow_mapping: Parsed flow_mapping.json ({flow_name: {'project': ...}})
+        
+    Returns:
+        pd.Series: Project names aligned with flow_names
+    """
+    exact = {name.strip(): info.get('project') for name, info in flow_mapping.items()}
+    lowered = {name.lower(): project for name, project in exact.items()}
+    
+    def lookup(name):
+        key = str(name).strip()
+        project = exact.get(key)
+        return project if project is not None else lowered.get(key.lower())
+        
+    projects = _map_unique(flow_names, lookup)
+    unmapped = projects.isna()
+    if unmapped.any():
+        projects[unmapped] = FLOW_RULE_ENGINE.resolve(flow_names[unmapped])
+        unmapped = projects.isna()
+    if unmapped.any():
+        extracted = PROJECT_NAME_TABLE.resolve(flow_names[unmapped])
+        projects[unmapped] = extracted.where(extracted != UNKNOWN_PROJECT, DEFAULT_PROJECT)
+    return projects
+
+def _to_numpy_backed(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert pd.ArrowDtype columns to the NumPy dtypes the pipeline is written for.
+    
+    Strings become object, timestamps datetime64 and integers with missing
+    values float64. Frames without Arrow columns are returned unchanged.
+    """
+    arrow_columns = [c for c, dtype in df.dtypes.items() if isinstance(dtype, pd.ArrowDtype)]
+    if not arrow_columns:
+        return df
+    converted = {}
+    for column in arrow_columns:
+        series = df[column]
+        numpy_dtype = series.dtype.numpy_dtype
+        if numpy_dtype.kind in 'iub' and series.hasnans:
+            numpy_dtype = np.dtype('float64') if numpy_dtype.kind != 'b' else np.dtype(object)
+        converted[column] = series.astype(numpy_dtype)
+    return df.assign(**converted)
+
+def prepare_dashboard_data(df: pd.DataFrame) -> Tuple[pd.DataFrame, RejectedRowsReport]:
+    """
+    Validate raw rows and derive dashboard columns in a single pass.
+    
+    Combines the checks of validate_raw_data with the derivations of
+    process_data_for_dashboard. The input is never modified or deep-copied:
+    with copy-on-write enabled, unchanged columns are shared with the input
+    and only derived or normalized columns allocate new memory.
+    
+    Args:
+        df: Raw flow run data from the database or CSV
+        
+    Returns:
+        tuple: (processed_df, report) where report counts the rows that were
+        rejected (e.g. invalid start times) or coerced to a default value
+    """
+    report = RejectedRowsReport(0 if df is None else len(df))
     try:
         if df is None or df.empty:
             logger.warning("Empty dataframe passed to process_data_for_dashboard")
-            return pd.DataFrame()
+            return pd.DataFrame(), report
             
-        # Create a copy to avoid modifying the original
-        processed_df = df.copy()
-        
-        # Load flow mapping
-        try:
-            with open('flow_mapping.json', 'r') as f:
-                flow_mapping = json.load(f)
-            logger.info(f"Loaded {len(flow_mapping)} flow mappings")
-        except Exception as e:
-            logger.warning(f"Could not load flow mapping, using fallback: {e}")
-            flow_mapping = {}
-        
-        # Function to get project name from mapping
-        def get_project_name(flow_name):
-            if pd.isna(flow_name):
-                return 'Other Cloud Flow'
-            flow_key = str(flow_name).strip()
-            return flow_mapping.get(flow_key, {}).get('project', 'Other Cloud Flow')
-        
-        # Apply flow mapping
-        processed_df['automation_project'] = processed_df['flowname'].apply(get_project_name)
-        
-        # Ensure status values match our priority dictionary
-        processed_df['taskstatus'] = processed_df['taskstatus'].map(
-            lambda x: x if x in STATUS_PRIORITY else 'No Run'
-        )
-        
-        # Ensure datetime columns are in proper format
-        processed_df['datetimestarted'] = pd.to_datetime(processed_df['datetimestarted'])
-        if 'datetimecompleted' in processed_df.columns:
-            processed_df['datetimecompleted'] = pd.to_datetime(processed_df['datetimecompleted'])
+        missing_columns = {'flowname', 'flowowner', 'datetimestarted', 'taskstatus'} - set(df.columns)
+        if missing_columns:
+            logger.error(f"Missing required columns for processing: {missing_columns}")
+            report.reject('missing_columns', len(df))
+            return pd.DataFrame(), report
+            
+        # Arrow-backed input (memory-mapped snapshots) is materialized for this partition only
+        df = _to_numpy_backed(df)
+            
+        # Reject rows whose start time cannot be parsed
+        started = pd.to_datetime(df['datetimestarted'], errors='coerce')
+        valid = started.notna()
+        if not valid.all():
+            report.reject('invalid_datetimestarted', (~valid).sum())
+            logger.warning(f"Rejected {report.rejected['invalid_datetimestarted']} rows with invalid dates")
+            processed_df = df[valid]
+            started = started[valid]
+        else:
+            processed_df = df.copy(deep=False)
+        processed_df['datetimestarted'] = started
         
-        # Add duration if both start and end times exist
         if 'datetimecompleted' in processed_df.columns:
-            pass  # Placeholder for duration calculation
-        
-        # Add derived columns
-        processed_df['hour'] = pd.to_datetime(processed_df['datetimestarted']).dt.hour
-        processed_df['owner'] = processed_df['flowowner'].str.replace(' serviceaccount', '').str.title()
+            processed_df['datetimecompleted'] = pd.to_datetime(processed_df['datetimecompleted'], errors='coerce')
+            
+        # Normalize missing values, counting each coercion
+        flowname = processed_df['flowname']
+        missing = flowname.isna()
+        if missing.any():
+            report.coerce('missing_flowname', missing.sum())
+            processed_df['flowname'] = flowname = flowname.fillna('Unknown')
+            
+        flowowner = processed_df['flowowner']
+        missing = flowowner.isna()
+        if missing.any():
+            report.coerce('missing_flowowner', missing.sum())
+            processed_df['flowowner'] = flowowner = flowowner.fillna('Unknown')
             
-        # Create display name for matrix - combining owner, project and flow
-        processed_df['display_name'] = processed_df.apply(
-            lambda row: f"{row['owner']} | {row['automation_project']} | {row['flowname']}", 
-            axis=1
-        )
-        
-        # Add trigger type grouping
         if 'triggertype' in processed_df.columns:
-            conditions = [
-                processed_df['triggertype'] == 'manual',
-                processed_df['triggertype'] == 'Recurrence'
-            ]
-            choices = ['Manual', 'Recurrence']
-            processed_df['trigger_group'] = np.select(conditions, choices, default='OtherTrigger')
-        
-        # Ensure boolean columns are properly typed
+            missing = processed_df['triggertype'].isna()
+            if missing.any():
+                report.coerce('missing_triggertype', missing.sum())
+                processed_df['triggertype'] = processed_df['triggertype'].fillna('unknown')
+        else:
+            processed_df['triggertype'] = 'unknown'
+            
+        # Ensure status values match our priority dictionary
+        taskstatus = processed_df['taskstatus']
+        known = taskstatus.isin(STATUS_PRIORITY.keys())
+        if not known.all():
+            report.coerce('unknown_taskstatus', (~known).sum())
+            taskstatus = taskstatus.where(known, 'No Run')
+            processed_df['taskstatus'] = taskstatus
+            
+        # Ensure success flag exists and is numeric
         if 'wassuccessful' in processed_df.columns:
             processed_df['wassuccessful'] = pd.to_numeric(processed_df['wassuccessful'], errors='coerce').fillna(0)
+        else:
+            processed_df['wassuccessful'] = taskstatus.str.lower().isin(['succeeded', 'completed']).astype(int)
             
-        # Calculate success rate
+        # Derived string columns are computed once per unique value
+        processed_df['automation_project'] = map_flow_projects(flowname, FLOW_MAPPING.mapping)
+        processed_df['hour'] = started.dt.hour
+        processed_df['owner'] = _map_unique(flowowner, normalize_owner)
+        
+        # Create display name for matrix - combining owner, project and flow
+        processed_df['display_name'] = (
+            processed_df['owner'] + ' | ' +
+            processed_df['automation_project'] + ' | ' +
+            flowname.astype(str)
+        )
+        
+        # Add trigger type grouping
+        conditions = [
+            processed_df['triggertype'] == 'manual',
+            processed_df['triggertype'] == 'Recurrence'
+        ]
+        choices = ['Manual', 'Recurrence']
+        processed_df['trigger_group'] = np.select(conditions, choices, default='OtherTrigger')
+        
         # Calculate success rate
         processed_df['success_rate'] = processed_df['wassuccessful'] * 100
         
         # Add status priority for sorting
-        processed_df['status_priority'] = processed_df['taskstatus'].map(STATUS_PRIORITY).fillna(0)
+        processed_df['status_priority'] = taskstatus.map(STATUS_PRIORITY).fillna(0)
         
         # Log processing results
-        logger.info(f"Processed {len(processed_df)} records")
+        logger.info(f"Processed {len(processed_df)} records ({report.rejected_count} rejected)")
+        ROWS_PROCESSED.inc(report.total_rows)
+        for reason, count in report.rejected.items():
+            ROWS_REJECTED.labels(reason).inc(count)
         logger.info(f"Unique projects: {processed_df['automation_project'].nunique()}")
         logger.info(f"Unique display names: {processed_df['display_name'].unique().size} bots")
+        if report.rejected or report.coerced:
+            logger.info(f"Validation report: {report.to_dict()}")
+            
+        return processed_df, report
+    except Exception as e:
+        logger.error(f"Error in process_data_for_dashboard: {e}")
+        return pd.DataFrame(), report
+
+def process_data_for_dashboard(df):
+    """Process data for dashboard display with enhanced flow mapping"""
+    processed_df, _ = prepare_dashboard_data(df)
+    return processed_df
+
+def has_open_runs(df: pd.DataFrame) -> bool:
+    """
+    True if any run is still Running without a completion time.
+    
+    Such runs are updated in place by the open-run refresh when they finish,
+    which leaves the day's row count unchanged.
+    """
+    if df is None or df.empty or 'taskstatus' not in df.columns:
+        return False
+    open_runs = df['taskstatus'] == 'Running'
+    if 'datetimecompleted' in df.columns:
+        open_runs = open_runs & df['datetimecompleted'].isna()
+    return bool(open_runs.any())
+
+def process_partition(df: pd.DataFrame, partition_date: date, cache: Optional[PartitionCache] = None) -> pd.DataFrame:
+    """
+    Process one date partition, reusing cached output where possible.
+    
+    The processed frame is memoized per partition and keyed by a content
+    fingerprint of the partition's raw rows. When the raw rows differ from the
+    cached ones only by new runs and by new versions of cached runs (same
+    flowguid, e.g. a Running run that completed), only those rows are
+    processed: replaced runs are dropped and the delta is appended. Days
+    before today without open runs are treated as immutable: once cached they
+    are served without re-fingerprinting as long as their row count is
+    unchanged. A day with a run still Running (e.g. one started before
+    midnight) is re-fingerprinted, as that run completes in place.
+    
+    Args:
+        df: Raw rows for a single date (output of the date filter)
+        partition_date: Date the rows belong to, used as the cache key
+        cache: Cache to use (defaults to the process-wide PARTITION_CACHE)
+        
+    Returns:
+        pd.DataFrame: Processed data with a fresh RangeIndex. Callers receive a
+        shallow copy, so adding or replacing columns does not alter the cache.
+    """
+    cache = PARTITION_CACHE if cache is None else cache
+    try:
+        if df is None or df.empty:
+            return process_data_for_dashboard(df)
+            
+        immutable = partition_date < date.today() and not has_open_runs(df)
+        entry = cache.get(partition_date)
+        
+        # Historical partitions are not re-hashed unless rows were added or removed
+        if entry is not None and entry.immutable and entry.row_count == len(df):
+            cache.hits += 1
+            logger.info(f"Partition cache hit for {partition_date} (immutable)")
+            return entry.frame.copy(deep=False)
+            
+        row_hashes = fingerprint_rows(df)
+        fingerprint = combine_fingerprint(row_hashes)
         
-        # Cleanup to free memory
-        gc.collect()
+        if entry is not None and entry.fingerprint == fingerprint:
+            cache.hits += 1
+            logger.info(f"Partition cache hit for {partition_date}")
+            return entry.frame.copy(deep=False)
+            
+        cache.misses += 1
+        processed_df = None
+        
+        # Delta path: cached rows are unchanged apart from runs replaced by a newer version
+        patch = None
+        if entry is not None:
+            is_new = ~np.isin(row_hashes, entry.row_hashes)
+            is_gone = ~np.isin(entry.row_hashes, row_hashes)
+            new_count, gone_count = int(is_new.sum()), int(is_gone.sum())
+            delta_raw = df[is_new]
+            replaced = (entry.frame['flowguid'].isin(delta_raw['flowguid'].dropna())
+                        if gone_count and 'flowguid' in delta_raw.columns else np.zeros(len(entry.frame), dtype=bool))
+            if new_count and entry.row_count - gone_count + new_count == len(df) and int(replaced.sum()) == gone_count:
+                delta_df, delta_report = prepare_dashboard_data(delta_raw)
+                if not delta_df.empty:
+                    processed_df = pd.concat([entry.frame[~replaced], delta_df], ignore_index=True)
+                    row_hashes = np.concatenate([entry.row_hashes[~is_gone], row_hashes[is_new]])
+                    report = entry.report.merge(delta_report) if entry.report is not None else delta_report
+                    report.total_rows -= gone_count
+                    removed = entry.frame[replaced]
+                    touched = frozenset(removed['display_name']) | frozenset(delta_df['display_name'])
+                    patch = PartitionPatch(entry.fingerprint, len(entry.frame), touched, removed, delta_df)
+                    cache.delta_updates += 1
+                    logger.info(f"Patched cached partition {partition_date}: {gone_count} runs replaced, "
+                                f"{new_count - gone_count} added")
+                    
+        if processed_df is None:
+            processed_df, report = prepare_dashboard_data(df)
+            if processed_df.empty:
+                return processed_df
+            processed_df = processed_df.reset_index(drop=True)
+            
+        cache.put(partition_date, PartitionEntry(fingerprint, row_hashes, processed_df, immutable=immutable,
+                                                 report=report, patch=patch))
+        logger.info(f"Partition cache stats: {cache.stats()}")
+        return processed_df.copy(deep=False)
         
-        logger.info(f"Data processing completed with {len(processed_df)} records")
-        return processed_df
     except Exception as e:
-        logger.error(f"Error in process_data_for_dashboard: {e}")
-        return pd.DataFrame()
+        logger.error(f"Error in process_partition for {partition_date}: {e}")
+        return process_data_for_dashboard(df)
+
+def _invalidate_remapped_partitions(version: int) -> None:
+    """
+    Drop cached partitions (and their matrices) containing a flow whose project changed.
+    
+    Registered as a FlowMappingRegistry listener. Each cached partition's
+    distinct (flowname, automation_project) pairs are re-resolved against the
+    new mapping; partitions where every flow keeps its project stay cached.
+    """
+    invalidated = 0
+    for key in PARTITION_CACHE.keys():
+        entry = PARTITION_CACHE.get(key)
+        if entry is None or entry.frame.empty:
+            continue
+        pairs = entry.frame[['flowname', 'automation_project']].drop_duplicates()
+        remapped = map_flow_projects(pairs['flowname'], FLOW_MAPPING.mapping)
+        if (remapped.to_numpy() != pairs['automation_project'].to_numpy()).any():
+            PARTITION_CACHE.invalidate(key)
+            MATRIX_CACHE.invalidate_partition(key)
+            CELL_INDEX_CACHE.invalidate_partition(key)
+            RANKING_CACHE.invalidate_partition(key)
+            STATUS_GRID_CACHE.invalidate_partition(key)
+            invalidated += 1
+    logger.info(f"Flow mapping version {version}: invalidated {invalidated} of {len(PARTITION_CACHE) + invalidated} cached partitions")
+
+FLOW_MAPPING.add_listener(_invalidate_remapped_partitions)
+
+def refresh_flow_mapping() -> bool:
+    """
+    Reload the flow mapping and rules if either file changed on disk.
+    
+    Call once per rerun. Only cached partitions and matrices whose flows
+    changed project are invalidated.
+    
+    Returns:
+        bool: True if a new mapping version was loaded
+    """
+    return FLOW_MAPPING.refresh()
+
+def mark_missed_runs(
+    history: pd.DataFrame,
+    bot_hour_status: Dict[str, Dict[int, str]],
+    display_names: List[str],
+    partition_date: date,
+    current_hour: Optional[int] = None
+) -> Dict[str, Dict[int, str]]:
+    """
+    Mark "No Run" cells where a Recurrence flow was expected to run as "Missed".
+    
+    The schedule index is refreshed from ``history`` first; only days whose
+    rows changed (or that entered the history window) are recounted.
+    
+    Args:
+        history: Raw run history (all loaded days)
+        bot_hour_status: Matrix statuses, {display_name: {hour: status}} (not modified)
+        display_names: Bots shown in the matrix
+        partition_date: Day of the matrix
+        current_hour: Hour in progress on ``partition_date`` (None for past days)
+        
+    Returns:
+        dict: Matrix statuses with missed cells marked
+    """
+    try:
+        return SCHEDULE_INDEX.mark_missed_for(history, bot_hour_status, display_names, partition_date, current_hour)
+    except Exception as e:
+        logger.error(f"Error marking missed scheduled runs for {partition_date}: {e}")
+        return bot_hour_status
+
+def find_silent_flows(
+    history: pd.DataFrame,
+    display_names: List[str],
+    partition_date: date,
+    current_hour: Optional[int] = None
+) -> Dict[str, List[int]]:
+    """
+    Recurrence flows expected to have run by now on ``partition_date`` but without any run that day.
+    
+    Args:
+        history: Raw run history (all loaded days)
+        display_names: Display names of every bot with a run on ``partition_date``
+        partition_date: Day of the matrix
+        current_hour: Hour in progress on ``partition_date`` (None for past days)
+        
+    Returns:
+        dict: 'owner | flowname' -> expected hours (see ScheduleIndex.silent_flows)
+    """
+    try:
+        return SCHEDULE_INDEX.silent_flows_for(history, display_names, partition_date, current_hour)
+    except Exception as e:
+        logger.error(f"Error finding silent scheduled flows for {partition_date}: {e}")
+        return {}
+
+def get_rejection_report(partition_date: date, cache: Optional[PartitionCache] = None) -> Optional[RejectedRowsReport]:
+    """
+    Return the validation report for a processed partition.
+    
+    Args:
+        partition_date: Date of the partition processed by process_partition
+        cache: Cache to look in (defaults to the process-wide PARTITION_CACHE)
+        
+    Returns:
+        RejectedRowsReport or None if the partition is not cached
+    """
+    entry = (PARTITION_CACHE if cache is None else cache).get(partition_date)
+    return entry.report if entry is not None else None
+
+def get_hourly_matrix(
+    df: pd.DataFrame,
+    partition_date: date,
+    selected_project: str = 'All Projects',
+    selected_status: str = 'All Statuses',
+    selected_owner: str = 'All Owners',
+    max_rows: int = 300
+) -> Tuple[Dict[str, Dict[int, str]], List[str], List[int]]:
+    """
+    Memoized create_hourly_matrix for data from a cached partition.
+    
+    The matrix is keyed by the partition, its raw fingerprint and the filter
+    selection, so reruns with unchanged data and filters skip the groupbys.
+    After a delta update of the partition (see process_partition), the matrix
+    cached for the previous version is patched: the bot ranking is updated
+    with the replaced and added runs only (see BotRanking.updated) and only the
+    rows of bots whose runs changed are recomputed. The cell index of the
+    matrix (see build_cell_index) is built and cached with it.
+    
+    Args:
+        df (pd.DataFrame): Processed data of the partition with all filters applied
+        partition_date (date): Partition the data was processed from
+        selected_project (str): Project filter (or 'All Projects')
+        selected_status (str): Status filter (or 'All Statuses')
+        selected_owner (str): Owner filter (or 'All Owners'), part of the cache key only
+        max_rows (int): Maximum number of rows to display
+    
+    Returns:
+        tuple: Same as create_hourly_matrix
+    """
+    entry = PARTITION_CACHE.get(partition_date)
+    if entry is None:
+        return create_hourly_matrix(df, selected_project, selected_status, max_rows)
+        
+    filters = (selected_project, selected_status, selected_owner, max_rows)
+    key = _matrix_key(partition_date, entry, filters)
+    matrix = MATRIX_CACHE.get(key)
+    if matrix is not None:
+        logger.info(f"Matrix cache hit for {partition_date}")
+        return matrix
+
+    previous, ranking, patch = None, None, entry.patch
+    if patch is not None:
+        previous_key = (partition_date, patch.previous_fingerprint, patch.previous_rows) + filters
+        previous = MATRIX_CACHE.peek(previous_key)
+        previous_ranking = RANKING_CACHE.peek(previous_key)
+        if previous_ranking is not None:
+            ranking = previous_ranking.updated(
+                _filter_delta_rows(patch.removed, selected_project, selected_status, selected_owner),
+                _filter_delta_rows(patch.added, selected_project, selected_status, selected_owner))
+            if ranking is not None:
+                logger.info(f"Updated bot ranking for {partition_date} with {len(patch.removed)} replaced "
+                            f"and {len(patch.added)} added runs")
+    if ranking is None:
+        ranking = BotRanking.from_frame(_filter_matrix_rows(df, selected_project, selected_status))
+    display_names = ranking.top(max_rows)
+    
+    if previous is not None:
+        matrix = patch_hourly_matrix(previous, df, patch.touched, selected_project, selected_status, max_rows,
+                                     display_names=display_names)
+    else:
+        matrix = create_hourly_matrix(df, selected_project, selected_status, max_rows, display_names=display_names)
+    MATRIX_CACHE.put(key, matrix)
+    RANKING_CACHE.put(key, ranking)
+    CELL_INDEX_CACHE.put(key, build_cell_index(df, matrix[1], selected_project, selected_status))
+    return matrix
+
+def _matrix_key(partition_date: date, entry: PartitionEntry, filters: tuple) -> tuple:
+    return (partition_date, entry.fingerprint, len(entry.frame)) + filters
+
+def build_cell_index(
+    df: pd.DataFrame,
+    display_names: List[str],
+    selected_project: str = 'All Projects',
+    selected_status: str = 'All Statuses'
+) -> Dict[Tuple[str, int], np.ndarray]:
+    """
+    Map every (display_name, hour) cell of a matrix to the positions of its runs in ``df``.
+    
+    Args:
+        df (pd.DataFrame): Frame the matrix was built from
+        display_names (List[str]): Bots shown in the matrix
+        selected_project (str): Project filter of the matrix (or 'All Projects')
+        selected_status (str): Status filter of the matrix (or 'All Statuses')
+    
+    Returns:
+        dict: (display_name, hour) -> sorted row positions, for cells with at least one run
+    """
+    try:
+        if df is None or df.empty or not display_names or 'hour' not in df.columns:
+            return {}
+        mask = df['display_name'].isin(display_names).to_numpy()
+        if selected_project != 'All Projects':
+            mask = mask & (df['automation_project'] == selected_project).to_numpy()
+        if selected_status != 'All Statuses':
+            mask = mask & (df['taskstatus'] == selected_status).to_numpy()
+        positions = np.flatnonzero(mask)
+        if not len(positions):
+            return {}
+        cells = df.iloc[positions].groupby(['display_name', 'hour'], sort=False).indices
+        return {(name, int(hour)): positions[rows] for (name, hour), rows in cells.items()}
+    except Exception as e:
+        logger.error(f"Error building matrix cell index: {e}")
+        return {}
+
+def get_cell_index(
+    df: pd.DataFrame,
+    partition_date: date,
+    display_names: List[str],
+    selected_project: str = 'All Projects',
+    selected_status: str = 'All Statuses',
+    selected_owner: str = 'All Owners',
+    max_rows: int = 300
+) -> Dict[Tuple[str, int], np.ndarray]:
+    """
+    Cell index of the matrix for ``df``, as cached by get_hourly_matrix.
+    
+    Matrices from the SQL engines have no index yet; it is built from ``df``
+    on the first drill-down and cached under the matrix key.
+    
+    Args:
+        df (pd.DataFrame): Frame passed to get_hourly_matrix (partition data with all filters applied)
+        partition_date (date): Partition the data was processed from
+        display_names (List[str]): Bots shown in the matrix
+        selected_project, selected_status, selected_owner, max_rows: Filters of the matrix
+    
+    Returns:
+        dict: Same as build_cell_index
+    """
+    entry = PARTITION_CACHE.get(partition_date)
+    if entry is None:
+        return build_cell_index(df, display_names, selected_project, selected_status)
+    key = _matrix_key(partition_date, entry, (selected_project, selected_status, selected_owner, max_rows))
+    index = CELL_INDEX_CACHE.get(key)
+    if index is None:
+        index = build_cell_index(df, display_names, selected_project, selected_status)
+        CELL_INDEX_CACHE.put(key, index)
+    return index
+
+def cell_positions(cell_index: Dict[Tuple[str, int], np.ndarray], display_name: str, hours: List[int]) -> np.ndarray:
+    """Row positions of one bot's runs in the given hours, read from the cell index without scanning the frame"""
+    parts = [cell_index[(display_name, hour)] for hour in hours if (display_name, hour) in cell_index]
+    if not parts:
+        return np.empty(0, dtype=np.intp)
+    return np.sort(np.concatenate(parts)) if len(parts) > 1 else parts[0]
+
+def get_status_grid(
+    df: pd.DataFrame,
+    partition_date: date,
+    selected_project: str = 'All Projects',
+    selected_status: str = 'All Statuses',
+    selected_owner: str = 'All Owners'
+) -> StatusGrid:
+    """
+    Compact status grid of every bot of a partition, memoized like the matrix.
+    
+    Unlike the matrix the grid is not limited to the top ranked bots, so two
+    days can be compared on all of their bots (see diff_status_grids). The
+    filters are applied here, only when the grid is not cached.
+    
+    Args:
+        df (pd.DataFrame): Processed data of the partition (filtered or not)
+        partition_date (date): Partition the data was processed from
+        selected_project (str): Project filter (or 'All Projects')
+        selected_status (str): Status filter (or 'All Statuses')
+        selected_owner (str): Owner filter (or 'All Owners')
+    
+    Returns:
+        StatusGrid: Status code per (bot, hour)
+    """
+    entry = PARTITION_CACHE.get(partition_date)
+    key = None
+    if entry is not None:
+        key = _matrix_key(partition_date, entry, (selected_project, selected_status, selected_owner, None))
+        grid = STATUS_GRID_CACHE.get(key)
+        if grid is not None:
+            return grid
+    try:
+        if df is None or df.empty or 'hour' not in df.columns:
+            return StatusGrid.empty()
+        grid = StatusGrid.from_frame(
+            _filter_delta_rows(df, selected_project, selected_status, selected_owner), STATUS_PRIORITY)
+    except Exception as e:
+        logger.error(f"Error building status grid for {partition_date}: {e}")
+        return StatusGrid.empty()
+    if key is not None:
+        STATUS_GRID_CACHE.put(key, grid)
+    logger.info(f"Status grid for {partition_date}: {len(grid)} bots, {grid.nbytes} bytes")
+    return grid
+
+def _filter_matrix_rows(df: pd.DataFrame, selected_project: str, selected_status: str) -> pd.DataFrame:
+    """Apply the project and status filters used by the matrix"""
+    mask = pd.Series(True, index=df.index)
+    orig_count = len(df)
+    
+    if selected_project != 'All Projects':
+        mask &= (df['automation_project'] == selected_project)
+        logger.info(f"Project filter applied: {selected_project}")
+        
+    if selected_status != 'All Statuses':
+        mask &= (df['taskstatus'] == selected_status)
+        logger.info(f"Status filter applied: {selected_status}")
+    
+    filtered_df = df[mask]
+    logger.info(f"Filtered from {orig_count} to {len(filtered_df)} records")
+    return filtered_df
+
+def _filter_delta_rows(rows: pd.DataFrame, selected_project: str, selected_status: str, selected_owner: str) -> pd.DataFrame:
+    """Apply the dashboard's project, status and owner filters to the rows of a partition delta"""
+    if selected_owner != 'All Owners' and not rows.empty:
+        rows = rows[rows['owner'] == selected_owner]
+    return _filter_matrix_rows(rows, selected_project, selected_status)
+
+def _fill_status_cells(bot_hour_status: Dict[str, Dict[int, str]], filtered_df: pd.DataFrame, display_names: List[str]) -> None:
+    """Set each (bot, hour) cell of the given bots to its highest priority status"""
+    status_data = (filtered_df[filtered_df['display_name'].isin(display_names)]
+        .groupby(['display_name', 'hour'])['taskstatus']
+        .agg(lambda x: max(x, key=lambda s: STATUS_PRIORITY.get(s, 0)))
+        .to_dict())
+        
+    for (name, hour), status in status_data.items():
+        if name in bot_hour_status and 0 <= hour <= 23:
+            bot_hour_status[name][hour] = status
+
+def patch_hourly_matrix(
+    previous: Tuple[Dict[str, Dict[int, str]], List[str], List[int]],
+    df: pd.DataFrame,
+    touched: frozenset,
+    selected_project: str = 'All Projects',
+    selected_status: str = 'All Statuses',
+    max_rows: int = 300,
+    display_names: Optional[List[str]] = None
+) -> Tuple[Dict[str, Dict[int, str]], List[str], List[int]]:
+    """
+    Update a matrix after some runs changed instead of rebuilding it.
+    
+    The bots are re-ranked (a status change can move a bot), but status cells
+    are recomputed only for bots in ``touched`` and bots that were not in the
+    previous matrix; every other row is copied from ``previous``.
+    
+    Args:
+        previous: Matrix built by create_hourly_matrix before the runs changed
+        df (pd.DataFrame): Processed DataFrame with the changed runs applied
+        touched (frozenset): display_name of every run that was replaced or added
+        selected_project (str): Project filter (or 'All Projects')
+        selected_status (str): Status filter (or 'All Statuses')
+        max_rows (int): Maximum number of rows to display
+        display_names (List[str], optional): Bots to show in rank order, ranked from ``df`` if not given
+    
+    Returns:
+        tuple: Same as create_hourly_matrix
+    """
+    try:
+        previous_status, _, hours = previous
+        if df is None or df.empty:
+            return {}, [], hours
+        if 'hour' not in df.columns:
+            return create_hourly_matrix(df, selected_project, selected_status, max_rows, display_names)
+        filtered_df = _filter_matrix_rows(df, selected_project, selected_status)
+        if filtered_df.empty:
+            return {}, [], hours
+        
+        if display_names is None:
+            display_names = BotRanking.from_frame(filtered_df).top(max_rows)
+        recompute = [name for name in display_names if name in touched or name not in previous_status]
+        bot_hour_status = {
+            name: {hour: "No Run" for hour in hours} if name in recompute else dict(previous_status[name])
+            for name in display_names
+        }
+        if recompute:
+            _fill_status_cells(bot_hour_status, filtered_df, recompute)
+        logger.info(f"Patched matrix: {len(recompute)} of {len(display_names)} rows recomputed")
+        
+        is_valid, message, validated_data = validate_matrix_data(bot_hour_status, display_names, hours)
+        if is_valid or (validated_data and isinstance(validated_data, tuple) and len(validated_data) == 3):
+            return validated_data
+        return bot_hour_status, display_names, hours
+        
+    except Exception as e:
+        logger.error(f"Error patching hourly matrix, rebuilding: {e}")
+        return create_hourly_matrix(df, selected_project, selected_status, max_rows, display_names)
 
 def create_hourly_matrix(
     df: pd.DataFrame, 
     selected_project: str = 'All Projects', 
     selected_status: str = 'All Statuses', 
-    max_rows: int = 300
+    max_rows: int = 300,
+    display_names: Optional[List[str]] = None
 ) -> Tuple[Dict[str, Dict[int, str]], List[str], List[int]]:
     """
     Create hourly matrix for dashboard display.
@@ -212,6 +860,8 @@ def create_hourly_matrix(
         selected_project (str): Project filter (or 'All Projects')
         selected_status (str): Status filter (or 'All Statuses')
         max_rows (int): Maximum number of rows to display
+        display_names (List[str], optional): Bots to show in rank order (see BotRanking),
+            ranked from ``df`` if not given
     
     Returns:
         tuple: A tuple containing:
@@ -231,8 +881,9 @@ def create_hourly_matrix(
             logger.warning("No data available for matrix creation")
             return {}, [], hours
 
-        # Create hour column if not exists
-        if 'hour' not in df.columns:
+        # Create hour column if not exists (on a shallow copy, leaving the caller's frame untouched)
+        if 'hour' not in df.columns and 'datetimestarted' in df.columns:
+            df = df.copy(deep=False)
             df['hour'] = pd.to_datetime(df['datetimestarted']).dt.hour
 
         # Check required columns
@@ -242,50 +893,22 @@ def create_hourly_matrix(
             logger.error(f"Missing required columns for matrix creation: {missing_columns}")
             return {}, [], hours
             
-        # Apply filters
-        mask = pd.Series(True, index=df.index)
-        orig_count = len(df)
-        
-        if selected_project != 'All Projects':
-            mask &= (df['automation_project'] == selected_project)
-            logger.info(f"Project filter applied: {selected_project}")
-            
-        if selected_status != 'All Statuses':
-            mask &= (df['taskstatus'] == selected_status)
-            logger.info(f"Status filter applied: {selected_status}")
-        
-        filtered_df = df[mask].copy()
-        logger.info(f"Filtered from {orig_count} to {len(filtered_df)} records")
+        filtered_df = _filter_matrix_rows(df, selected_project, selected_status)
         
         # Check if we have data after filtering
         if filtered_df.empty:
             logger.warning("No data after filtering")
             return {}, [], hours
         
-        # Smart selection of display names
-        display_names = (filtered_df.groupby('display_name')
-            .agg({
-                'taskstatus': lambda x: (x == 'Failed').sum() * 100 + 
-                                      (x == 'Running').sum() * 10 + 
-                                      len(x),
-                'datetimestarted': 'max'
-            })
-            .sort_values(['taskstatus', 'datetimestarted'], ascending=[False, False])
-            .head(max_rows)
-            .index.tolist())
+        # Smart selection of display names: most failures, then running runs, then runs
+        if display_names is None:
+            display_names = BotRanking.from_frame(filtered_df).top(max_rows)
 
         # Create matrix dictionary
         bot_hour_status = {name: {hour: "No Run" for hour in hours} for name in display_names}
         
         # Fill matrix efficiently
-        status_data = (filtered_df[filtered_df['display_name'].isin(display_names)]
-            .groupby(['display_name', 'hour'])['taskstatus']
-            .agg(lambda x: max(x, key=lambda s: STATUS_PRIORITY.get(s, 0)))
-            .to_dict())
-            
-        for (name, hour), status in status_data.items():
-            if name in bot_hour_status and 0 <= hour <= 23:
-                bot_hour_status[name][hour] = status
+        _fill_status_cells(bot_hour_status, filtered_df, display_names)
 
         try:
             # Debug logs for matrix data
@@ -0,0 +1,151 @@
+"""
+Project name extraction module for the Bot Monitoring Dashboard
+Contains the batched extractor used as the fallback tier of the flow -> project mapping
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger('project_names')
+
+# Returned when no heuristic matches (same as extract_project_name)
+UNKNOWN_PROJECT = 'Unknown'
+
+# Common project identifiers (same set as processors.COMMON_IDENTIFIERS)
+COMMON_IDENTIFIERS = ("AMZ", "AWS", "C2D", "AZ", "WF", "PS", "VP", "BI")
+
+# First separator-delimited part containing a common identifier
+IDENTIFIER_PART_PATTERN = r'(?i)(?:^|[_\s-])([^_\s-]*(?:' + '|'.join(COMMON_IDENTIFIERS) + r')[^_\s-]*)'
+
+def extract_project_names(flow_names: Iterable) -> pd.Series:
+    """
+    Vectorized equivalent of extract_project_name for a batch of flow names.
+
+    Applies the same six heuristics in the same order (text before ' - ',
+    text before '_', leading CamelCase word, capitalized first word, part
+    containing a common identifier, first alphabetic run), each as one string
+    operation over the whole batch. Where a name contains several common
+    identifiers, the leftmost matching part is returned.
+
+    Args:
+        flow_names: Flow names to extract projects from (duplicates allowed)
+
+    Returns:
+        pd.Series: Extracted project names aligned with the input, 'Unknown'
+        where no heuristic matched
+    """
+    raw = pd.Series(flow_names, dtype=object)
+    is_str = raw.map(lambda v: isinstance(v, str))
+    names = raw.where(is_str, '').astype(object).str.strip()
+    if names.empty:
+        return pd.Series([], dtype=object)
+
+    has_dash = names.str.contains(' - ', regex=False)
+    has_underscore = names.str.contains('_', regex=False)
+    camel = names.str.extract(r'^([A-Z][a-z]+)', expand=False)
+    first_word = names.str.split(n=1).str[0].fillna('')
+    capitalized = (first_word.str.len() > 2) & first_word.str[:1].str.isupper().fillna(False).astype(bool)
+    identifier_part = names.str.extract(IDENTIFIER_PART_PATTERN, expand=False)
+    alpha = names.str.extract(r'([A-Za-z]{3,})', expand=False)
+
+    conditions = [
+        names == '',
+        has_dash,
+        has_underscore,
+        camel.notna(),
+        capitalized,
+        identifier_part.notna(),
+        alpha.notna()
+    ]
+    choices = [
+        UNKNOWN_PROJECT,
+        names.str.split(' - ', n=1).str[0].str.strip(),
+        names.str.split('_', n=1).str[0].str.strip(),
+        camel,
+        first_word,
+        identifier_part,
+        alpha
+    ]
+    result = np.select(conditions, [c.to_numpy(dtype=object) if isinstance(c, pd.Series) else c for c in choices],
+                       default=UNKNOWN_PROJECT)
+    return pd.Series(result, index=raw.index, dtype=object)
+
+class ProjectNameTable:
+    """
+    Unbounded table of extracted project names keyed by flow name.
+
+    Each flow name is run through the extractor once; later snapshots only pay
+    for names the table has not seen. When a path is given the table is loaded
+    from and saved to a JSON file so it survives restarts.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._names: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        if path:
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, flow_name) -> bool:
+        return flow_name in self._names
+
+    def get(self, flow_name, default=None):
+        return self._names.get(flow_name, default)
+
+    def resolve(self, flow_names: pd.Series) -> pd.Series:
+        """
+        Map flow names to extracted project names, extracting unseen names in one batch.
+
+        Args:
+            flow_names: Flow names (typically the unmapped subset of a snapshot)
+
+        Returns:
+            pd.Series: Project names aligned with flow_names
+        """
+        uniques = pd.unique(flow_names)
+        with self._lock:
+            unseen = [name for name in uniques if name not in self._names]
+            if unseen:
+                extracted = extract_project_names(unseen)
+                self._names.update(zip(unseen, extracted.tolist()))
+                logger.info(f"Extracted project names for {len(unseen)} new flows ({len(self._names)} in table)")
+                if self.path:
+                    self._save_locked()
+            lookup = {name: self._names[name] for name in uniques}
+        return flow_names.map(lookup)
+
+    def load(self) -> None:
+        """Load previously extracted names from disk"""
+        try:
+            with open(self.path, 'r') as f:
+                stored = json.load(f)
+            with self._lock:
+                self._names.update(stored)
+            logger.info(f"Loaded {len(stored)} extracted project names from {self.path}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Could not load project name table from {self.path}: {e}")
+
+    def save(self) -> None:
+        """Write the table to disk"""
+        with self._lock:
+            self._save_locked()
+
+    def _save_locked(self) -> None:
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self._names, f, indent=0, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Could not save project name table to {self.path}: {e}")
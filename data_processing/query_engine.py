@@ -0,0 +1,497 @@
+"""
+Query engine module for Bot Monitoring Dashboard
+Runs the dashboard aggregations either with pandas or as SQL queries on an embedded database
+"""
+
+import atexit
+import importlib.util
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from data_processing.cache import fingerprint_rows, combine_fingerprint
+from data_processing.processors import PARTITION_CACHE, FLOW_MAPPING, get_hourly_matrix
+from data_processing.validators import validate_matrix_data
+
+logger = logging.getLogger('query_engine')
+
+# duckdb is imported by the first duckdb store, not when the dashboard starts
+DUCKDB_AVAILABLE = importlib.util.find_spec('duckdb') is not None
+
+# 'compare' runs pandas and the SQL engine side by side and reports any difference
+QUERY_ENGINES = ('pandas', 'sqlite', 'duckdb', 'compare')
+
+# Number of failing flows shown in the issue analysis
+TOP_FAILING_LIMIT = 5
+
+# Columns copied into the run store; everything else stays in the pandas frame
+STORE_COLUMNS = ('display_name', 'automation_project', 'taskstatus', 'owner', 'flowname', 'hour',
+                 'wassuccessful', 'status_priority')
+
+def query_engine_from_env() -> str:
+    """
+    Return the query engine selected by QUERY_ENGINE (pandas, sqlite, duckdb or compare).
+
+    duckdb falls back to sqlite when the duckdb package is not installed.
+    """
+    engine = os.getenv('QUERY_ENGINE', 'pandas').strip().lower() or 'pandas'
+    if engine not in QUERY_ENGINES:
+        logger.warning(f"Unknown QUERY_ENGINE '{engine}', using pandas")
+        return 'pandas'
+    if engine == 'duckdb' and not DUCKDB_AVAILABLE:
+        logger.warning("duckdb not available - using the sqlite query engine")
+        return 'sqlite'
+    return engine
+
+class DashboardAggregates:
+    """Matrix and analytics aggregates for one partition and filter selection"""
+
+    __slots__ = ('matrix', 'project_stats', 'hourly', 'top_failing', 'engine', 'seconds', 'comparison')
+
+    def __init__(self, matrix: Tuple[Dict[str, Dict[int, str]], List[str], List[int]],
+                 project_stats: pd.DataFrame, hourly: pd.DataFrame, top_failing: pd.Series,
+                 engine: str = 'pandas', seconds: float = 0.0):
+        self.matrix = matrix
+        # Indexed by automation_project: runs, success_rate, failure_rate (0-1), unique_flows
+        self.project_stats = project_stats
+        # Indexed by hour: runs, success_rate (0-1)
+        self.hourly = hourly
+        # Failed run count per flowname, highest first
+        self.top_failing = top_failing
+        self.engine = engine
+        self.seconds = seconds
+        # Set in compare mode: {'engine': str, 'seconds': float, 'differences': List[str]}
+        self.comparison: Optional[Dict] = None
+
+def _project_stats_frame(project_stats: pd.DataFrame) -> pd.DataFrame:
+    project_stats = project_stats.astype({'runs': 'int64', 'success_rate': 'float64',
+                                          'failure_rate': 'float64', 'unique_flows': 'int64'})
+    project_stats.index.name = 'automation_project'
+    return project_stats
+
+def _hourly_frame(hourly: pd.DataFrame) -> pd.DataFrame:
+    hourly = hourly.astype({'runs': 'int64', 'success_rate': 'float64'})
+    hourly.index = hourly.index.astype('int64')
+    hourly.index.name = 'hour'
+    return hourly
+
+def _top_failing_series(top_failing: pd.Series) -> pd.Series:
+    top_failing = top_failing.astype('int64')
+    top_failing.index.name = 'flowname'
+    top_failing.name = 'failed_runs'
+    return top_failing
+
+def pandas_aggregates(
+    filtered_df: pd.DataFrame,
+    partition_date: date,
+    selected_project: str = 'All Projects',
+    selected_status: str = 'All Statuses',
+    selected_owner: str = 'All Owners',
+    max_rows: int = 300
+) -> DashboardAggregates:
+    """
+    Compute the dashboard aggregates with pandas groupbys.
+
+    Args:
+        filtered_df: Processed partition with the project, status and owner filters applied
+        partition_date: Partition the data was processed from (matrix memoization key)
+        selected_project: Project filter (or 'All Projects')
+        selected_status: Status filter (or 'All Statuses')
+        selected_owner: Owner filter (or 'All Owners')
+        max_rows: Maximum number of matrix rows
+
+    Returns:
+        DashboardAggregates
+    """
+    started = time.perf_counter()
+    matrix = get_hourly_matrix(filtered_df, partition_date, selected_project=selected_project,
+                               selected_status=selected_status, selected_owner=selected_owner, max_rows=max_rows)
+
+    failed = filtered_df['taskstatus'] == 'Failed'
+    project_stats = (filtered_df.assign(failed=failed)
+        .groupby('automation_project')
+        .agg(runs=('wassuccessful', 'count'), success_rate=('wassuccessful', 'mean'),
+             failure_rate=('failed', 'mean'), unique_flows=('flowname', 'nunique')))
+
+    hours = filtered_df['datetimestarted'].dt.hour
+    hourly = (filtered_df.groupby(hours)
+        .agg(runs=('flowname', 'count'), success_rate=('wassuccessful', 'mean')))
+
+    # Stable sort keeps flows with equal failure counts in name order
+    top_failing = (filtered_df[failed]
+        .groupby('flowname')
+        .size()
+        .sort_values(ascending=False, kind='stable')
+        .head(TOP_FAILING_LIMIT))
+
+    return DashboardAggregates(matrix, _project_stats_frame(project_stats), _hourly_frame(hourly),
+                               _top_failing_series(top_failing), 'pandas', time.perf_counter() - started)
+
+def _where_clause(selected_project: str, selected_status: str, selected_owner: str,
+                  alias: str = '') -> Tuple[str, list]:
+    conditions, params = [], []
+    for column, value, unselected in (('automation_project', selected_project, 'All Projects'),
+                                      ('taskstatus', selected_status, 'All Statuses'),
+                                      ('owner', selected_owner, 'All Owners')):
+        if value != unselected:
+            conditions.append(f"{alias}{column} = ?")
+            params.append(value)
+    return (' AND '.join(conditions) or 'TRUE'), params
+
+MATRIX_SQL = """
+WITH ranked AS (
+    SELECT display_name,
+           ROW_NUMBER() OVER (ORDER BY SUM(CASE WHEN taskstatus = 'Failed' THEN 100
+                                                WHEN taskstatus = 'Running' THEN 10 ELSE 0 END) + COUNT(*) DESC,
+                                       MAX(started_ns) DESC, display_name) AS position
+    FROM {table}
+    WHERE {where} AND display_name IS NOT NULL
+    GROUP BY display_name
+),
+picked AS (
+    -- Highest priority status per cell, the first such row on ties (as max() in create_hourly_matrix)
+    SELECT r.position, f.hour,
+           4294967295 - MAX(f.status_priority * 4294967296 + (4294967295 - f.row_id)) % 4294967296 AS row_id
+    FROM ranked r JOIN {table} f ON f.display_name = r.display_name
+    WHERE r.position <= ? AND {where_f}
+    GROUP BY r.position, f.hour
+)
+SELECT p.position, t.display_name, p.hour, t.taskstatus
+FROM picked p JOIN {table} t ON t.row_id = p.row_id
+ORDER BY p.position, p.hour
+"""
+
+PROJECT_STATS_SQL = """
+SELECT automation_project,
+       COUNT(wassuccessful) AS runs,
+       AVG(wassuccessful) AS success_rate,
+       AVG(CASE WHEN taskstatus = 'Failed' THEN 1.0 ELSE 0.0 END) AS failure_rate,
+       COUNT(DISTINCT flowname) AS unique_flows
+FROM {table}
+WHERE {where} AND automation_project IS NOT NULL
+GROUP BY automation_project
+ORDER BY automation_project
+"""
+
+HOURLY_SQL = """
+SELECT hour, COUNT(flowname) AS runs, AVG(wassuccessful) AS success_rate
+FROM {table}
+WHERE {where}
+GROUP BY hour
+ORDER BY hour
+"""
+
+TOP_FAILING_SQL = """
+SELECT flowname, COUNT(*) AS failed_runs
+FROM {table}
+WHERE {where} AND taskstatus = 'Failed' AND flowname IS NOT NULL
+GROUP BY flowname
+ORDER BY failed_runs DESC, flowname
+LIMIT {limit}
+"""
+
+class SqlRunStore:
+    """
+    Processed partitions loaded into an embedded SQL database.
+
+    Each partition is copied once into a narrow table (the columns the
+    aggregations read); every rerun then runs the matrix, project, hourly and
+    top-failing queries concurrently against it, with the dashboard filters
+    pushed into the WHERE clauses instead of masking the pandas frame.
+
+    The sqlite backend writes the tables to a throwaway temp file (WAL mode)
+    and each query thread reads through its own thread-local connection,
+    kept between reruns (sqlite releases the GIL while executing); the duckdb
+    backend registers the narrow frame without copying and runs each query on
+    its own cursor.
+    """
+
+    def __init__(self, backend: str = 'sqlite', max_partitions: int = 4):
+        if backend == 'duckdb' and not DUCKDB_AVAILABLE:
+            raise ImportError("duckdb is required for the duckdb query engine")
+        if backend not in ('sqlite', 'duckdb'):
+            raise ValueError(f"Unsupported SQL backend: {backend}")
+        self.backend = backend
+        self.max_partitions = max_partitions
+        self._tables: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix=f'{backend}-query')
+        if backend == 'duckdb':
+            import duckdb
+            self._connection = duckdb.connect(':memory:')
+        else:
+            # A throwaway file rather than a shared-cache memory database, whose readers serialize on one cache
+            handle, self._path = tempfile.mkstemp(prefix='run_store_', suffix='.sqlite')
+            os.close(handle)
+            self._connection = sqlite3.connect(self._path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=OFF")
+            self._local = threading.local()
+
+    def _connect(self):
+        if self.backend == 'duckdb':
+            return self._connection.cursor()
+        # Query threads keep their connection (and its page cache) between reruns
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(self._path, check_same_thread=False)
+        return connection
+
+    def _narrow_frame(self, frame: pd.DataFrame) -> pd.DataFrame:
+        narrow = frame[list(STORE_COLUMNS)].copy()
+        narrow['hour'] = narrow['hour'].astype('int64')
+        narrow['wassuccessful'] = narrow['wassuccessful'].astype('float64')
+        narrow['status_priority'] = narrow['status_priority'].astype('int64')
+        narrow['started_ns'] = frame['datetimestarted'].to_numpy('datetime64[ns]').view('int64')
+        narrow['row_id'] = np.arange(len(frame), dtype='int64')
+        return narrow
+
+    def _load(self, name: str, frame: pd.DataFrame) -> None:
+        narrow = self._narrow_frame(frame)
+        if self.backend == 'duckdb':
+            self._connection.register(name, narrow)
+            return
+        columns = ', '.join(narrow.columns)
+        placeholders = ', '.join('?' * len(narrow.columns))
+        with self._connection:
+            # row_id doubles as the sqlite rowid, so picked cells are looked up by key
+            self._connection.execute(f"CREATE TABLE {name} ({columns.replace('row_id', 'row_id INTEGER PRIMARY KEY')})")
+            self._connection.executemany(f"INSERT INTO {name} VALUES ({placeholders})",
+                                         narrow.astype(object).where(narrow.notna(), None).itertuples(index=False, name=None))
+            # Covers the per-cell status pick of the matrix query
+            self._connection.execute(f"CREATE INDEX {name}_cells ON {name} (display_name, hour, status_priority, row_id)")
+            for column in ('automation_project', 'taskstatus', 'owner'):
+                self._connection.execute(f"CREATE INDEX {name}_{column} ON {name} ({column})")
+
+    def _drop(self, name: str) -> None:
+        if self.backend == 'duckdb':
+            self._connection.unregister(name)
+        else:
+            with self._connection:
+                self._connection.execute(f"DROP TABLE IF EXISTS {name}")
+
+    def table(self, key: Hashable, frame: pd.DataFrame) -> str:
+        """
+        Return the table holding a partition, loading the frame on first use.
+
+        Args:
+            key: Identifies the partition content (date, fingerprint, row count, flow mapping version)
+            frame: Processed partition, as returned by process_partition
+
+        Returns:
+            str: Table name
+        """
+        with self._lock:
+            name = self._tables.get(key)
+            if name is not None:
+                self._tables.move_to_end(key)
+                return name
+            name = f"runs_{len(self._tables)}_{abs(hash(key)) & 0xFFFFFFFF:08x}"
+            started = time.perf_counter()
+            self._load(name, frame)
+            self._tables[key] = name
+            logger.info(f"Loaded {len(frame)} rows into {self.backend} table {name} in {time.perf_counter() - started:.3f}s")
+            while len(self._tables) > self.max_partitions:
+                _, old_name = self._tables.popitem(last=False)
+                self._drop(old_name)
+            return name
+
+    def _query(self, sql: str, params: list) -> List[tuple]:
+        cursor = self._connect()
+        try:
+            return cursor.execute(sql, params).fetchall()
+        finally:
+            if self.backend == 'duckdb':
+                cursor.close()
+
+    def aggregates(
+        self,
+        key: Hashable,
+        frame: pd.DataFrame,
+        selected_project: str = 'All Projects',
+        selected_status: str = 'All Statuses',
+        selected_owner: str = 'All Owners',
+        max_rows: int = 300
+    ) -> DashboardAggregates:
+        """
+        Compute the dashboard aggregates with SQL queries on the stored partition.
+
+        Args:
+            key: Identifies the partition content (see table)
+            frame: Processed partition without the filters applied
+            selected_project: Project filter (or 'All Projects')
+            selected_status: Status filter (or 'All Statuses')
+            selected_owner: Owner filter (or 'All Owners')
+            max_rows: Maximum number of matrix rows
+
+        Returns:
+            DashboardAggregates: Same values as pandas_aggregates
+        """
+        started = time.perf_counter()
+        table = self.table(key, frame)
+        where, params = _where_clause(selected_project, selected_status, selected_owner)
+        where_f, _ = _where_clause(selected_project, selected_status, selected_owner, alias='f.')
+        queries = {
+            'matrix': (MATRIX_SQL.format(table=table, where=where, where_f=where_f), params + [max_rows] + params),
+            'project_stats': (PROJECT_STATS_SQL.format(table=table, where=where), params),
+            'hourly': (HOURLY_SQL.format(table=table, where=where), params),
+            'top_failing': (TOP_FAILING_SQL.format(table=table, where=where, limit=TOP_FAILING_LIMIT), params)
+        }
+        futures = {name: self._executor.submit(self._query, sql, query_params)
+                   for name, (sql, query_params) in queries.items()}
+        rows = {name: future.result() for name, future in futures.items()}
+
+        hours = list(range(24))
+        display_names = []
+        bot_hour_status = {}
+        for _, name, hour, status in rows['matrix']:
+            if name not in bot_hour_status:
+                display_names.append(name)
+                bot_hour_status[name] = {h: "No Run" for h in hours}
+            if 0 <= hour <= 23:
+                bot_hour_status[name][int(hour)] = status
+        matrix = (bot_hour_status, display_names, hours)
+        if display_names:
+            is_valid, message, validated_data = validate_matrix_data(bot_hour_status, display_names, hours)
+            if is_valid or (validated_data and len(validated_data) == 3):
+                matrix = validated_data
+        else:
+            matrix = ({}, [], hours)
+
+        project_stats = pd.DataFrame.from_records(
+            rows['project_stats'], columns=['automation_project', 'runs', 'success_rate', 'failure_rate', 'unique_flows']
+        ).set_index('automation_project')
+        hourly = pd.DataFrame.from_records(rows['hourly'], columns=['hour', 'runs', 'success_rate']).set_index('hour')
+        top_failing = pd.Series(dict(rows['top_failing']), dtype='int64')
+
+        return DashboardAggregates(matrix, _project_stats_frame(project_stats), _hourly_frame(hourly),
+                                   _top_failing_series(top_failing), self.backend, time.perf_counter() - started)
+
+    def close(self) -> None:
+        """Drop all tables and close the database"""
+        with self._lock:
+            self._executor.shutdown(wait=True)
+            self._tables.clear()
+            self._connection.close()
+            if self.backend == 'sqlite':
+                for suffix in ('', '-wal', '-shm'):
+                    try:
+                        os.remove(self._path + suffix)
+                    except OSError:
+                        pass
+
+_STORES: Dict[str, SqlRunStore] = {}
+_stores_lock = threading.Lock()
+
+def get_run_store(backend: str) -> SqlRunStore:
+    """Return the process-wide run store of a backend, creating it on first use"""
+    with _stores_lock:
+        store = _STORES.get(backend)
+        if store is None:
+            store = _STORES[backend] = SqlRunStore(backend)
+            atexit.register(store.close)
+        return store
+
+def compare_aggregates(expected: DashboardAggregates, actual: DashboardAggregates) -> List[str]:
+    """
+    List the differences between two sets of aggregates.
+
+    Floating point values are compared with a small tolerance since SQL and
+    pandas may sum in a different order.
+
+    Returns:
+        list: Human readable differences (empty when the results match)
+    """
+    differences = []
+    expected_statuses, expected_names, _ = expected.matrix
+    actual_statuses, actual_names, _ = actual.matrix
+    if list(expected_names) != list(actual_names):
+        differences.append(f"matrix rows differ: {len(expected_names)} vs {len(actual_names)}, "
+                           f"first mismatch at {next((i for i, (a, b) in enumerate(zip(expected_names, actual_names)) if a != b), min(len(expected_names), len(actual_names)))}")
+    else:
+        cells = [(name, hour) for name in expected_names for hour in expected_statuses.get(name, {})
+                 if expected_statuses[name][hour] != actual_statuses.get(name, {}).get(hour)]
+        if cells:
+            differences.append(f"matrix cells differ: {len(cells)}, e.g. {cells[0]}")
+
+    for label, left, right in (('project_stats', expected.project_stats, actual.project_stats),
+                               ('hourly', expected.hourly, actual.hourly)):
+        if not left.index.equals(right.index) or list(left.columns) != list(right.columns):
+            differences.append(f"{label} rows differ: {len(left)} vs {len(right)}")
+        elif not np.allclose(left.to_numpy(dtype='float64'), right.to_numpy(dtype='float64'), rtol=1e-9, atol=1e-12):
+            differences.append(f"{label} values differ")
+
+    if not expected.top_failing.equals(actual.top_failing):
+        differences.append(f"top_failing differs: {expected.top_failing.to_dict()} vs {actual.top_failing.to_dict()}")
+    return differences
+
+def _partition_key(processed_df: pd.DataFrame, partition_date: date) -> Hashable:
+    # Cached partitions are fingerprinted by their raw rows; the mapping version keeps a remap from serving old projects
+    entry = PARTITION_CACHE.get(partition_date)
+    if entry is not None and len(entry.frame) == len(processed_df):
+        return (partition_date, entry.fingerprint, len(entry.frame), FLOW_MAPPING.version)
+    return (partition_date, combine_fingerprint(fingerprint_rows(processed_df)), len(processed_df), FLOW_MAPPING.version)
+
+def compute_dashboard_aggregates(
+    processed_df: pd.DataFrame,
+    filtered_df: pd.DataFrame,
+    partition_date: date,
+    selected_project: str = 'All Projects',
+    selected_status: str = 'All Statuses',
+    selected_owner: str = 'All Owners',
+    engine: Optional[str] = None,
+    max_rows: int = 300
+) -> DashboardAggregates:
+    """
+    Compute the matrix and analytics aggregates with the selected query engine.
+
+    The SQL engines fall back to pandas on any error. In compare mode both
+    pandas and the SQL engine run; the pandas result is returned with the SQL
+    timing and any differences attached as ``comparison``.
+
+    Args:
+        processed_df: Processed partition without the filters applied
+        filtered_df: The same partition with the project, status and owner filters applied
+        partition_date: Date of the partition
+        selected_project: Project filter (or 'All Projects')
+        selected_status: Status filter (or 'All Statuses')
+        selected_owner: Owner filter (or 'All Owners')
+        engine: pandas, sqlite, duckdb or compare (defaults to QUERY_ENGINE)
+        max_rows: Maximum number of matrix rows
+
+    Returns:
+        DashboardAggregates
+    """
+    engine = engine or query_engine_from_env()
+    filters = dict(selected_project=selected_project, selected_status=selected_status,
+                   selected_owner=selected_owner, max_rows=max_rows)
+    if engine == 'pandas':
+        return pandas_aggregates(filtered_df, partition_date, **filters)
+
+    backend = 'duckdb' if DUCKDB_AVAILABLE else 'sqlite'
+    backend = engine if engine in ('sqlite', 'duckdb') else backend
+    try:
+        sql_result = get_run_store(backend).aggregates(_partition_key(processed_df, partition_date), processed_df, **filters)
+    except Exception as e:
+        logger.error(f"{backend} query engine failed, using pandas: {e}")
+        return pandas_aggregates(filtered_df, partition_date, **filters)
+    if engine != 'compare':
+        return sql_result
+
+    result = pandas_aggregates(filtered_df, partition_date, **filters)
+    differences = compare_aggregates(result, sql_result)
+    result.comparison = {'engine': backend, 'seconds': sql_result.seconds, 'differences': differences}
+    if differences:
+        logger.warning(f"Query engine mismatch ({backend} vs pandas): {'; '.join(differences)}")
+    logger.info(f"Query engine compare: pandas {result.seconds * 1000:.1f} ms, {backend} {sql_result.seconds * 1000:.1f} ms")
+    return result
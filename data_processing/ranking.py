@@ -0,0 +1,146 @@
+"""
+Ranking module for Bot Monitoring Dashboard
+Chooses the bots shown in the hourly matrix from per-bot status counters
+"""
+
+import logging
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger('bot_ranking')
+
+# Score weights: failures outrank running runs, which outrank plain run counts
+FAILED_WEIGHT = 100
+RUNNING_WEIGHT = 10
+
+# Latest start of a bot without a valid start time (sorts last)
+NO_START = np.iinfo(np.int64).min
+
+def _start_ns(started: pd.Series) -> np.ndarray:
+    values = pd.to_datetime(started, errors='coerce')
+    if getattr(values.dt, 'tz', None) is not None:
+        values = values.dt.tz_localize(None)
+    return values.to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+class BotRanking:
+    """
+    Per-bot counters behind the matrix ranking.
+
+    Bots are ordered by ``Failed*100 + Running*10 + runs`` (descending), then
+    by latest start (most recent first), then by name. The counters can be
+    updated with the runs a refresh replaced and added (see ``updated``), so
+    re-ranking after a refresh costs O(changed runs + bots) instead of a
+    recount of the day.
+    """
+
+    __slots__ = ('names', 'failed', 'running', 'runs', 'latest', '_positions')
+
+    def __init__(self, names: np.ndarray, failed: np.ndarray, running: np.ndarray,
+                 runs: np.ndarray, latest: np.ndarray):
+        self.names = names
+        self.failed = failed
+        self.running = running
+        self.runs = runs
+        self.latest = latest
+        self._positions = {name: i for i, name in enumerate(names)}
+
+    def __len__(self) -> int:
+        return int((self.runs > 0).sum())
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'BotRanking':
+        """
+        Count failed, running and total runs plus the latest start per display_name.
+
+        Args:
+            df: Processed rows with display_name, taskstatus and datetimestarted (filters already applied)
+
+        Returns:
+            BotRanking: Counters for every bot with at least one run in ``df``
+        """
+        if df is None or df.empty:
+            empty = np.empty(0, dtype=np.int64)
+            return cls(np.empty(0, dtype=object), empty, empty.copy(), empty.copy(), empty.copy())
+        codes, names = pd.factorize(df['display_name'], sort=True)
+        valid = codes >= 0
+        codes = codes[valid]
+        count = len(names)
+        status = df['taskstatus'].to_numpy()[valid]
+        failed = np.bincount(codes[status == 'Failed'], minlength=count)
+        running = np.bincount(codes[status == 'Running'], minlength=count)
+        runs = np.bincount(codes, minlength=count)
+        latest = np.full(count, NO_START, dtype=np.int64)
+        np.maximum.at(latest, codes, _start_ns(df['datetimestarted'])[valid])
+        return cls(np.asarray(names, dtype=object), failed.astype(np.int64), running.astype(np.int64),
+                   runs.astype(np.int64), latest)
+
+    def updated(self, removed: pd.DataFrame, added: pd.DataFrame) -> Optional['BotRanking']:
+        """
+        Counters after ``removed`` runs were dropped and ``added`` runs were included.
+
+        Args:
+            removed: Processed rows that are no longer part of the data (filters already applied)
+            added: Processed rows that are new or replace removed ones (filters already applied)
+
+        Returns:
+            BotRanking or None: Updated counters, or None when they can't be derived
+            incrementally (the latest run of a bot was removed) and must be recounted
+        """
+        gone = BotRanking.from_frame(removed)
+        new = BotRanking.from_frame(added)
+        new_names = [name for name in new.names if name not in self._positions]
+        names = np.concatenate([self.names, np.asarray(new_names, dtype=object)]) if new_names else self.names
+        grow = len(new_names)
+        failed, running, runs, latest = (
+            np.concatenate([values, np.full(grow, fill, dtype=np.int64)])
+            for values, fill in ((self.failed, 0), (self.running, 0), (self.runs, 0), (self.latest, NO_START)))
+        positions = dict(self._positions)
+        positions.update((name, len(self.names) + i) for i, name in enumerate(new_names))
+
+        if len(gone.names):
+            where = np.array([positions.get(name, -1) for name in gone.names])
+            if (where < 0).any():
+                return None
+            failed[where] -= gone.failed
+            running[where] -= gone.running
+            runs[where] -= gone.runs
+            if (runs[where] < 0).any():
+                return None
+            latest[where[runs[where] == 0]] = NO_START
+        if len(new.names):
+            where_new = np.array([positions[name] for name in new.names])
+            failed[where_new] += new.failed
+            running[where_new] += new.running
+            runs[where_new] += new.runs
+            latest[where_new] = np.maximum(latest[where_new], new.latest)
+        if len(gone.names):
+            # A maximum can't be decremented: recount when a bot's latest run was removed without an equally recent one added
+            added_latest = np.array([new.latest[new._positions[name]] if name in new._positions else NO_START
+                                     for name in gone.names], dtype=np.int64)
+            stale = (gone.latest >= self.latest[where]) & (runs[where] > 0) & (added_latest < gone.latest)
+            if stale.any():
+                return None
+
+        return BotRanking(names, failed, running, runs, latest)
+
+    def top(self, k: int) -> List[str]:
+        """
+        Names of the ``k`` highest ranked bots, in rank order.
+
+        The candidates are chosen with a partial selection on the score, so
+        only the bots tied with or above the k-th score are fully sorted.
+        """
+        live = np.flatnonzero(self.runs > 0)
+        if k <= 0 or not len(live):
+            return []
+        score = self.failed[live] * FAILED_WEIGHT + self.running[live] * RUNNING_WEIGHT + self.runs[live]
+        if len(live) > k:
+            kth = np.partition(score, len(score) - k)[len(score) - k]
+            candidates = score >= kth
+            live, score = live[candidates], score[candidates]
+        # Descending latest start; NO_START is clamped so negating it can't overflow
+        newest_first = -np.maximum(self.latest[live], NO_START + 1)
+        order = np.lexsort((self.names[live], newest_first, -score))
+        return self.names[live[order[:k]]].tolist()
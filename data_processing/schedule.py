@@ -0,0 +1,270 @@
+"""
+Schedule module for Bot Monitoring Dashboard
+Infers the expected run hours of Recurrence flows from their history
+"""
+
+import logging
+import threading
+from datetime import date
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger('schedule_index')
+
+MISSED = "Missed"
+
+# Buckets per flow: hour of the week (weekday * 24 + hour, Monday first)
+WEEK_BUCKETS = 7 * 24
+
+# 1970-01-01 (day 0 of the day numbers used here) was a Thursday
+EPOCH_WEEKDAY = 3
+
+def _day_numbers(started: pd.Series) -> np.ndarray:
+    """Days since 1970-01-01 of each start time (NaT as the minimum int64)"""
+    values = pd.to_datetime(started, errors='coerce')
+    if getattr(values.dt, 'tz', None) is not None:
+        values = values.dt.tz_localize(None)
+    return values.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').view(np.int64)
+
+class ScheduleIndex:
+    """
+    Expected-bucket bitmap of every Recurrence flow.
+
+    A flow is expected to run in an hour of a weekday when it had a
+    Recurrence run in that hour on at least ``min_share`` of those weekdays
+    since its first run in the history window (and at least ``min_runs``
+    times). The window is the ``history_days`` days before the day being
+    viewed. The result is one 24-bit hour mask per (flow, weekday), so
+    checking a matrix cell is a dict lookup and a bit test.
+
+    The distinct (flow, bucket) cells of every day in the window are kept,
+    so a refresh only recounts the days whose row count changed, plus the
+    days entering or leaving the window. Flows are keyed by
+    ``flow_keys(rows)`` and looked up by matrix display name through
+    ``display_key``.
+    """
+
+    def __init__(self, flow_keys: Callable[[pd.DataFrame], pd.Series], display_key: Callable[[str], str],
+                 history_days: int = 28, min_share: float = 0.5, min_runs: int = 2):
+        self.flow_keys = flow_keys
+        self.display_key = display_key
+        self.history_days = history_days
+        self.min_share = min_share
+        self.min_runs = min_runs
+        self.as_of: Optional[date] = None
+        self._lock = threading.RLock()
+        self._rows: Dict[str, int] = {}
+        # Distinct row * WEEK_BUCKETS + bucket codes with a Recurrence run, and the row count seen, per day number
+        self._day_cells: Dict[int, np.ndarray] = {}
+        self._day_rows: Dict[int, int] = {}
+        self._counts = np.zeros((0, WEEK_BUCKETS), dtype=np.uint16)
+        self.masks = np.zeros((0, 7), dtype=np.uint32)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return int((self.masks != 0).any(axis=1).sum())
+
+    def __getstate__(self) -> dict:
+        # Picklable for worker processes (see reports.py); the lock is recreated on unpickling
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def refresh(self, df: pd.DataFrame, as_of: date) -> bool:
+        """
+        Bring the index up to date with the run history for viewing ``as_of``.
+
+        Args:
+            df: Raw run history with flowname, flowowner, datetimestarted and triggertype
+            as_of: Day the matrix shows; the schedule is inferred from the days before it
+
+        Returns:
+            bool: True if any day was recounted
+        """
+        with self._lock:
+            end = (as_of - date(1970, 1, 1)).days
+            start = end - self.history_days
+            if df is None or df.empty or 'triggertype' not in df.columns:
+                day_rows = {}
+                days = np.empty(0, dtype=np.int64)
+            else:
+                days = _day_numbers(df['datetimestarted'])
+                in_window = (days >= start) & (days < end)
+                counts = np.bincount(days[in_window] - start, minlength=self.history_days)
+                day_rows = {start + offset: int(count) for offset, count in enumerate(counts) if count}
+
+            stale = [day for day in self._day_cells if self._day_rows.get(day) != day_rows.get(day)]
+            fresh = [day for day, count in day_rows.items() if self._day_rows.get(day) != count]
+            dropped = sum(1 for day in stale if day not in day_rows)
+            self.as_of = as_of
+            if not stale and not fresh:
+                self.hits += 1
+                return False
+            self.misses += 1
+
+            for day in stale:
+                cells = self._day_cells.pop(day)
+                del self._day_rows[day]
+                np.subtract.at(self._counts.reshape(-1), cells, 1)
+            if fresh:
+                self._add_days(df, days, fresh)
+                for day in fresh:
+                    self._day_rows[day] = day_rows[day]
+            self._update_masks(end)
+            logger.info(f"Schedule index for {as_of}: recounted {len(fresh)} days, dropped {dropped} days, "
+                        f"{len(self)} scheduled flows")
+            return True
+
+    def _add_days(self, df: pd.DataFrame, days: np.ndarray, fresh: List[int]) -> None:
+        """Count the distinct (flow, bucket) cells of the given days in one pass"""
+        selected = np.isin(days, fresh) & (df['triggertype'] == 'Recurrence').to_numpy()
+        rows = df[selected]
+        day = days[selected]
+        if len(rows):
+            keys = self.flow_keys(rows).to_numpy()
+            codes, uniques = pd.factorize(keys)
+            new_keys = [key for key in uniques if key not in self._rows]
+            for key in new_keys:
+                self._rows[key] = len(self._rows)
+            if new_keys:
+                self._counts = np.vstack([self._counts, np.zeros((len(new_keys), WEEK_BUCKETS), dtype=np.uint16)])
+            row = np.array([self._rows[key] for key in uniques], dtype=np.int64)[codes]
+            hour = pd.to_datetime(rows['datetimestarted']).dt.hour.to_numpy(dtype=np.int64)
+            bucket = ((day + EPOCH_WEEKDAY) % 7) * 24 + hour
+            # A flow running several times in an hour counts once for that day
+            cells = np.unique(day * (len(self._rows) * WEEK_BUCKETS) + row * WEEK_BUCKETS + bucket)
+            cell_days = cells // (len(self._rows) * WEEK_BUCKETS)
+            cells = cells % (len(self._rows) * WEEK_BUCKETS)
+            np.add.at(self._counts.reshape(-1), cells, 1)
+        else:
+            cell_days = cells = np.empty(0, dtype=np.int64)
+        bounds = np.searchsorted(cell_days, fresh)
+        ends = np.searchsorted(cell_days, fresh, side='right')
+        for day, lower, upper in zip(fresh, bounds, ends):
+            self._day_cells[day] = cells[lower:upper]
+
+    def _update_masks(self, end: int) -> None:
+        """Derive the expected hours from the bucket counts and the weekdays each flow was observed on"""
+        flows = len(self._rows)
+        first = np.full(flows, end, dtype=np.int64)
+        for day, cells in self._day_cells.items():
+            np.minimum.at(first, cells // WEEK_BUCKETS, day)
+        # Days of each weekday from a flow's first run to the end of the window
+        span = end - first
+        offset = (np.arange(7)[None, :] - (first[:, None] + EPOCH_WEEKDAY)) % 7
+        observed = span[:, None] // 7 + (offset < (span[:, None] % 7))
+        observed = np.repeat(observed, 24, axis=1)
+
+        counts = self._counts.astype(np.int64)
+        expected = (counts >= self.min_runs) & (counts >= self.min_share * observed)
+        weights = (np.uint32(1) << np.arange(24, dtype=np.uint32))
+        self.masks = (expected.reshape(flows, 7, 24) * weights).sum(axis=2, dtype=np.uint32)
+
+    def expected_hours(self, display_name: str, day: date) -> int:
+        """Bit mask of the hours a flow is expected to run on ``day`` (bit n for hour n), 0 if unscheduled"""
+        row = self._rows.get(self.display_key(display_name))
+        if row is None or row >= len(self.masks):
+            return 0
+        return int(self.masks[row, day.weekday()])
+
+    def silent_flows(self, display_names: List[str], day: date, current_hour: Optional[int] = None) -> Dict[str, List[int]]:
+        """
+        Scheduled flows without a single run on ``day``, which the matrix has no row for.
+
+        Args:
+            display_names: Display names of every bot with a run on ``day``
+            day: Day of the matrix
+            current_hour: Hour in progress on ``day`` (None when the day is over)
+
+        Returns:
+            dict: Flow key ('owner | flowname') -> hours it was expected to run so far, for flows
+            expected at least once before ``current_hour``
+        """
+        with self._lock:
+            if not len(self.masks):
+                return {}
+            due = np.uint32((1 << (24 if current_hour is None else current_hour)) - 1)
+            expected = self.masks[:, day.weekday()] & due
+            present = np.zeros(len(self.masks), dtype=bool)
+            rows = [self._rows.get(self.display_key(name)) for name in display_names]
+            present[[row for row in rows if row is not None and row < len(present)]] = True
+            keys = list(self._rows)
+            return {keys[row]: [hour for hour in range(24) if (int(expected[row]) >> hour) & 1]
+                    for row in np.flatnonzero((expected != 0) & ~present)}
+
+    def mark_missed_for(
+        self,
+        df: pd.DataFrame,
+        bot_hour_status: Dict[str, Dict[int, str]],
+        display_names: List[str],
+        day: date,
+        current_hour: Optional[int] = None
+    ) -> Dict[str, Dict[int, str]]:
+        """
+        Refresh the index for ``day`` and mark its missed cells, under one lock.
+
+        The index holds the schedule of one viewed day at a time, so sessions
+        viewing different days must not interleave a refresh and a read.
+
+        Args:
+            df: Raw run history (see refresh)
+            bot_hour_status: Matrix statuses, {display_name: {hour: status}} (not modified)
+            display_names: Bots shown in the matrix
+            day: Day of the matrix
+            current_hour: Hour in progress on ``day`` (None when the day is over)
+
+        Returns:
+            dict: Matrix statuses with missed cells marked (see mark_missed)
+        """
+        with self._lock:
+            self.refresh(df, day)
+            return self.mark_missed(bot_hour_status, display_names, day, current_hour)
+
+    def silent_flows_for(self, df: pd.DataFrame, display_names: List[str], day: date,
+                         current_hour: Optional[int] = None) -> Dict[str, List[int]]:
+        """Refresh the index for ``day`` and list its silent flows, under one lock (see silent_flows)"""
+        with self._lock:
+            self.refresh(df, day)
+            return self.silent_flows(display_names, day, current_hour)
+
+    def mark_missed(
+        self,
+        bot_hour_status: Dict[str, Dict[int, str]],
+        display_names: List[str],
+        day: date,
+        current_hour: Optional[int] = None
+    ) -> Dict[str, Dict[int, str]]:
+        """
+        Mark "No Run" cells of expected hours as "Missed".
+
+        Args:
+            bot_hour_status: Matrix statuses, {display_name: {hour: status}} (not modified)
+            display_names: Bots shown in the matrix
+            day: Day of the matrix
+            current_hour: Hour in progress on ``day`` (None when the day is over); it and later hours are not marked
+
+        Returns:
+            dict: Matrix statuses with missed cells marked; rows without missed cells are shared with the input
+        """
+        marked = dict(bot_hour_status)
+        missed = 0
+        for name in display_names:
+            mask = self.expected_hours(name, day)
+            if not mask or name not in bot_hour_status:
+                continue
+            row = bot_hour_status[name]
+            hours = [hour for hour, status in row.items()
+                     if status == "No Run" and (mask >> hour) & 1 and (current_hour is None or hour < current_hour)]
+            if hours:
+                marked[name] = {**row, **{hour: MISSED for hour in hours}}
+                missed += len(hours)
+        if missed:
+            logger.info(f"Marked {missed} missed scheduled runs for {day}")
+        return marked
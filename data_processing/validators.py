@@ -8,16 +8,60 @@ import numpy as np
 import logging
 from datetime import datetime
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger('data_validator')
 
+class RejectedRowsReport:
+    """
+    Counts of rows rejected or coerced while validating a batch of raw data
+
+    Rejected rows are excluded from the processed output; coerced rows are kept
+    with a normalized value (e.g. an unknown status mapped to 'No Run').
+    """
+
+    def __init__(self, total_rows=0):
+        self.total_rows = int(total_rows)
+        self.rejected = {}
+        self.coerced = {}
+
+    @property
+    def rejected_count(self):
+        return sum(self.rejected.values())
+
+    @property
+    def accepted_count(self):
+        return self.total_rows - self.rejected_count
+
+    def reject(self, reason, count):
+        """Record rows dropped for the given reason"""
+        if count:
+            self.rejected[reason] = self.rejected.get(reason, 0) + int(count)
+
+    def coerce(self, reason, count):
+        """Record rows kept with a normalized value"""
+        if count:
+            self.coerced[reason] = self.coerced.get(reason, 0) + int(count)
+
+    def merge(self, other):
+        """Combine with the report of another batch (e.g. an appended delta)"""
+        merged = RejectedRowsReport(self.total_rows + other.total_rows)
+        for report in (self, other):
+            for reason, count in report.rejected.items():
+                merged.reject(reason, count)
+            for reason, count in report.coerced.items():
+                merged.coerce(reason, count)
+        return merged
+
+    def to_dict(self):
+        return {
+            'total_rows': self.total_rows,
+            'accepted_rows': self.accepted_count,
+            'rejected': dict(self.rejected),
+            'coerced': dict(self.coerced)
+        }
+
+    def __repr__(self):
+        return f"RejectedRowsReport({self.to_dict()})"
+
 def validate_raw_data(df):
     """
     Validate raw data from database or CSV
@@ -43,8 +87,8 @@ def validate_raw_data(df):
         if missing_columns:
             return False, f"Missing required columns: {', '.join(missing_columns)}", None
             
-        # Create a copy for validation
-        validated_df = df.copy()
+        # Shallow copy: with copy-on-write, columns are only copied when modified
+        validated_df = df.copy(deep=False)
         
         # Validate and convert datetime
         if 'datetimestarted' in validated_df.columns:
@@ -100,8 +144,8 @@ def validate_processed_data(df):
         if df is None or df.empty:
             return False, "No processed data available", None
             
-        # Create a copy for validation
-        validated_df = df.copy()
+        # Shallow copy: with copy-on-write, columns are only copied when modified
+        validated_df = df.copy(deep=False)
         
         # Ensure required columns exist
         required_columns = ['owner', 'automation_project', 'flowname', 'taskstatus', 'datetimestarted']
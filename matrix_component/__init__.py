@@ -0,0 +1,196 @@
+"""
+Delta-aware rendering of the Bot Activity Matrix
+
+A static HTML/JS Streamlit component (frontend/index.html, no build step)
+draws the matrix and keeps it in the browser between reruns. Each rerun
+sends only what changed since the payload the browser last applied: rows
+added or removed and (row, hour) cells whose status changed, with rows
+referenced by stable integer ids and statuses coded as small integers.
+A full payload is sent on the first render of a session, when the hours
+change, and whenever the browser reports that it missed an update (for
+example after the component was unmounted by a filter with no data).
+"""
+
+import logging
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+logger = logging.getLogger('matrix_component')
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'frontend')
+
+_bot_matrix = None
+
+def _matrix_component():
+    """
+    Declare the component on first use.
+
+    Declaring resolves the calling module with inspect.getmodule, which walks every
+    loaded module (tens of ms); doing it on the first render keeps it out of the
+    import, so the page shell is sent before it.
+    """
+    global _bot_matrix
+    if _bot_matrix is None:
+        _bot_matrix = components.declare_component('bot_matrix', path=FRONTEND_DIR)
+    return _bot_matrix
+
+def split_display_name(display_name: str) -> Tuple[str, str, str]:
+    """Owner, automation project and flow of an 'owner | project | flow' display name"""
+    name_parts = display_name.split(" | ", 2)
+    if len(name_parts) >= 3:
+        return name_parts[0], name_parts[1], name_parts[2]
+    if len(name_parts) == 2:
+        return name_parts[0], name_parts[1], "Unknown"
+    return name_parts[0], "Unknown", "Unknown"
+
+class SentMatrix:
+    """The matrix as the browser holds it after applying the last payload of a session"""
+
+    __slots__ = ('version', 'hours', 'statuses', 'row_ids', 'next_id', 'codes', 'full_request')
+
+    def __init__(self, hours: List[int]):
+        self.version = 0
+        self.hours = list(hours)
+        # Status name per code, grown as new statuses appear
+        self.statuses: List[str] = []
+        # Stable integer id per display name, referenced by cell updates
+        self.row_ids: Dict[str, int] = {}
+        self.next_id = 0
+        # Status codes per hour of every row the browser shows
+        self.codes: Dict[str, Tuple[int, ...]] = {}
+        # Last full-payload request of the browser that was answered
+        self.full_request = None
+
+def build_payload(
+    sent: Optional[SentMatrix],
+    bot_hour_status: Dict[str, Dict[int, str]],
+    display_names: List[str],
+    hours: List[int],
+    status_emoji: Callable[[str], str],
+    full: bool = False
+) -> Tuple[dict, SentMatrix]:
+    """
+    Encode a matrix as a full payload or as the changes since ``sent``.
+
+    Args:
+        sent: State of the browser after the previous payload (None for a full payload)
+        bot_hour_status: Matrix statuses, {display_name: {hour: status}}
+        display_names: Display names to show
+        hours: Hour columns
+        status_emoji: Emoji for a status
+        full: Send the whole matrix even if ``sent`` is usable
+
+    Returns:
+        tuple: (payload for the component, state of the browser once it applied the payload)
+    """
+    full = full or sent is None or sent.hours != list(hours)
+    state = SentMatrix(hours) if full else sent
+    known_statuses = len(state.statuses)
+    status_codes = {status: code for code, status in enumerate(state.statuses)}
+
+    def encode(name):
+        codes = []
+        for hour in hours:
+            status = bot_hour_status[name].get(hour, "No Run")
+            code = status_codes.get(status)
+            if code is None:
+                code = status_codes[status] = len(state.statuses)
+                state.statuses.append(status)
+            codes.append(code)
+        return tuple(codes)
+
+    names = sorted(name for name in display_names if name in bot_hour_status)
+    new_codes = {name: encode(name) for name in names}
+    statuses = [[status, status_emoji(status)] for status in state.statuses[known_statuses:]]
+
+    if full:
+        for name in names:
+            state.row_ids[name] = state.next_id
+            state.next_id += 1
+        state.codes = new_codes
+        state.version = (sent.version if sent is not None else 0) + 1
+        payload = {
+            'version': state.version,
+            'full': True,
+            'hours': list(hours),
+            'statuses': statuses,
+            'rows': [[state.row_ids[name], name, *split_display_name(name), list(new_codes[name])] for name in names]
+        }
+        return payload, state
+
+    removed = [name for name in state.codes if name not in new_codes]
+    added = [name for name in names if name not in state.codes]
+    changed_cells = []
+    for name in names:
+        previous = state.codes.get(name)
+        if previous is None or previous == new_codes[name]:
+            continue
+        row_id = state.row_ids[name]
+        changed_cells.extend([row_id, index, code] for index, (old, code) in enumerate(zip(previous, new_codes[name]))
+                             if old != code)
+    if not (removed or added or changed_cells):
+        # The browser is current: an empty payload leaves the component untouched
+        return {'version': state.version, 'base': state.version}, state
+
+    removed_ids = [state.row_ids.pop(name) for name in removed]
+    for name in added:
+        state.row_ids[name] = state.next_id
+        state.next_id += 1
+    state.codes = new_codes
+    state.version += 1
+    payload = {
+        'version': state.version,
+        'base': state.version - 1,
+        'statuses': statuses,
+        'remove': removed_ids,
+        'add': [[state.row_ids[name], name, *split_display_name(name), list(new_codes[name])] for name in added],
+        'set': changed_cells
+    }
+    return payload, state
+
+def render_matrix(
+    bot_hour_status: Dict[str, Dict[int, str]],
+    display_names: List[str],
+    hours: List[int],
+    status_emoji: Callable[[str], str],
+    height: int = 600,
+    key: str = 'bot_matrix'
+) -> Optional[Tuple[str, Optional[int]]]:
+    """
+    Render the matrix with the delta-aware component.
+
+    The state of the browser is tracked per session in ``st.session_state``
+    (a page reload starts a new session, and with it a full payload).
+
+    Args:
+        bot_hour_status: Matrix statuses, {display_name: {hour: status}}
+        display_names: Display names to show
+        hours: Hour columns
+        status_emoji: Emoji for a status
+        height: Height of the component in pixels (the table scrolls inside it)
+        key: Component key; the browser state is kept under ``<key>_sent``
+
+    Returns:
+        tuple or None: (display_name, hour) of the clicked cell, hour None for a row label,
+        or None when nothing is selected
+    """
+    state_key = f"{key}_sent"
+    sent = st.session_state.get(state_key)
+    value = st.session_state.get(key) or {}
+    full_request = value.get('full_request')
+    full = sent is not None and full_request is not None and full_request != sent.full_request
+    if full:
+        logger.info("Browser missed a matrix update, sending the full matrix")
+    payload, state = build_payload(sent, bot_hour_status, display_names, hours, status_emoji, full=full)
+    state.full_request = full_request
+    st.session_state[state_key] = state
+
+    value = _matrix_component()(payload=payload, height=height, key=key, default=None) or {}
+    selected = value.get('row')
+    if selected is None or selected not in bot_hour_status:
+        return None
+    hour = value.get('hour')
+    return selected, (int(hour) if hour is not None else None)
@@ -0,0 +1,413 @@
+"""
+Prometheus-format metrics for the Bot Monitoring Dashboard
+Counters, gauges and histograms exported as a text file and/or a local HTTP endpoint
+"""
+
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+logger = logging.getLogger('metrics')
+
+# Latency buckets in seconds, from cache hits to month-long DB queries
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric:
+    """Base class for labelled metrics; each label combination is a child series"""
+
+    metric_type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def labels(self, *values, **kwargs):
+        """Return the child series for a label combination"""
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        key = tuple(str(v) for v in values)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = self._new_child()
+            return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        lines.extend(self._samples())
+        return '\n'.join(lines)
+
+class _Value:
+    __slots__ = ('value', 'function', '_lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self.function: Optional[Callable[[], float]] = None
+        # Incremented from the DB fetch workers and the API thread pool
+        self._lock = threading.Lock()
+
+    def get(self) -> float:
+        if self.function is not None:
+            try:
+                return float(self.function())
+            except Exception:
+                return float('nan')
+        return self.value
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    metric_type = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def _samples(self):
+        for key, child in list(self._children.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.get())}"
+
+class _CounterChild(_Value):
+    __slots__ = ()
+
+    def inc(self, amount: float = 1) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        with self._lock:
+            self.value += amount
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read the count from an existing counter (e.g. cache hit statistics) at scrape time"""
+        self.function = function
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    metric_type = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self.labels().set_function(function)
+
+    def _samples(self):
+        for key, child in list(self._children.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.get())}"
+
+class _GaugeChild(_Value):
+    __slots__ = ()
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self.value = float(value)
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self.function = function
+
+class Histogram(_Metric):
+    """Bucketed distribution of observations with cumulative bucket counts"""
+
+    metric_type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def _samples(self):
+        for key, child in list(self._children.items()):
+            cumulative = 0
+            counts, total, count = child.snapshot()
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ('le', _format_value(bound)))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+class _HistogramChild:
+    __slots__ = ('buckets', 'counts', 'total', 'count', '_lock')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+            self.total += value
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.total, self.count
+
+    def time(self):
+        return _Timer(self)
+
+class _Timer:
+    """Context manager observing the elapsed wall time in seconds"""
+
+    def __init__(self, child: _HistogramChild):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.start)
+        return False
+
+class MetricsRegistry:
+    """Collection of metrics rendered together in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+    def write_textfile(self, path: str) -> None:
+        """Atomically write the metrics to a file (e.g. for the node_exporter textfile collector)"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+class SessionTracker:
+    """Tracks dashboard sessions by last activity to report the number of active sessions"""
+
+    def __init__(self, window_seconds: float = 900):
+        self.window_seconds = window_seconds
+        self._last_seen: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def touch(self, session_id: str) -> None:
+        with self._lock:
+            self._last_seen[session_id] = time.monotonic()
+
+    def active(self) -> int:
+        cutoff = time.monotonic() - self.window_seconds
+        with self._lock:
+            for session_id in [s for s, seen in self._last_seen.items() if seen < cutoff]:
+                del self._last_seen[session_id]
+            return len(self._last_seen)
+
+REGISTRY = MetricsRegistry()
+
+# Data source
+DB_QUERY_SECONDS = REGISTRY.histogram(
+    'bot_dashboard_db_query_duration_seconds', 'Duration of SQL Server queries including fetch', ['query'])
+DB_ROWS_FETCHED = REGISTRY.counter(
+    'bot_dashboard_db_rows_fetched_total', 'Rows fetched from SQL Server', ['query'])
+DB_ERRORS = REGISTRY.counter(
+    'bot_dashboard_db_errors_total', 'Failed database connections or queries')
+DB_PARTITION_RETRIES = REGISTRY.counter(
+    'bot_dashboard_db_partition_retries_total', 'Partition queries of the history fetch retried after an error')
+DB_PARTITION_FAILURES = REGISTRY.counter(
+    'bot_dashboard_db_partition_failures_total', 'Partition queries of the history fetch that failed after all retries')
+CSV_FALLBACKS = REGISTRY.counter(
+    'bot_dashboard_csv_fallback_total', 'Times data was loaded from CSV (or sample data) instead of the database', ['reason'])
+
+# Processing and caches
+ROWS_PROCESSED = REGISTRY.counter(
+    'bot_dashboard_rows_processed_total', 'Raw rows run through the processing pipeline')
+ROWS_REJECTED = REGISTRY.counter(
+    'bot_dashboard_rows_rejected_total', 'Raw rows rejected by validation', ['reason'])
+CACHE_REQUESTS = REGISTRY.counter(
+    'bot_dashboard_cache_requests_total', 'Cache lookups by cache and result', ['cache', 'result'])
+CACHE_HIT_RATIO = REGISTRY.gauge(
+    'bot_dashboard_cache_hit_ratio', 'Fraction of cache lookups served from cache since start', ['cache'])
+
+# Reruns and rendering
+RERUN_SECONDS = REGISTRY.histogram(
+    'bot_dashboard_rerun_duration_seconds', 'Wall time of a full dashboard rerun')
+STAGE_SECONDS = REGISTRY.histogram(
+    'bot_dashboard_stage_duration_seconds', 'Wall time of instrumented pipeline stages', ['stage'])
+MATRIX_ROWS = REGISTRY.histogram(
+    'bot_dashboard_matrix_rows', 'Bots (rows) in rendered hourly matrices', buckets=(0, 10, 25, 50, 100, 200, 300, 500, 1000))
+MATRIX_CELLS = REGISTRY.gauge(
+    'bot_dashboard_matrix_cells', 'Cells in the most recently rendered hourly matrix')
+ACTIVE_SESSIONS = REGISTRY.gauge(
+    'bot_dashboard_active_sessions', 'Sessions with a rerun in the last 15 minutes')
+
+# Headless alerting (alerts.py)
+ALERTS_EMITTED = REGISTRY.counter(
+    'bot_dashboard_alerts_total', 'Alerts raised by the failure alert evaluator', ['rule'])
+ALERT_DETECTION_SECONDS = REGISTRY.histogram(
+    'bot_dashboard_alert_detection_seconds', 'Time from a run completing to the alert it raised being emitted')
+ALERT_POLL_SECONDS = REGISTRY.histogram(
+    'bot_dashboard_alert_poll_duration_seconds', 'Duration of one alert evaluator poll (fetch and evaluation)')
+ALERT_SINK_ERRORS = REGISTRY.counter(
+    'bot_dashboard_alert_sink_errors_total', 'Alert batches a sink failed to deliver', ['sink'])
+
+# JSON/Arrow API (api.py)
+API_REQUESTS = REGISTRY.counter(
+    'bot_dashboard_api_requests_total', 'API requests by route and response code', ['route', 'code'])
+API_REQUEST_SECONDS = REGISTRY.histogram(
+    'bot_dashboard_api_request_duration_seconds', 'Time to answer an API request, 304s included', ['route'])
+
+SESSIONS = SessionTracker()
+ACTIVE_SESSIONS.set_function(SESSIONS.active)
+
+def register_cache(name: str, cache) -> None:
+    """
+    Export hit/miss counts and hit ratio of a cache exposing ``hits`` and ``misses`` attributes.
+
+    Args:
+        name: Value of the ``cache`` label
+        cache: PartitionCache, MatrixCache or any object with hits/misses counters
+    """
+    CACHE_REQUESTS.labels(name, 'hit').set_function(lambda: cache.hits)
+    CACHE_REQUESTS.labels(name, 'miss').set_function(lambda: cache.misses)
+
+    def ratio():
+        total = cache.hits + cache.misses
+        return cache.hits / total if total else 0.0
+    CACHE_HIT_RATIO.labels(name).set_function(ratio)
+
+def observe_stage(record) -> None:
+    """PerfRecorder listener mapping stage records onto the stage and rerun histograms"""
+    seconds = record.duration_ms / 1000
+    if record.stage == 'rerun':
+        RERUN_SECONDS.observe(seconds)
+    else:
+        STAGE_SECONDS.labels(record.stage).observe(seconds)
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+_server_lock = threading.Lock()
+_server: Optional[ThreadingHTTPServer] = None
+
+def start_http_server(port: int, addr: str = '127.0.0.1') -> Optional[ThreadingHTTPServer]:
+    """
+    Serve /metrics on a background thread (once per process).
+
+    Returns:
+        The running server, or None if the port could not be bound
+    """
+    global _server
+    with _server_lock:
+        if _server is not None:
+            return _server
+        try:
+            _server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+        except OSError as e:
+            logger.warning(f"Could not start metrics endpoint on {addr}:{port}: {e}")
+            return None
+        thread = threading.Thread(target=_server.serve_forever, name='metrics-http', daemon=True)
+        thread.start()
+        logger.info(f"Serving Prometheus metrics on http://{addr}:{port}/metrics")
+        return _server
+
+def start_exporters_from_env() -> None:
+    """Start the HTTP endpoint if METRICS_PORT is set (METRICS_ADDR defaults to 127.0.0.1)"""
+    port = os.getenv('METRICS_PORT')
+    if port:
+        try:
+            start_http_server(int(port), os.getenv('METRICS_ADDR', '127.0.0.1'))
+        except ValueError:
+            logger.warning(f"Invalid METRICS_PORT: {port}")
+
+def write_textfile_from_env() -> None:
+    """Write the metrics text file if METRICS_TEXTFILE is set"""
+    path = os.getenv('METRICS_TEXTFILE')
+    if path:
+        try:
+            REGISTRY.write_textfile(path)
+        except Exception as e:
+            logger.warning(f"Could not write metrics text file {path}: {e}")
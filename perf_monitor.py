@@ -0,0 +1,286 @@
+"""
+Lightweight per-stage performance instrumentation for the Bot Monitoring Dashboard
+Records wall time, row counts and memory delta of each pipeline stage in ring buffers,
+and optionally captures cProfile profiles of slow reruns
+"""
+
+import cProfile
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Deque, Dict, Iterable, List, Optional
+
+logger = logging.getLogger('perf_monitor')
+
+# Number of stage records kept for the whole process and per session
+PROCESS_BUFFER_SIZE = 2000
+SESSION_BUFFER_SIZE = 200
+
+try:
+    import psutil
+    _PROCESS = psutil.Process()
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    _PROCESS = None
+    PSUTIL_AVAILABLE = False
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+def current_rss() -> Optional[int]:
+    """Return the current resident set size in bytes, or None if it cannot be read cheaply"""
+    if _PROCESS is not None:
+        try:
+            return _PROCESS.memory_info().rss
+        except Exception:
+            return None
+    try:
+        # Linux fallback without psutil: second field of statm is resident pages
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+class StageRecord:
+    """Timing, row counts and memory delta of one stage execution"""
+
+    __slots__ = ('stage', 'started_at', 'duration_ms', 'rows_in', 'rows_out', 'mem_delta_bytes', 'session_id', 'error')
+
+    def __init__(self, stage: str, rows_in: Optional[int] = None, session_id: Optional[str] = None):
+        self.stage = stage
+        self.started_at = datetime.now()
+        self.duration_ms = 0.0
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.mem_delta_bytes = None
+        self.session_id = session_id
+        self.error = None
+
+    def to_dict(self) -> Dict:
+        return {
+            'stage': self.stage,
+            'started_at': self.started_at,
+            'duration_ms': round(self.duration_ms, 2),
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'mem_delta_mb': None if self.mem_delta_bytes is None else round(self.mem_delta_bytes / 2**20, 2),
+            'error': self.error
+        }
+
+class PerfRecorder:
+    """
+    Process-wide ring buffer of stage records.
+
+    Appending to a bounded deque is O(1) and thread-safe, so the recorder can
+    stay enabled in production; the only per-stage overhead is two clock reads
+    and two RSS reads.
+    """
+
+    def __init__(self, maxlen: int = PROCESS_BUFFER_SIZE):
+        self.records: Deque[StageRecord] = deque(maxlen=maxlen)
+        self.enabled = True
+        self._listeners: List[Callable[[StageRecord], None]] = []
+
+    def add_listener(self, callback: Callable[[StageRecord], None]) -> None:
+        """Register a callback invoked with every completed stage record (e.g. a metrics exporter)"""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def add(self, record: StageRecord, session_buffer: Optional[Deque] = None) -> None:
+        self.records.append(record)
+        if session_buffer is not None:
+            session_buffer.append(record)
+        for callback in self._listeners:
+            try:
+                callback(record)
+            except Exception as e:
+                logger.error(f"Perf listener failed: {e}")
+
+    @contextmanager
+    def stage(self, name: str, rows_in: Optional[int] = None, session_buffer: Optional[Deque] = None,
+              session_id: Optional[str] = None):
+        """
+        Time a block of code as a named stage.
+
+        Usage:
+            with PERF.stage('filter_data_by_date', rows_in=len(df)) as rec:
+                filtered = filter_data_by_date(df, ...)
+                rec.rows_out = len(filtered)
+
+        Args:
+            name: Stage name shown in the performance panel
+            rows_in: Rows entering the stage, if known
+            session_buffer: Optional per-session ring buffer to record into as well
+            session_id: Optional session identifier stored with the record
+        """
+        record = StageRecord(name, rows_in=rows_in, session_id=session_id)
+        if not self.enabled:
+            yield record
+            return
+        rss_before = current_rss()
+        start = time.perf_counter()
+        try:
+            yield record
+        except BaseException as e:
+            record.error = type(e).__name__
+            raise
+        finally:
+            record.duration_ms = (time.perf_counter() - start) * 1000
+            rss_after = current_rss()
+            if rss_before is not None and rss_after is not None:
+                record.mem_delta_bytes = rss_after - rss_before
+            self.add(record, session_buffer)
+            logger.debug(f"Stage {name}: {record.duration_ms:.1f} ms, rows {record.rows_in} -> {record.rows_out}")
+
+    def summary(self, records: Optional[Iterable[StageRecord]] = None) -> List[Dict]:
+        """
+        Aggregate records per stage.
+
+        Returns:
+            list: One dict per stage with count, mean/p50/p95/max duration and mean rows out
+        """
+        by_stage: Dict[str, List[StageRecord]] = {}
+        for record in list(self.records if records is None else records):
+            by_stage.setdefault(record.stage, []).append(record)
+
+        summary = []
+        for stage, stage_records in by_stage.items():
+            durations = sorted(r.duration_ms for r in stage_records)
+            rows_out = [r.rows_out for r in stage_records if r.rows_out is not None]
+            summary.append({
+                'stage': stage,
+                'count': len(durations),
+                'mean_ms': round(sum(durations) / len(durations), 2),
+                'p50_ms': round(_percentile(durations, 50), 2),
+                'p95_ms': round(_percentile(durations, 95), 2),
+                'max_ms': round(durations[-1], 2),
+                'mean_rows_out': round(sum(rows_out) / len(rows_out)) if rows_out else None
+            })
+        return summary
+
+def _percentile(sorted_values: List[float], percentile: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(percentile / 100 * len(sorted_values)) - 1
+    return sorted_values[max(0, min(rank, len(sorted_values) - 1))]
+
+def new_session_buffer() -> Deque[StageRecord]:
+    """Create a ring buffer for one session's stage records"""
+    return deque(maxlen=SESSION_BUFFER_SIZE)
+
+class SlowRerunProfiler:
+    """
+    Captures a cProfile profile of reruns slower than a threshold.
+
+    A rerun cannot be profiled after the fact, so while enabled every rerun
+    runs under cProfile and the profile is only written when the rerun took at
+    least ``threshold_ms``. Each capture is a ``.prof`` file (open with pstats
+    or snakeviz) plus a ``.json`` sidecar with the filter state and row counts
+    of that rerun. Only the newest ``keep`` captures are kept in ``directory``.
+    One rerun is profiled at a time; concurrent reruns run unprofiled.
+    """
+
+    def __init__(self, threshold_ms: Optional[float] = None, directory: str = 'profiles', keep: int = 20):
+        self.threshold_ms = threshold_ms
+        self.directory = directory
+        self.keep = keep
+        self._busy = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'SlowRerunProfiler':
+        """Configure from PROFILE_SLOW_RERUNS_MS (unset disables), PROFILE_DIR and PROFILE_KEEP"""
+        threshold = os.getenv('PROFILE_SLOW_RERUNS_MS')
+        try:
+            threshold_ms = float(threshold) if threshold else None
+        except ValueError:
+            logger.warning(f"Invalid PROFILE_SLOW_RERUNS_MS: {threshold}, slow rerun profiling disabled")
+            threshold_ms = None
+        return cls(threshold_ms=threshold_ms,
+                   directory=os.getenv('PROFILE_DIR', 'profiles'),
+                   keep=int(os.getenv('PROFILE_KEEP', '20')))
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms is not None
+
+    @contextmanager
+    def profile(self, context: Optional[Callable[[datetime], Dict]] = None):
+        """
+        Profile a block of code and keep the profile if it was slow.
+
+        Args:
+            context: Called with the rerun start time after the block finished;
+                returns the JSON-serializable details stored in the sidecar
+        """
+        if not self.enabled or not self._busy.acquire(blocking=False):
+            yield
+            return
+        started_at = datetime.now()
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+            duration_ms = (time.perf_counter() - start) * 1000
+            if duration_ms >= self.threshold_ms:
+                self._save(profiler, started_at, duration_ms, context)
+        finally:
+            self._busy.release()
+
+    def _save(self, profiler: cProfile.Profile, started_at: datetime, duration_ms: float,
+              context: Optional[Callable[[datetime], Dict]]) -> None:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            base = os.path.join(self.directory, f"rerun_{started_at:%Y%m%d_%H%M%S_%f}_{duration_ms:.0f}ms")
+            profiler.dump_stats(f"{base}.prof")
+
+            details = {
+                'started_at': started_at.isoformat(),
+                'duration_ms': round(duration_ms, 2),
+                'threshold_ms': self.threshold_ms,
+                'pid': os.getpid()
+            }
+            if context is not None:
+                try:
+                    details.update(context(started_at))
+                except Exception as e:
+                    details['context_error'] = str(e)
+            with open(f"{base}.json", 'w') as f:
+                json.dump(details, f, indent=2, default=str)
+
+            logger.warning(f"Slow rerun ({duration_ms:.0f} ms >= {self.threshold_ms:.0f} ms), profile saved to {base}.prof")
+            self._rotate()
+        except Exception as e:
+            logger.error(f"Could not save slow rerun profile: {e}")
+
+    def _rotate(self) -> None:
+        """Delete the oldest captures beyond the retention limit"""
+        profiles = sorted(
+            (name for name in os.listdir(self.directory) if name.startswith('rerun_') and name.endswith('.prof')),
+            reverse=True
+        )
+        for name in profiles[self.keep:]:
+            base = os.path.join(self.directory, name[:-len('.prof')])
+            for path in (f"{base}.prof", f"{base}.json"):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+# Process-wide recorder shared by all sessions
+PERF = PerfRecorder()
+
+# Slow rerun profiler, off unless PROFILE_SLOW_RERUNS_MS is set
+SLOW_RERUN_PROFILER = SlowRerunProfiler.from_env()
@@ -0,0 +1,352 @@
+"""
+Static reports of the Bot Monitoring Dashboard
+Renders the hourly matrix and project metrics of one day for every project, owner and
+project/owner pair to HTML and CSV, without a Streamlit server
+
+The day is loaded and processed once; a pool of worker processes shares the
+processed frame and renders the combinations in parallel.
+
+Usage:
+    python reports.py --output reports                      # latest day, data from get_flow_data
+    python reports.py --date 2025-01-01 --csv --workers 4
+    python reports.py --input data/flow_data_synthetic.csv --no-cross
+"""
+
+import argparse
+import html
+import logging
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from data_processing.processors import process_partition, refresh_flow_mapping, SCHEDULE_INDEX
+from data_processing.query_engine import pandas_aggregates
+
+logger = logging.getLogger('reports')
+
+ALL_PROJECTS, ALL_OWNERS = 'All Projects', 'All Owners'
+
+# Cell colors of the matrix, by status (statuses not listed use "No Run")
+STATUS_COLORS = {
+    "Succeeded": "#43a047",
+    "Completed": "#43a047",
+    "Failed": "#e53935",
+    "Error": "#e53935",
+    "TimedOut": "#e53935",
+    "Running": "#fdd835",
+    "Canceled": "#424242",
+    "Cancelled": "#424242",
+    "Suspended": "#1e88e5",
+    "Missed": "#fb8c00",
+    "Skipped": "#eeeeee",
+    "No Run": "#eeeeee",
+}
+
+# Column headings of the metric tables
+COLUMN_LABELS = {
+    'automation_project': 'Automation Project',
+    'runs': 'Runs',
+    'success_rate': 'Success Rate',
+    'failure_rate': 'Failure Rate',
+    'unique_flows': 'Flows',
+    'flowname': 'Cloud Flow',
+    'failed_runs': 'Failed Runs',
+}
+
+# One CSS class per color, so every cell is a few bytes of HTML
+_COLOR_CLASSES = {color: f"c{i}" for i, color in enumerate(dict.fromkeys(STATUS_COLORS.values()))}
+_STATUS_CLASSES = {status: _COLOR_CLASSES[color] for status, color in STATUS_COLORS.items()}
+
+STYLE = """
+body { font-family: -apple-system, Segoe UI, Roboto, sans-serif; margin: 24px; color: #212121; }
+table { border-collapse: collapse; font-size: 13px; }
+th, td { border: 1px solid #e0e0e0; padding: 3px 6px; text-align: left; }
+th { background: #fafafa; }
+td.n { text-align: right; }
+.matrix td.h { width: 14px; padding: 0; }
+.summary span { display: inline-block; margin-right: 24px; }
+.legend span { display: inline-block; margin-right: 12px; }
+.legend i { display: inline-block; width: 12px; height: 12px; margin-right: 4px; vertical-align: middle; }
+""" + "".join(f".{cls} {{ background: {color}; }}\n" for color, cls in _COLOR_CLASSES.items())
+
+# State of a worker process, set once by _init_worker
+_WORKER: Dict = {}
+
+def _slug(value: str) -> str:
+    return re.sub(r'[^A-Za-z0-9]+', '-', value).strip('-').lower() or 'unnamed'
+
+def report_name(project: str, owner: str) -> str:
+    """File name stem of a combination's report"""
+    parts = [f"project-{_slug(project)}" if project != ALL_PROJECTS else 'all-projects',
+             f"owner-{_slug(owner)}" if owner != ALL_OWNERS else 'all-owners']
+    return '__'.join(parts)
+
+def report_combinations(processed_df: pd.DataFrame, cross: bool = True) -> List[Tuple[str, str]]:
+    """
+    Filter selections to render: everything, each project, each owner and (with ``cross``)
+    every project/owner pair that has runs.
+    """
+    projects = sorted(processed_df['automation_project'].unique().tolist())
+    owners = sorted(processed_df['owner'].unique().tolist())
+    combinations = [(ALL_PROJECTS, ALL_OWNERS)]
+    combinations += [(project, ALL_OWNERS) for project in projects]
+    combinations += [(ALL_PROJECTS, owner) for owner in owners]
+    if cross:
+        pairs = processed_df.groupby(['automation_project', 'owner'], sort=True).size().index
+        # A pair whose runs are all of one project (or owner) is the same report as that project (or owner)
+        project_owners = processed_df.groupby('automation_project')['owner'].nunique()
+        owner_projects = processed_df.groupby('owner')['automation_project'].nunique()
+        combinations += [(project, owner) for project, owner in pairs
+                         if project_owners[project] > 1 and owner_projects[owner] > 1]
+    return combinations
+
+def _init_worker(state: Dict) -> None:
+    """Keep the shared state in the worker and index the processed frame by project and owner"""
+    logging.disable(logging.WARNING)
+    processed_df = state['processed_df']
+    _WORKER.update(state)
+    _WORKER['project_rows'] = processed_df.groupby('automation_project', sort=False).indices
+    _WORKER['owner_rows'] = processed_df.groupby('owner', sort=False).indices
+
+def _combination_rows(project: str, owner: str) -> np.ndarray:
+    processed_df = _WORKER['processed_df']
+    rows = np.arange(len(processed_df))
+    if project != ALL_PROJECTS:
+        rows = _WORKER['project_rows'].get(project, rows[:0])
+    if owner != ALL_OWNERS:
+        # groupby indices are sorted, so the intersection keeps the frame order
+        rows = np.intersect1d(rows, _WORKER['owner_rows'].get(owner, rows[:0]), assume_unique=True)
+    return rows
+
+def _matrix_csv_frame(bot_hour_status: Dict[str, Dict[int, str]], display_names: List[str],
+                      hours: List[int]) -> pd.DataFrame:
+    columns = {'display_name': display_names}
+    for hour in hours:
+        columns[f"{hour:02d}:00"] = [bot_hour_status[name].get(hour, "No Run") for name in display_names]
+    return pd.DataFrame(columns)
+
+def _table_html(frame: pd.DataFrame, percent_columns=()) -> str:
+    head = ''.join(f"<th>{html.escape(str(column))}</th>" for column in frame.columns)
+    rows = []
+    for values in frame.itertuples(index=False, name=None):
+        cells = []
+        for column, value in zip(frame.columns, values):
+            if column in percent_columns:
+                cells.append(f'<td class="n">{value:.1%}</td>')
+            elif isinstance(value, (int, np.integer)):
+                cells.append(f'<td class="n">{value:,}</td>')
+            else:
+                cells.append(f"<td>{html.escape(str(value))}</td>")
+        rows.append(f"<tr>{''.join(cells)}</tr>")
+    return f"<table><tr>{head}</tr>{''.join(rows)}</table>"
+
+def _matrix_html(bot_hour_status: Dict[str, Dict[int, str]], display_names: List[str], hours: List[int]) -> str:
+    no_run = _STATUS_CLASSES["No Run"]
+    head = ''.join(f"<th>{hour:02d}</th>" for hour in hours)
+    rows = []
+    for name in sorted(display_names):
+        statuses = bot_hour_status[name]
+        cells = ''.join(f'<td class="h {_STATUS_CLASSES.get(statuses.get(hour), no_run)}"></td>' for hour in hours)
+        owner, _, rest = name.partition(" | ")
+        project, _, flow = rest.partition(" | ")
+        rows.append(f"<tr><td>{html.escape(owner)}</td><td>{html.escape(project)}</td>"
+                    f"<td>{html.escape(flow or rest)}</td>{cells}</tr>")
+    return (f'<table class="matrix"><tr><th>Owner</th><th>Automation Project</th><th>Cloud Flow</th>{head}</tr>'
+            f"{''.join(rows)}</table>")
+
+def _legend_html() -> str:
+    return '<p class="legend">' + ''.join(
+        f'<span><i class="{_STATUS_CLASSES[status]}"></i>{html.escape(status)}</span>'
+        for status in ("Succeeded", "Failed", "Running", "Canceled", "Suspended", "Missed", "No Run")) + '</p>'
+
+def _page(title: str, body: str) -> str:
+    return (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{html.escape(title)}</title>'
+            f"<style>{STYLE}</style></head><body>{body}</body></html>")
+
+def render_report(project: str, owner: str, name: str) -> Dict:
+    """
+    Render one combination to ``name``.html, ``name``_matrix.csv and ``name``_metrics.csv (runs in a worker).
+
+    Returns:
+        dict: Summary of the report for the index page
+    """
+    started = time.perf_counter()
+    day, output_dir = _WORKER['day'], _WORKER['output_dir']
+    filtered_df = _WORKER['processed_df'].iloc[_combination_rows(project, owner)]
+    aggregates = pandas_aggregates(filtered_df, day, selected_project=project, selected_owner=owner,
+                                   max_rows=_WORKER['max_rows'])
+    bot_hour_status, display_names, hours = aggregates.matrix
+    bot_hour_status = _WORKER['schedule_index'].mark_missed(bot_hour_status, display_names, day,
+                                                            _WORKER['current_hour'])
+    missed = sum(1 for name in display_names for status in bot_hour_status[name].values() if status == "Missed")
+
+    runs = len(filtered_df)
+    success_rate = float(filtered_df['wassuccessful'].mean())
+    failed = int((filtered_df['taskstatus'] == 'Failed').sum())
+    project_stats = aggregates.project_stats.reset_index()
+    top_failing = aggregates.top_failing.reset_index()
+
+    _matrix_csv_frame(bot_hour_status, display_names, hours).to_csv(
+        os.path.join(output_dir, f"{name}_matrix.csv"), index=False)
+    project_stats.to_csv(os.path.join(output_dir, f"{name}_metrics.csv"), index=False)
+
+    title = f"{project} / {owner} - {day}"
+    body = [
+        f'<p><a href="index.html">All reports</a></p><h1>{html.escape(title)}</h1>',
+        f'<p class="summary"><span>Runs: <b>{runs:,}</b></span><span>Success rate: <b>{success_rate:.1%}</b></span>'
+        f'<span>Failed: <b>{failed:,}</b></span><span>Missed: <b>{missed:,}</b></span>'
+        f'<span>Bots: <b>{len(display_names):,}</b></span></p>',
+        '<h2>Project Metrics</h2>',
+        _table_html(project_stats.rename(columns=COLUMN_LABELS), percent_columns=('Success Rate', 'Failure Rate')),
+    ]
+    if not top_failing.empty:
+        body += ['<h2>Top Failing Flows</h2>', _table_html(top_failing.rename(columns=COLUMN_LABELS))]
+    body += ['<h2>Bot Activity Matrix</h2>', _legend_html(), _matrix_html(bot_hour_status, display_names, hours),
+             f'<p><a href="{name}_matrix.csv">Matrix (CSV)</a> &middot; <a href="{name}_metrics.csv">Metrics (CSV)</a></p>']
+    with open(os.path.join(output_dir, f"{name}.html"), 'w', encoding='utf-8') as f:
+        f.write(_page(title, ''.join(body)))
+
+    return {'project': project, 'owner': owner, 'name': name, 'runs': runs, 'success_rate': success_rate,
+            'failed': failed, 'missed': missed, 'bots': len(display_names),
+            'seconds': time.perf_counter() - started}
+
+def _render_task(task: Tuple[str, str, str]) -> Dict:
+    return render_report(*task)
+
+def write_index(summaries: List[Dict], day: date, output_dir: str) -> str:
+    """Index page linking every report, with its headline numbers"""
+    rows = ''.join(
+        f'<tr><td><a href="{summary["name"]}.html">{html.escape(summary["project"])}</a></td>'
+        f'<td>{html.escape(summary["owner"])}</td><td class="n">{summary["runs"]:,}</td>'
+        f'<td class="n">{summary["success_rate"]:.1%}</td><td class="n">{summary["failed"]:,}</td>'
+        f'<td class="n">{summary["missed"]:,}</td><td class="n">{summary["bots"]:,}</td></tr>'
+        for summary in summaries)
+    body = (f"<h1>Bot Monitoring Reports - {day}</h1>"
+            f"<p>{len(summaries)} reports generated {datetime.now():%Y-%m-%d %H:%M}</p>"
+            "<table><tr><th>Project</th><th>Owner</th><th>Runs</th><th>Success Rate</th><th>Failed</th>"
+            f"<th>Missed</th><th>Bots</th></tr>{rows}</table>")
+    path = os.path.join(output_dir, 'index.html')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(_page(f"Bot Monitoring Reports - {day}", body))
+    pd.DataFrame(summaries).drop(columns=['seconds']).to_csv(os.path.join(output_dir, 'index.csv'), index=False)
+    return path
+
+def load_history(input_path: Optional[str] = None, use_csv: bool = False) -> pd.DataFrame:
+    """Raw run history from a CSV/Parquet file, or from the dashboard's data sources"""
+    if input_path:
+        df = pd.read_parquet(input_path) if input_path.endswith('.parquet') else pd.read_csv(input_path)
+    else:
+        from secure_db_connection import get_flow_data
+        df = get_flow_data(use_csv=use_csv)
+    if df is None or df.empty:
+        raise ValueError("No flow run data available")
+    df['datetimestarted'] = pd.to_datetime(df['datetimestarted'])
+    return df
+
+def generate_reports(
+    history: pd.DataFrame,
+    output_dir: str,
+    day: Optional[date] = None,
+    workers: Optional[int] = None,
+    cross: bool = True,
+    max_rows: int = 300
+) -> List[Dict]:
+    """
+    Render every report of a day.
+
+    Args:
+        history: Raw run history (the day's rows, plus earlier days for the missed-run schedule)
+        output_dir: Directory the day's reports are written to (created if needed)
+        day: Day to report on (defaults to the latest day of ``history``)
+        workers: Worker processes (defaults to the CPU count; 0 renders in this process)
+        cross: Also render every project/owner pair
+        max_rows: Maximum number of matrix rows per report
+
+    Returns:
+        list: One summary per report, in index order
+    """
+    started = history['datetimestarted']
+    day = day or started.dt.date.max()
+    day_start = pd.Timestamp(day)
+    day_rows = history[(started >= day_start) & (started < day_start + pd.Timedelta(days=1))]
+    if day_rows.empty:
+        raise ValueError(f"No runs on {day}")
+
+    refresh_flow_mapping()
+    processed_df = process_partition(day_rows, day)
+    SCHEDULE_INDEX.refresh(history, day)
+    combinations = report_combinations(processed_df, cross=cross)
+
+    os.makedirs(output_dir, exist_ok=True)
+    names, tasks = set(), []
+    for project, owner in combinations:
+        name = base = report_name(project, owner)
+        suffix = 1
+        while name in names:
+            suffix += 1
+            name = f"{base}-{suffix}"
+        names.add(name)
+        tasks.append((project, owner, name))
+
+    state = {
+        'processed_df': processed_df,
+        'schedule_index': SCHEDULE_INDEX,
+        'day': day,
+        'current_hour': datetime.now().hour if day == date.today() else None,
+        'output_dir': output_dir,
+        'max_rows': max_rows,
+    }
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    workers = min(workers, len(tasks))
+    if workers <= 1:
+        _init_worker(state)
+        try:
+            summaries = [_render_task(task) for task in tasks]
+        finally:
+            logging.disable(logging.NOTSET)
+    else:
+        # fork shares the processed frame with the workers without pickling it
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker, initargs=(state,)) as pool:
+            summaries = list(pool.map(_render_task, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+    write_index(summaries, day, output_dir)
+    return summaries
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the matrix and project metrics of every project and owner "
+                                                 "to static HTML and CSV")
+    parser.add_argument('--output', default='reports', help="Directory the reports are written to (one folder per day)")
+    parser.add_argument('--date', type=date.fromisoformat, help="Day to report on (YYYY-MM-DD, default latest)")
+    parser.add_argument('--input', help="Read runs from a CSV or Parquet file instead of the data sources")
+    parser.add_argument('--csv', action='store_true', help="Read from CSV instead of the database")
+    parser.add_argument('--workers', type=int, help="Worker processes (default CPU count, 0 for none)")
+    parser.add_argument('--cross', action=argparse.BooleanOptionalAction, default=True,
+                        help="Also render every project/owner pair")
+    parser.add_argument('--max-rows', type=int, default=300, help="Maximum matrix rows per report")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    history = load_history(args.input, use_csv=args.csv)
+    loaded = time.perf_counter()
+    day = args.date or history['datetimestarted'].dt.date.max()
+    output_dir = os.path.join(args.output, day.isoformat())
+    summaries = generate_reports(history, output_dir, day=day, workers=args.workers, cross=args.cross,
+                                 max_rows=args.max_rows)
+    finished = time.perf_counter()
+    print(f"Wrote {len(summaries)} reports for {day} to {output_dir} in {finished - started:.1f}s "
+          f"(load {loaded - started:.1f}s, reports {finished - loaded:.1f}s, "
+          f"{sum(s['seconds'] for s in summaries) / len(summaries) * 1000:.0f} ms per report)")
+    return 0
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    sys.exit(main())
@@ -1,47 +1,102 @@
+import importlib.util
 import os
-import sys
+import numpy as np
 import pandas as pd
 import logging
+import time
+import threading
 import traceback
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
 from typing import Optional, Tuple, Union, List, Dict, Any
 from pathlib import Path
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout)
-    ]
+from metrics import (
+    DB_QUERY_SECONDS, DB_ROWS_FETCHED, DB_ERRORS, DB_PARTITION_RETRIES, DB_PARTITION_FAILURES, CSV_FALLBACKS
 )
+
 logger = logging.getLogger('database_connection')
 
-# Try to import optional dependencies with graceful fallback
-try:
-    import pypyodbc as odbc
-    ODBC_AVAILABLE = True
-    logger.info("ODBC driver available - database connection enabled")
-except ImportError:
+# pypyodbc is only imported by the first connection (see _import_odbc), so dashboards
+# running on CSV or Arrow snapshots never load the driver
+ODBC_AVAILABLE = importlib.util.find_spec('pypyodbc') is not None
+if not ODBC_AVAILABLE:
     logger.warning("ODBC driver (pypyodbc) not available - will use CSV fallback")
-    ODBC_AVAILABLE = False
+
+class odbc:
+    """Stand-in until pypyodbc is imported, so the ``except odbc.Error`` handlers stay valid"""
+    class Error(Exception):
+        pass
 
 try:
     from dotenv import load_dotenv
-    load_dotenv()  # Load environment variables from .env file if present
+    load_dotenv()  # Load environment variables from .env file if present (once per process)
     DOTENV_AVAILABLE = True
 except ImportError:
     logger.warning("python-dotenv not available - using OS environment variables only")
     DOTENV_AVAILABLE = False
 
+# Service accounts and people whose flow runs the dashboard monitors
+FLOW_OWNERS = [
+    'powerautomate', 'powerautomate02 serviceaccount',
+    'powerautomate03 serviceaccount', 'powerautomate04',
+    'powerautomate05', 'powerautomate06', 'powerautomate07',
+    'powerautomate08', 'Ryan Kieselhorst', 'Colin Boyle',
+    'Cheddrick Bagunu', 'Edu Cielo', 'Mohammad Asim'
+]
+
+FLOW_RUN_HISTORY_SELECT = """
+        SELECT
+            FlowGUID as flowguid,
+            FlowName as flowname,
+            CreatedTime as startedon,
+            LastModified as lastmodified,
+            State as state,
+            FlowOwner as flowowner,
+            StartTime as datetimestarted,
+            EndTime as datetimecompleted,
+            TaskStatus as taskstatus,
+            TriggerType as triggertype,
+            CASE WHEN TaskStatus = 'Succeeded' THEN 1 ELSE 0 END as wassuccessful,
+            CASE WHEN TaskStatus = 'Succeeded' THEN 1 ELSE 0 END as finalsuccessful
+        FROM BusinessAnalytics.dbo.rpa_FlowRunHistory
+        """
+
+# Narrow projection for the matrix and summaries; the other columns are loaded per drill-down
+RUN_SUMMARY_SELECT = """
+        SELECT
+            FlowGUID as flowguid,
+            FlowName as flowname,
+            FlowOwner as flowowner,
+            StartTime as datetimestarted,
+            EndTime as datetimecompleted,
+            TaskStatus as taskstatus,
+            TriggerType as triggertype,
+            CASE WHEN TaskStatus = 'Succeeded' THEN 1 ELSE 0 END as wassuccessful
+        FROM BusinessAnalytics.dbo.rpa_FlowRunHistory
+        """
+
+# Columns only the full projection returns
+DETAIL_ONLY_COLUMNS = ('startedon', 'lastmodified', 'state')
+
+# Columns fetched for the history: summary (RUN_SUMMARY_SELECT) or full (FLOW_RUN_HISTORY_SELECT)
+DB_PROJECTIONS = ('summary', 'full')
+
+# Start of the history window, evaluated by the server
+HISTORY_WINDOW_START = "DATEADD(month, -1, GETDATE())"
+
+# How the history fetch is split: none, owner, day or owner_day
+FETCH_PARTITIONINGS = ('none', 'owner', 'day', 'owner_day')
+
+# flowguids per query when re-reading runs by id (SQL Server allows 2100 parameters)
+GUID_CHUNK_SIZE = 1000
+
 def load_environment_variables():
     """
     Load environment variables from .env file or environment
-    Returns True if all required variables are present
+    Returns True if all required variables are present (.env is read once, at import)
     """
-    if DOTENV_AVAILABLE:
-        load_dotenv()
-    
     required_vars = ['DB_SERVER', 'DB_NAME', 'DB_UID', 'DB_PWD']
     missing_vars = [var for var in required_vars if not os.getenv(var)]
     
@@ -86,6 +141,16 @@ def get_connection_string():
             logger.info("No CSV data available. Using sample data.")
             return generate_sample_data()
 
+def _import_odbc():
+    """Import pypyodbc on first use and make it the module's ``odbc``"""
+    global odbc
+    if not isinstance(odbc, type):
+        return odbc
+    import pypyodbc
+    odbc = pypyodbc
+    logger.info("ODBC driver loaded - database connection enabled")
+    return odbc
+
 def create_db_connection():
     """Create database connection with error handling"""
     try:
@@ -99,7 +164,7 @@ def create_db_connection():
         
         # Get connection string and connect
         connection_string = get_connection_string()
-        connection = odbc.connect(connection_string)
+        connection = _import_odbc().connect(connection_string)
         logger.info("Database connection established successfully")
         return connection
     
@@ -130,80 +195,509 @@ def execute_query(connection, query, params=None):
         logger.error(f"Unexpected error during query execution: {e}")
         raise
 
-def generate_sample_data():
+class ConnectionPool:
     """
-    Generate sample data for demonstration when no real data is available
+    Thread-safe pool of database connections shared by reruns and partition queries.
+
+    Connections are handed out most recently used first; a connection that
+    raised while checked out is closed instead of being returned, and idle
+    connections older than ``max_idle_seconds`` are closed on the next checkout.
+    """
+
+    def __init__(self, factory, max_size: int = 4, max_idle_seconds: float = 300):
+        self.factory = factory
+        self.max_size = max_size
+        self.max_idle_seconds = max_idle_seconds
+        self._idle: List[Tuple[Any, float]] = []
+        self._lock = threading.Lock()
+
+    def _close(self, connection) -> None:
+        try:
+            connection.close()
+        except Exception as e:
+            logger.debug(f"Error closing pooled connection: {e}")
+
+    def _checkout(self):
+        cutoff = time.monotonic() - self.max_idle_seconds
+        with self._lock:
+            expired = [c for c, returned_at in self._idle if returned_at < cutoff]
+            self._idle = [(c, returned_at) for c, returned_at in self._idle if returned_at >= cutoff]
+            connection = self._idle.pop()[0] if self._idle else None
+        for stale in expired:
+            self._close(stale)
+        return connection if connection is not None else self.factory()
+
+    def _checkin(self, connection) -> None:
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append((connection, time.monotonic()))
+                return
+        self._close(connection)
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the duration of the block"""
+        connection = self._checkout()
+        try:
+            yield connection
+        except Exception:
+            self._close(connection)
+            raise
+        self._checkin(connection)
+
+    def close_all(self) -> None:
+        """Close every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            self._close(connection)
+
+# Looks create_db_connection up on every call so a replaced factory (e.g. the benchmark stand-in) is used
+CONNECTION_POOL = ConnectionPool(lambda: create_db_connection(), max_size=int(os.getenv('DB_FETCH_WORKERS', '4')))
+
+def history_partitions(partitioning: str = 'owner', now: Optional[datetime] = None) -> List[Tuple[List[str], Optional[datetime], Optional[datetime]]]:
+    """
+    Split the one-month history window into partitions that can be fetched independently.
+
+    Day partitions are half-open [start, end) ranges on local midnights; the
+    first starts at the server-side window start and the last is open-ended,
+    so together they cover exactly the unpartitioned query.
+
+    Args:
+        partitioning: none, owner, day or owner_day
+        now: Current time (defaults to datetime.now())
+
+    Returns:
+        list: (owners, start, end) per partition; None means the server window start or no upper bound
+    """
+    if partitioning not in FETCH_PARTITIONINGS:
+        raise ValueError(f"Unknown fetch partitioning: {partitioning}")
+    owner_groups = [[owner] for owner in FLOW_OWNERS] if partitioning in ('owner', 'owner_day') else [FLOW_OWNERS]
+    ranges = [(None, None)]
+    if partitioning in ('day', 'owner_day'):
+        now = now or datetime.now()
+        first_day = (pd.Timestamp(now) - pd.DateOffset(months=1)).normalize() + pd.Timedelta(days=1)
+        midnights = [ts.to_pydatetime() for ts in pd.date_range(first_day, pd.Timestamp(now).normalize(), freq='D')]
+        bounds = [None] + midnights + [None]
+        ranges = list(zip(bounds[:-1], bounds[1:]))
+    return [(owners, start, end) for owners in owner_groups for start, end in ranges]
+
+def _partition_label(partition) -> str:
+    owners, start, end = partition
+    label = owners[0] if len(owners) == 1 else f"{len(owners)} owners"
+    if start or end:
+        label += f" [{f'{start:%Y-%m-%d}' if start else 'window start'} - {f'{end:%Y-%m-%d}' if end else 'now'})"
+    return label
+
+def _partition_query(partition) -> Tuple[str, list]:
+    owners, start, end = partition
+    conditions = [f"FlowOwner in ({', '.join('?' * len(owners))})",
+                  f"StartTime >= {'?' if start else HISTORY_WINDOW_START}"]
+    params = list(owners) + ([start] if start else [])
+    if end:
+        conditions.append("StartTime < ?")
+        params.append(end)
+    return _history_select() + "WHERE " + "\n        AND ".join(conditions), params
+
+def history_projection() -> str:
+    """Projection of the history fetch, from DB_PROJECTION (summary by default)"""
+    projection = os.getenv('DB_PROJECTION', 'summary')
+    if projection not in DB_PROJECTIONS:
+        logger.warning(f"Unknown DB_PROJECTION {projection!r}, using summary")
+        return 'summary'
+    return projection
+
+def _history_select() -> str:
+    return FLOW_RUN_HISTORY_SELECT if history_projection() == 'full' else RUN_SUMMARY_SELECT
+
+def _guid_queries(select: str, guids: List[str], conditions: str = "", params: Optional[list] = None) -> List[Tuple[str, list]]:
+    """Split a flowguid lookup into one query per GUID_CHUNK_SIZE flowguids"""
+    queries = []
+    for start in range(0, len(guids), GUID_CHUNK_SIZE):
+        chunk = list(guids[start:start + GUID_CHUNK_SIZE])
+        queries.append((f"{select}WHERE {conditions}FlowGUID in ({', '.join('?' * len(chunk))})",
+                        list(params or []) + chunk))
+    return queries
+
+def _fetch_rows(query: str, params: list, label: str, metric_query: str, attempts: int, backoff_seconds: float = 0.5):
+    """Run one query on a pooled connection, retrying it on its own"""
+    for attempt in range(attempts):
+        try:
+            with CONNECTION_POOL.connection() as connection:
+                query_start = time.perf_counter()
+                cursor = execute_query(connection, query, params)
+                columns = [column[0] for column in cursor.description]
+                rows = cursor.fetchall()
+            DB_QUERY_SECONDS.labels(metric_query).observe(time.perf_counter() - query_start)
+            return columns, rows
+        except Exception as e:
+            DB_ERRORS.inc()
+            if attempt + 1 >= attempts:
+                raise
+            DB_PARTITION_RETRIES.inc()
+            logger.warning(f"{label} failed (attempt {attempt + 1} of {attempts}): {e}")
+            time.sleep(backoff_seconds * 2 ** attempt)
+
+def _fetch_partition(partition, attempts: int):
+    query, params = _partition_query(partition)
+    return _fetch_rows(query, params, f"Partition {_partition_label(partition)}", 'flow_run_history_partition', attempts)
+
+def _dedupe_runs(df: pd.DataFrame) -> pd.DataFrame:
+    """Keep one row per flowguid, the most recently modified one"""
+    duplicated = df['flowguid'].notna() & df.duplicated('flowguid', keep=False)
+    if not duplicated.any():
+        return df
+    if 'lastmodified' in df.columns:
+        latest = df.sort_values('lastmodified', kind='stable')
+    else:
+        # Summary projection: a completed version of a run is newer than an open one
+        latest = df.sort_values('datetimecompleted', kind='stable', na_position='first')
+    drop = latest['flowguid'].notna() & latest.duplicated('flowguid', keep='last')
+    logger.info(f"Dropped {int(drop.sum())} duplicate runs")
+    return df.drop(index=latest.index[drop]).reset_index(drop=True)
+
+def fetch_flow_run_history(partitioning: Optional[str] = None, workers: Optional[int] = None,
+                           retries: Optional[int] = None) -> pd.DataFrame:
+    """
+    Fetch the last month of flow runs as concurrent partition queries.
+
+    The window is split by owner and/or day (DB_FETCH_PARTITIONS), the
+    partitions run on a thread pool (DB_FETCH_WORKERS) over pooled connections,
+    and a failed partition is retried on its own (DB_FETCH_RETRIES). Rows are
+    merged in partition order and deduplicated by flowguid, keeping the most
+    recently modified row. Only the summary columns are fetched unless
+    DB_PROJECTION is 'full' (see get_run_details).
+
+    If some partitions still fail the remaining data is returned, with the
+    failed partitions listed in ``df.attrs['failed_partitions']``.
+
+    Args:
+        partitioning: none, owner, day or owner_day (defaults to DB_FETCH_PARTITIONS or owner)
+        workers: Concurrent partition queries (defaults to DB_FETCH_WORKERS or 4)
+        retries: Retries per partition (defaults to DB_FETCH_RETRIES or 2)
+
+    Returns:
+        pandas.DataFrame: Flow run history
+
+    Raises:
+        Exception: If no connection can be made or every partition fails
+    """
+    partitioning = partitioning or os.getenv('DB_FETCH_PARTITIONS', 'owner')
+    workers = workers or int(os.getenv('DB_FETCH_WORKERS', '4'))
+    retries = int(os.getenv('DB_FETCH_RETRIES', '2')) if retries is None else retries
+    partitions = history_partitions(partitioning)
+    
+    # Fail fast (and fall back) when the server is unreachable instead of retrying every partition
+    with CONNECTION_POOL.connection():
+        pass
+    
+    fetch_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(partitions))), thread_name_prefix='db-fetch') as executor:
+        futures = [executor.submit(_fetch_partition, partition, retries + 1) for partition in partitions]
+    
+    columns, records, failed = None, [], []
+    for partition, future in zip(partitions, futures):
+        try:
+            partition_columns, rows = future.result()
+        except Exception as e:
+            DB_PARTITION_FAILURES.inc()
+            failed.append(_partition_label(partition))
+            logger.error(f"Partition {_partition_label(partition)} failed after {retries + 1} attempts: {e}")
+            continue
+        columns = columns or partition_columns
+        records.extend(rows)
+    if columns is None:
+        raise RuntimeError(f"All {len(partitions)} history partitions failed")
+    DB_QUERY_SECONDS.labels('flow_run_history').observe(time.perf_counter() - fetch_start)
+    DB_ROWS_FETCHED.labels('flow_run_history').inc(len(records))
+    
+    df = pd.DataFrame.from_records(records, columns=columns)
+    df.attrs['projection'] = history_projection()
+    
+    # A run seen by two partitions (or modified between their queries) is kept once, latest version wins
+    df = _dedupe_runs(df)
     
+    if failed:
+        df.attrs['failed_partitions'] = failed
+        logger.error(f"History fetch incomplete: {len(failed)} of {len(partitions)} partitions failed")
+    logger.info(f"Fetched {len(df)} records in {len(partitions)} {partitioning} partitions "
+                f"({time.perf_counter() - fetch_start:.2f}s)")
+    return df
+
+def fetch_open_and_new_runs(open_guids: List[str], started_since: Optional[datetime], retries: Optional[int] = None) -> pd.DataFrame:
+    """
+    Re-query specific runs by flowguid plus every run started at or after a point in time.
+
+    The flowguid lists are sent in chunks to stay below the SQL Server limit
+    of 2100 parameters per query.
+
+    Args:
+        open_guids: flowguids of runs to re-read (runs still in progress)
+        started_since: Lower bound on StartTime for new runs (None to skip)
+        retries: Retries per query (defaults to DB_FETCH_RETRIES or 2)
+
     Returns:
-        pandas.DataFrame: Sample flow data for demonstration
+        pandas.DataFrame: Current rows of those runs, deduplicated by flowguid
+    """
+    retries = int(os.getenv('DB_FETCH_RETRIES', '2')) if retries is None else retries
+    owners = f"FlowOwner in ({', '.join('?' * len(FLOW_OWNERS))})"
+    select = _history_select()
+    queries = _guid_queries(select, open_guids, f"{owners}\n        AND ", FLOW_OWNERS)
+    if started_since is not None:
+        queries.append((f"{select}WHERE {owners}\n        AND StartTime >= ?",
+                        FLOW_OWNERS + [started_since]))
+    
+    columns, records = None, []
+    for query, params in queries:
+        query_columns, rows = _fetch_rows(query, params, "Open run refresh", 'open_runs', retries + 1)
+        columns = columns or query_columns
+        records.extend(rows)
+    DB_ROWS_FETCHED.labels('open_runs').inc(len(records))
+    if columns is None:
+        return pd.DataFrame()
+    return _dedupe_runs(pd.DataFrame.from_records(records, columns=columns))
+
+def fetch_run_details(flowguids: List[str], retries: Optional[int] = None) -> pd.DataFrame:
+    """
+    Fetch every column of specific runs, for drill-downs on the summary projection.
+
+    Args:
+        flowguids: Runs to load
+        retries: Retries per query (defaults to DB_FETCH_RETRIES or 2)
+
+    Returns:
+        pandas.DataFrame: Full rows of those runs (FLOW_RUN_HISTORY_SELECT columns)
+    """
+    retries = int(os.getenv('DB_FETCH_RETRIES', '2')) if retries is None else retries
+    columns, records = None, []
+    for query, params in _guid_queries(FLOW_RUN_HISTORY_SELECT, flowguids):
+        query_columns, rows = _fetch_rows(query, params, "Run detail fetch", 'run_details', retries + 1)
+        columns = columns or query_columns
+        records.extend(rows)
+    DB_ROWS_FETCHED.labels('run_details').inc(len(records))
+    if columns is None:
+        return pd.DataFrame()
+    return _dedupe_runs(pd.DataFrame.from_records(records, columns=columns))
+
+def get_run_details(runs: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add the full run details to rows selected in a drill-down.
+
+    Rows from the full projection, CSV or sample data already carry every
+    column and are returned unchanged; summary rows are joined with the
+    detail columns re-read by flowguid.
+
+    Args:
+        runs: Processed rows of the runs to show
+
+    Returns:
+        pandas.DataFrame: The same rows with the detail columns added where they could be loaded
     """
+    if runs.empty or all(column in runs.columns for column in DETAIL_ONLY_COLUMNS) or not ODBC_AVAILABLE:
+        return runs
     try:
-        logger.info("Generating sample data for demonstration purposes")
-        
-        # Sample flow names
-        flows = [
-            "AMZ - Order Processing", 
-            "C2D - Data Integration",
-            "PS - Report Generation",
-            "WF - System Check",
-            "BI - Data Analytics"
-        ]
-        
-        # Sample owners
-        owners = [
-            "powerautomate",
-            "powerautomate02 serviceaccount",
-            "powerautomate03 serviceaccount",
-            "powerautomate04"
-        ]
+        details = fetch_run_details(runs['flowguid'].dropna().unique().tolist())
+    except Exception as e:
+        logger.error(f"Could not load run details: {e}")
+        return runs
+    if details.empty:
+        return runs
+    extra = [column for column in details.columns if column not in runs.columns]
+    return runs.merge(details[['flowguid'] + extra], on='flowguid', how='left')
+
+class FlowRunSnapshot:
+    """
+    In-memory run history kept current by re-querying only in-flight runs.
+
+    The first call (and every ``full_refresh_seconds``) fetches the whole
+    month. In between, a refresh re-reads the runs still Running without a
+    completion time plus any run started since the newest start time in the
+    snapshot, and patches them in place: changed runs keep their row position
+    and new runs are appended. Refreshes closer together than
+    ``open_refresh_seconds`` return the snapshot unchanged.
+
+    With ``wait=False`` full fetches run on a background thread instead: the
+    first call returns None while the history loads, and a due full refresh
+    keeps serving the current snapshot until the new one is in. A failed
+    background load is raised to the next callers (so they can fall back) and
+    retried at most every ``open_refresh_seconds``.
+    """
+
+    def __init__(self, full_refresh_seconds: float = 900, open_refresh_seconds: float = 5):
+        self.full_refresh_seconds = full_refresh_seconds
+        self.open_refresh_seconds = open_refresh_seconds
+        self.last_refresh: Optional[Dict[str, Any]] = None
+        self._df: Optional[pd.DataFrame] = None
+        self._loaded_at = 0.0
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+        self._loader: Optional[threading.Thread] = None
+        self._load_error: Optional[Exception] = None
+        self._failed_at = 0.0
+        # Bumped by clear(), so a background load started before it is discarded
+        self._generation = 0
+
+    @classmethod
+    def from_env(cls) -> 'FlowRunSnapshot':
+        """Build from FULL_REFRESH_SECONDS and OPEN_RUN_REFRESH_SECONDS"""
+        return cls(full_refresh_seconds=float(os.getenv('FULL_REFRESH_SECONDS', '900')),
+                   open_refresh_seconds=float(os.getenv('OPEN_RUN_REFRESH_SECONDS', '5')))
+
+    @property
+    def loading(self) -> bool:
+        """True while a background full load is running"""
+        return self._loader is not None and self._loader.is_alive()
+
+    def clear(self) -> None:
+        """Drop the snapshot so the next get fetches the full history"""
+        with self._lock:
+            self._df = None
+            self._load_error = None
+            self._generation += 1
+
+    def _start_load(self) -> None:
+        """Start a background full load unless one is already running (called with the lock held)"""
+        if self.loading:
+            return
+        self._loader = threading.Thread(target=self._load_in_background, args=(self._generation,),
+                                        name='flow-history-load', daemon=True)
+        self._loader.start()
+
+    def _load_in_background(self, generation: int) -> None:
+        started = time.perf_counter()
+        try:
+            df = fetch_flow_run_history()
+        except Exception as e:
+            logger.warning(f"Background history load failed: {e}")
+            with self._lock:
+                if generation == self._generation:
+                    self._load_error = e
+                    self._failed_at = time.monotonic()
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            now = time.monotonic()
+            self._df = df
+            self._load_error = None
+            self._loaded_at = self._refreshed_at = now
+            self.last_refresh = {'kind': 'full', 'rows': len(df), 'updated': 0, 'added': 0,
+                                 'seconds': time.perf_counter() - started, 'at': datetime.now()}
+        logger.info(f"Background history load finished: {len(df)} rows in {time.perf_counter() - started:.1f}s")
+
+    def get(self, full_refresh: bool = False, wait: bool = True) -> Optional[pd.DataFrame]:
+        """
+        Return the current run history, refreshing it as needed.
+
+        Args:
+            full_refresh: Re-query the whole month even if the snapshot is recent (always waits)
+            wait: Fetch the full history in this call; if False it is loaded on a background thread
+
+        Returns:
+            pandas.DataFrame: Shallow copy of the snapshot, or None while the first background load runs
+        """
+        with self._lock:
+            now = time.monotonic()
+            started = time.perf_counter()
+            due = self._df is None or now - self._loaded_at >= self.full_refresh_seconds
+            if not wait and not full_refresh and due:
+                if self._load_error is None or now - self._failed_at >= self.open_refresh_seconds:
+                    self._start_load()
+                if self._df is None:
+                    if self._load_error is not None:
+                        raise self._load_error
+                    return None
+                # Serve the current snapshot (with open runs refreshed) until the new one is in
+                due = False
+            if due or full_refresh:
+                try:
+                    self._df = fetch_flow_run_history()
+                except Exception:
+                    if self._df is None:
+                        raise
+                    logger.warning("Full history refresh failed, serving the previous snapshot", exc_info=True)
+                else:
+                    self._loaded_at = self._refreshed_at = now
+                    self.last_refresh = {'kind': 'full', 'rows': len(self._df), 'updated': 0, 'added': 0,
+                                         'seconds': time.perf_counter() - started, 'at': datetime.now()}
+            elif now - self._refreshed_at >= self.open_refresh_seconds:
+                try:
+                    updated, added = self._refresh_open_runs()
+                    self.last_refresh = {'kind': 'open_runs', 'rows': len(self._df), 'updated': updated, 'added': added,
+                                         'seconds': time.perf_counter() - started, 'at': datetime.now()}
+                except Exception as e:
+                    # Keep serving the last snapshot; the next rerun tries again
+                    logger.warning(f"Open run refresh failed, serving the previous snapshot: {e}")
+                self._refreshed_at = now
+            df = self._df.copy(deep=False)
+            df.attrs = dict(self._df.attrs)
+            return df
+
+    def _refresh_open_runs(self) -> Tuple[int, int]:
+        df = self._df
+        open_runs = (df['taskstatus'] == 'Running') & df['datetimecompleted'].isna()
+        open_guids = df.loc[open_runs, 'flowguid'].dropna().unique().tolist()
+        newest_start = pd.to_datetime(df['datetimestarted']).max() if not df.empty else None
+        started_since = None if newest_start is None or pd.isna(newest_start) else newest_start.to_pydatetime()
         
-        # Status options with probabilities
-        statuses = ["Succeeded", "Failed", "Running", "Canceled"]
-        status_probs = [0.7, 0.15, 0.1, 0.05]  # 70% success rate
+        rows = fetch_open_and_new_runs(open_guids, started_since)
+        if rows.empty:
+            logger.info(f"Open run refresh: {len(open_guids)} open runs, no changes")
+            return 0, 0
         
-        # Generate sample data
-        now = datetime.now()
-        today = now.date()
-        yesterday = today - timedelta(days=1)
+        # Row position of every run in the snapshot (the last one if a flowguid repeats)
+        guid_positions = pd.Series(np.arange(len(df)), index=df['flowguid'])
+        guid_positions = guid_positions[guid_positions.index.notna() & ~guid_positions.index.duplicated(keep='last')]
+        positions = guid_positions.reindex(rows['flowguid']).to_numpy()
+        known = ~np.isnan(positions)
+        updated_rows, new_rows = rows[known], rows[~known]
         
-        # Create empty list to hold records
-        records = []
+        patched = df
+        if len(updated_rows):
+            positions = positions[known].astype(np.int64)
+            changed = np.zeros(len(updated_rows), dtype=bool)
+            for column in df.columns.intersection(updated_rows.columns):
+                current = df[column].to_numpy()[positions]
+                incoming = updated_rows[column].to_numpy()
+                changed |= ~((current == incoming) | (pd.isna(current) & pd.isna(incoming)))
+            if changed.any():
+                patched = df.copy(deep=False)
+                for column in df.columns.intersection(updated_rows.columns):
+                    values = df[column].to_numpy(copy=True)
+                    incoming = updated_rows[column].to_numpy()[changed]
+                    try:
+                        values[positions[changed]] = incoming
+                    except (TypeError, ValueError):
+                        # e.g. a NULL arriving in an integer column
+                        values = values.astype(object)
+                        values[positions[changed]] = incoming
+                    patched[column] = values
+            updated_rows = updated_rows[changed]
+        if len(new_rows):
+            patched = pd.concat([patched, new_rows.reindex(columns=df.columns)], ignore_index=True)
         
-        # Generate records for each flow
-        for flow in flows:
-            for hour in range(24):
-                # Half the flows run every hour, half run every other hour
-                if hour % 2 == 0 or flow.startswith(("AMZ", "C2D")):
-                    # Random start time within the hour
-                    start_min = np.random.randint(0, 50)
-                    start_time = datetime.combine(yesterday, datetime.min.time()) + timedelta(hours=hour, minutes=start_min)
-                    
-                    # Random duration between 1-15 minutes
-                    duration = np.random.randint(1, 15)
-                    end_time = start_time + timedelta(minutes=duration)
-                    
-                    # Random status with weighted probability
-                    status = np.random.choice(statuses, p=status_probs)
-                    
-                    # Create record
-                    record = {
-                        'flowguid': f"sample-{flow}-{hour}",
-                        'flowname': flow,
-                        'startedon': start_time.isoformat(),
-                        'lastmodified': end_time.isoformat(),
-                        'state': 'Completed' if status in ['Succeeded', 'Failed'] else 'Active',
-                        'flowowner': np.random.choice(owners),
-                        'datetimestarted': start_time,
-                        'datetimecompleted': end_time if status != 'Running' else None,
-                        'taskstatus': status,
-                        'triggertype': np.random.choice(['Recurrence', 'manual'], p=[0.8, 0.2]),
-                        'wassuccessful': 1 if status == 'Succeeded' else 0,
-                        'finalsuccessful': 1 if status == 'Succeeded' else 0
-                    }
-                    records.append(record)
+        patched.attrs = dict(df.attrs)
+        self._df = patched
+        logger.info(f"Open run refresh: {len(open_guids)} open runs re-read, "
+                    f"{len(updated_rows)} updated, {len(new_rows)} new")
+        return len(updated_rows), len(new_rows)
+
+# Process-wide run history shared by all sessions
+FLOW_RUN_SNAPSHOT = FlowRunSnapshot.from_env()
+
+def generate_sample_data():
+    """
+    Generate sample data for demonstration when no real data is available
+    
+    Returns:
+        pandas.DataFrame: Sample flow data for demonstration
+    """
+    try:
+        logger.info("Generating sample data for demonstration purposes")
+        from synthetic_data import generate_workload
         
-        # Convert to DataFrame
-        sample_df = pd.DataFrame(records)
+        # Two days of runs for a few dozen flows across the real owners and mapped projects
+        sample_df = generate_workload(flows=40, days=2, seed=None)
         logger.info(f"Generated {len(sample_df)} sample records for demonstration")
         return sample_df
         
@@ -222,12 +716,16 @@ def get_data_from_csv(filepath=None):
     Fallback function to load data from CSV when database connection is not available
     
     Args:
-        filepath (str, optional): Path to CSV file. If None, looks for most recent flow_data_*.csv
+        filepath (str, optional): Path to CSV file. If None, uses CSV_DATA_PATH if set,
+            otherwise looks for most recent flow_data_*.csv
     
     Returns:
         pandas.DataFrame: Data loaded from CSV file
     """
     try:
+        if filepath is None:
+            filepath = os.getenv('CSV_DATA_PATH') or None
+        
         if filepath is None:
             # Look for CSV files in multiple possible locations
             csv_files = []
@@ -293,19 +791,39 @@ def get_data_from_csv(filepath=None):
         logger.debug(traceback.format_exc())
         return pd.DataFrame()  # Return empty DataFrame on error
 
-def get_flow_data(use_csv=False):
+def get_flow_data(use_csv=False, full_refresh=False, wait=True, use_snapshot=True):
     """
-    Get flow data from either database, CSV, or generate sample data
+    Get flow data from an Arrow snapshot (ARROW_SNAPSHOT_DIR), database, CSV, or generate sample data
+    
+    Database data is served from the in-memory FLOW_RUN_SNAPSHOT, which
+    re-queries only open and newly started runs between full refreshes.
     
     Args:
         use_csv (bool): Force using CSV instead of database
+        full_refresh (bool): Re-query the whole history instead of only the open runs
+        wait (bool): Block on full database fetches; if False they run in the background
+            (see FLOW_RUN_SNAPSHOT.loading)
+        use_snapshot (bool): Serve the Arrow snapshot when ARROW_SNAPSHOT_DIR is set (False for
+            the publisher itself, which must read the source)
     
     Returns:
-        pandas.DataFrame: Flow data from one of the available sources
+        pandas.DataFrame: Flow data from one of the available sources, or None while the
+        first background history load is running
     """
+    # Shared Arrow snapshot published by the ingestion process, if configured
+    snapshot_dir = os.getenv('ARROW_SNAPSHOT_DIR')
+    if snapshot_dir and use_snapshot and not use_csv:
+        from arrow_snapshots import read_latest_snapshot
+        df = read_latest_snapshot(snapshot_dir)
+        if df is not None and not df.empty:
+            logger.info(f"Using Arrow snapshot with {len(df)} records")
+            return df
+        logger.warning(f"No Arrow snapshot available in {snapshot_dir}, falling back")
+    
     # If ODBC driver isn't available or CSV is specifically requested, use CSV
     if use_csv or not ODBC_AVAILABLE:
         logger.info("Using CSV data source")
+        CSV_FALLBACKS.labels('requested' if use_csv else 'odbc_unavailable').inc()
         df = get_data_from_csv()
         if not df.empty:
             return df
@@ -314,48 +832,19 @@ def get_flow_data(use_csv=False):
             return generate_sample_data()
     
     try:
-        # Try database connection first
-        connection = create_db_connection()
-        
-        query = """
-        SELECT
-            FlowGUID as flowguid,
-            FlowName as flowname,
-            CreatedTime as startedon,
-            LastModified as lastmodified,
-            State as state,
-            FlowOwner as flowowner,
-            StartTime as datetimestarted,
-            EndTime as datetimecompleted,
-            TaskStatus as taskstatus,
-            TriggerType as triggertype,
-            CASE WHEN TaskStatus = 'Succeeded' THEN 1 ELSE 0 END as wassuccessful,
-            CASE WHEN TaskStatus = 'Succeeded' THEN 1 ELSE 0 END as finalsuccessful
-        FROM BusinessAnalytics.dbo.rpa_FlowRunHistory
-        WHERE FlowOwner in (
-            'powerautomate', 'powerautomate02 serviceaccount',
-            'powerautomate03 serviceaccount', 'powerautomate04',
-            'powerautomate05', 'powerautomate06', 'powerautomate07',
-            'powerautomate08', 'Ryan Kieselhorst', 'Colin Boyle',
-            'Cheddrick Bagunu', 'Edu Cielo', 'Mohammad Asim'
-        )
-        AND StartTime >= DATEADD(month, -1, GETDATE())
-        """
-        
-        cursor = execute_query(connection, query)
-        columns = [column[0] for column in cursor.description]
-        data = cursor.fetchall()
-        
-        df = pd.DataFrame.from_records(data, columns=columns)
-        
-        # Close connection
-        connection.close()
+        # Full history in concurrent partition queries, then only open and new runs
+        df = FLOW_RUN_SNAPSHOT.get(full_refresh=full_refresh, wait=wait)
+        if df is None:
+            logger.info("Run history is still loading")
+            return None
         logger.info(f"Successfully retrieved {len(df)} records from database")
         
         return df
         
     except Exception as e:
         logger.warning(f"Database connection failed: {e}. Falling back to CSV data.")
+        DB_ERRORS.inc()
+        CSV_FALLBACKS.labels('db_error').inc()
         return get_data_from_csv()
 
 def test_connection() -> Tuple[bool, str]:
@@ -393,6 +882,7 @@ def test_connection() -> Tuple[bool, str]:
         return False, f"Unexpected error: {str(e)}"
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     # Test the connection when run directly
     success, message = test_connection()
     if success:
@@ -0,0 +1,299 @@
+"""
+Synthetic flow run generator for the Bot Monitoring Dashboard
+Builds realistic, seeded workloads (schedules, failure bursts, long-running jobs) for demos and benchmarks
+
+Usage:
+    python synthetic_data.py --rows 2000000 --days 30 --output data/flow_data_synthetic.parquet
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger('synthetic_data')
+
+# flow_mapping.json next to this module, whatever the working directory
+DEFAULT_MAPPING_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'flow_mapping.json')
+
+# Accounts and people from the FlowOwner filter of the get_flow_data query
+SERVICE_ACCOUNTS = (
+    'powerautomate', 'powerautomate02 serviceaccount', 'powerautomate03 serviceaccount',
+    'powerautomate04', 'powerautomate05', 'powerautomate06', 'powerautomate07', 'powerautomate08'
+)
+PEOPLE = ('Ryan Kieselhorst', 'Colin Boyle', 'Cheddrick Bagunu', 'Edu Cielo', 'Mohammad Asim')
+
+# Share of flows per run interval in minutes (0 = manually triggered)
+DEFAULT_SCHEDULES = {15: 0.08, 30: 0.10, 60: 0.35, 120: 0.15, 240: 0.10, 1440: 0.12, 0: 0.10}
+
+# Relative likelihood of a manual run starting in each hour of the day (business hours)
+MANUAL_HOUR_WEIGHTS = np.array([1, 1, 1, 1, 1, 2, 4, 8, 12, 12, 12, 10, 8, 10, 12, 12, 10, 8, 5, 3, 2, 1, 1, 1], dtype=float)
+
+# Building blocks for flows beyond the ones named in flow_mapping.json
+NAME_PREFIXES = ('AMZ', 'C2D', 'PS', 'WF', 'BI', 'VP', 'AWS', 'AZ', 'Pricing', 'Forecasting', 'Suppression')
+NAME_NOUNS = (
+    'OrderSync', 'InvoiceScrape', 'PriceAlert', 'ReportExport', 'ListingHealth', 'DeliveryDates',
+    'Reconciliation', 'TemplateUpload', 'ClaimsReview', 'KeywordDownload', 'BuyBoxScrape', 'Approvals'
+)
+
+COLUMNS = [
+    'flowguid', 'flowname', 'startedon', 'lastmodified', 'state', 'flowowner', 'datetimestarted',
+    'datetimecompleted', 'taskstatus', 'triggertype', 'wassuccessful', 'finalsuccessful'
+]
+
+def _load_flow_names(mapping_path: Optional[str]) -> List[str]:
+    """Flow names from flow_mapping.json, or an empty list if it cannot be read"""
+    if not mapping_path:
+        return []
+    try:
+        with open(mapping_path, 'r') as f:
+            return list(json.load(f))
+    except Exception as e:
+        logger.warning(f"Could not read flow names from {mapping_path}: {e}")
+        return []
+
+def build_flow_catalog(
+    flows: int,
+    rng: np.random.Generator,
+    schedules: Dict[int, float] = None,
+    failure_rate: float = 0.05,
+    long_running_share: float = 0.03,
+    mapping_path: Optional[str] = DEFAULT_MAPPING_PATH
+) -> pd.DataFrame:
+    """
+    Create the flows of a workload with their schedule, owner and behaviour.
+
+    Flows named in flow_mapping.json are used first so the exact mapping tier
+    is exercised; the remaining flows get generated names that resolve through
+    the rule and extraction tiers.
+
+    Args:
+        flows: Number of flows
+        rng: Random generator
+        schedules: Share of flows per run interval in minutes (0 = manual)
+        failure_rate: Mean failure probability outside bursts
+        long_running_share: Share of flows whose runs take hours
+        mapping_path: flow_mapping.json to take real flow names from (None to skip)
+
+    Returns:
+        pd.DataFrame: One row per flow (name, owner, interval, offset, fail_prob, duration_s)
+    """
+    schedules = schedules or DEFAULT_SCHEDULES
+    known = _load_flow_names(mapping_path)
+    if len(known) > flows:
+        known = list(rng.choice(np.array(known, dtype=object), flows, replace=False))
+    extra = flows - len(known)
+    generated = (
+        pd.Series(np.array(NAME_PREFIXES, dtype=object)[rng.integers(0, len(NAME_PREFIXES), extra)])
+        + '_' + pd.Series(np.array(NAME_NOUNS, dtype=object)[rng.integers(0, len(NAME_NOUNS), extra)])
+        + '_' + pd.Series(np.arange(extra)).map('{:04d}'.format)
+    )
+    names = np.concatenate([np.array(known, dtype=object), generated.to_numpy(dtype=object)])
+
+    owners = np.array(SERVICE_ACCOUNTS + PEOPLE, dtype=object)
+    owner_weights = np.array([0.85 / len(SERVICE_ACCOUNTS)] * len(SERVICE_ACCOUNTS) + [0.15 / len(PEOPLE)] * len(PEOPLE))
+
+    intervals = np.array(list(schedules), dtype=np.int64)
+    weights = np.array(list(schedules.values()), dtype=float)
+    interval = intervals[rng.choice(len(intervals), flows, p=weights / weights.sum())]
+
+    # Typical run takes ~2 minutes; long-running jobs take 1-6 hours
+    duration_s = np.clip(np.exp(rng.normal(np.log(120), 0.8, flows)), 10, 3600)
+    long_running = rng.random(flows) < long_running_share
+    duration_s[long_running] = rng.uniform(3600, 6 * 3600, long_running.sum())
+
+    # Beta-distributed failure probability with the requested mean
+    failure_rate = min(max(failure_rate, 1e-4), 0.99)
+    fail_prob = rng.beta(0.5, 0.5 * (1 - failure_rate) / failure_rate, flows)
+
+    return pd.DataFrame({
+        'flowname': names,
+        'flowowner': owners[rng.choice(len(owners), flows, p=owner_weights)],
+        'interval': interval,
+        'offset': (rng.random(flows) * np.maximum(interval, 1)).astype(np.int64),
+        'fail_prob': fail_prob,
+        'duration_s': duration_s,
+        'long_running': long_running
+    })
+
+def _expected_runs_per_flow(schedules: Dict[int, float], days: int, manual_runs_per_day: float) -> float:
+    weights = np.array(list(schedules.values()), dtype=float)
+    weights = weights / weights.sum()
+    return sum(w * (days * 1440 / i if i else days * manual_runs_per_day)
+               for i, w in zip(schedules, weights))
+
+def generate_workload(
+    flows: int = 2000,
+    days: int = 7,
+    seed: Optional[int] = 42,
+    end: Optional[pd.Timestamp] = None,
+    rows: Optional[int] = None,
+    schedules: Dict[int, float] = None,
+    failure_rate: float = 0.05,
+    burst_probability: float = 0.02,
+    burst_failure_rate: float = 0.85,
+    long_running_share: float = 0.03,
+    manual_runs_per_day: float = 3.0,
+    mapping_path: Optional[str] = DEFAULT_MAPPING_PATH
+) -> pd.DataFrame:
+    """
+    Generate flow runs shaped like the rpa_FlowRunHistory query result.
+
+    Every step is vectorized over all runs, so millions of rows take seconds.
+    Scheduled flows run every ``interval`` minutes from a random offset with a
+    little start jitter; manual flows run a Poisson number of times per day,
+    mostly in business hours. On each flow-day a failure burst starts with
+    ``burst_probability`` and lasts 1-6 hours, during which runs fail with
+    ``burst_failure_rate``. Runs still in progress at ``end`` are 'Running'.
+
+    Args:
+        flows: Number of flows (ignored when rows is given)
+        days: Days of history, ending at end
+        seed: Random seed; the same arguments and seed give the same frame
+        end: End of the generated window (default: now)
+        rows: Exact number of runs to return; the flow count is derived from it
+        schedules: Share of flows per run interval in minutes (0 = manual)
+        failure_rate: Mean failure probability outside bursts
+        burst_probability: Probability of a failure burst per flow and day
+        burst_failure_rate: Failure probability during a burst
+        long_running_share: Share of flows whose runs take hours
+        manual_runs_per_day: Mean runs per day of manually triggered flows
+        mapping_path: flow_mapping.json to take real flow names from (None to skip)
+
+    Returns:
+        pd.DataFrame: Runs sorted by datetimestarted with the columns returned by get_flow_data
+    """
+    rng = np.random.default_rng(seed)
+    schedules = schedules or DEFAULT_SCHEDULES
+    end = pd.Timestamp.now().floor('s') if end is None else pd.Timestamp(end)
+    start = end.normalize() - pd.Timedelta(days=days - 1)
+    span_s = int((end - start).total_seconds())
+    if rows is not None:
+        # Overshoot slightly and trim to the exact row count below
+        flows = max(1, int(np.ceil(rows * 1.1 / max(_expected_runs_per_flow(schedules, days, manual_runs_per_day), 1e-9))))
+
+    catalog = build_flow_catalog(flows, rng, schedules, failure_rate, long_running_share, mapping_path)
+    interval_s = catalog['interval'].to_numpy() * 60
+    offset_s = catalog['offset'].to_numpy() * 60
+    scheduled = interval_s > 0
+
+    # Scheduled runs: flow i runs at offset + k * interval for k < count
+    counts = np.zeros(flows, dtype=np.int64)
+    counts[scheduled] = np.maximum(0, (span_s - offset_s[scheduled]) // interval_s[scheduled] + 1)
+    flow_idx = np.repeat(np.arange(flows), counts)
+    seq = np.arange(len(flow_idx)) - np.repeat(np.cumsum(counts) - counts, counts)
+    jitter = rng.integers(0, 1 + np.minimum(interval_s[flow_idx] // 4, 300))
+    start_s = offset_s[flow_idx] + seq * interval_s[flow_idx] + jitter
+
+    # Manual runs: Poisson count per flow, start mostly during business hours
+    manual = np.flatnonzero(~scheduled)
+    manual_counts = rng.poisson(manual_runs_per_day * days, len(manual))
+    manual_idx = np.repeat(manual, manual_counts)
+    hours = rng.choice(24, len(manual_idx), p=MANUAL_HOUR_WEIGHTS / MANUAL_HOUR_WEIGHTS.sum())
+    manual_s = rng.integers(0, days, len(manual_idx)) * 86400 + hours * 3600 + rng.integers(0, 3600, len(manual_idx))
+
+    flow_idx = np.concatenate([flow_idx, manual_idx])
+    start_s = np.concatenate([start_s, manual_s])
+    keep = start_s <= span_s
+    flow_idx, start_s = flow_idx[keep], start_s[keep]
+    is_manual = ~scheduled[flow_idx]
+
+    if rows is not None and len(flow_idx) > rows:
+        chosen = np.sort(rng.choice(len(flow_idx), rows, replace=False))
+        flow_idx, start_s, is_manual = flow_idx[chosen], start_s[chosen], is_manual[chosen]
+    n = len(flow_idx)
+
+    # Failure bursts: one optional (start hour, length) window per flow and day
+    day = np.minimum(start_s // 86400, days - 1)
+    hour = (start_s % 86400) // 3600
+    has_burst = rng.random((flows, days)) < burst_probability
+    burst_start = rng.integers(0, 24, (flows, days))
+    burst_length = rng.integers(1, 7, (flows, days))
+    in_burst = (has_burst[flow_idx, day]
+                & (hour >= burst_start[flow_idx, day])
+                & (hour < burst_start[flow_idx, day] + burst_length[flow_idx, day]))
+    fail_prob = np.where(in_burst, burst_failure_rate, catalog['fail_prob'].to_numpy()[flow_idx])
+
+    duration_s = catalog['duration_s'].to_numpy()[flow_idx] * rng.lognormal(0, 0.35, n)
+    draw = rng.random(n)
+
+    # Sort by start time before building columns (datetime64 arrays, no per-row objects)
+    order = np.argsort(start_s, kind='stable')
+    flow_idx, start_s, is_manual = flow_idx[order], start_s[order], is_manual[order]
+    duration_s, draw, fail_prob = duration_s[order], draw[order], fail_prob[order]
+
+    started = start.to_datetime64() + (start_s * 10**9).astype('timedelta64[ns]')
+    completed = started + (duration_s.round() * 10**9).astype(np.int64).astype('timedelta64[ns]')
+    running = completed > end.to_datetime64()
+
+    status = np.where(draw < fail_prob, 'Failed', np.where(draw > 0.99, 'Cancelled', 'Succeeded')).astype(object)
+    status[running] = 'Running'
+    success = (status == 'Succeeded').astype(np.int64)
+
+    # Run id: flow number and run number, unique within the workload
+    guid = np.char.add(np.char.add(np.char.zfill(flow_idx.astype('U6'), 6), '-'),
+                       np.char.zfill(np.arange(n).astype('U9'), 9)).astype(object)
+
+    return pd.DataFrame({
+        'flowguid': guid,
+        'flowname': catalog['flowname'].to_numpy()[flow_idx],
+        'startedon': started,
+        'lastmodified': np.where(running, started, completed),
+        'state': np.where(running, 'Active', 'Completed').astype(object),
+        'flowowner': catalog['flowowner'].to_numpy()[flow_idx],
+        'datetimestarted': started,
+        'datetimecompleted': np.where(running, np.datetime64('NaT', 'ns'), completed),
+        'taskstatus': status,
+        'triggertype': np.where(is_manual, 'manual', 'Recurrence').astype(object),
+        'wassuccessful': success,
+        'finalsuccessful': success
+    }, columns=COLUMNS)
+
+def write_workload(df: pd.DataFrame, path: str) -> None:
+    """
+    Write a workload as Parquet (``.parquet``, needs pyarrow) or CSV (anything else).
+
+    CSV files named flow_data_*.csv in the working or data directory are picked
+    up by the dashboard's CSV fallback.
+    """
+    directory = os.path.dirname(str(path))
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if str(path).endswith('.parquet'):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic flow run workload")
+    parser.add_argument('--rows', type=int, help="Exact number of runs (overrides --flows)")
+    parser.add_argument('--flows', type=int, default=2000, help="Number of flows")
+    parser.add_argument('--days', type=int, default=7, help="Days of history ending now")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed")
+    parser.add_argument('--end', help="End of the window (default: now)")
+    parser.add_argument('--failure-rate', type=float, default=0.05, help="Mean failure probability outside bursts")
+    parser.add_argument('--burst-probability', type=float, default=0.02, help="Failure burst probability per flow and day")
+    parser.add_argument('--long-running-share', type=float, default=0.03, help="Share of flows running for hours")
+    parser.add_argument('--output', default='data/flow_data_synthetic.csv', help="Output .csv or .parquet file")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    df = generate_workload(
+        flows=args.flows, days=args.days, seed=args.seed, end=args.end, rows=args.rows,
+        failure_rate=args.failure_rate, burst_probability=args.burst_probability,
+        long_running_share=args.long_running_share
+    )
+    generated = time.perf_counter()
+    write_workload(df, args.output)
+    print(f"Generated {len(df):,} runs of {df['flowname'].nunique():,} flows in {generated - started:.1f}s, "
+          f"wrote {args.output} in {time.perf_counter() - generated:.1f}s")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())